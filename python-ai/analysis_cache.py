@@ -0,0 +1,268 @@
+"""
+Content-addressed cache for per-stage image analysis results.
+
+Re-uploads, deduplicated files and retries send the same bytes through
+/analyze-image again. Each stage result (caption, embedding, faces, objects,
+colors, quality, hashes, scene) is cached under:
+
+    sha256(file contents) + stage name + the options that affect that stage
+
+so changing one request flag (say, ``embedding_model``) only recomputes the
+stage it affects. Entries live in a single SQLite file and are evicted
+least-recently-used once the store exceeds its size budget.
+
+Configuration (environment variables):
+- ANALYSIS_CACHE_ENABLED: "true"/"false" (default: true)
+- ANALYSIS_CACHE_DIR: directory for the SQLite store (default: ~/.cache/avinash-eye/analysis)
+- ANALYSIS_CACHE_MAX_MB: size budget before LRU eviction (default: 512)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when a stage's output format changes so stale entries stop matching
+# (2: entries are keyed by the model that produced them and failed stages
+# are no longer stored, so version 1 entries may hold fallback or failure output)
+CACHE_VERSION = 2
+
+# Evict down to this fraction of the budget so we don't evict on every put
+EVICTION_TARGET_RATIO = 0.9
+
+
+def _is_empty(value: Any) -> bool:
+    """True for None and empty containers/arrays (what stages return on failure, never cached)."""
+    if value is None:
+        return True
+    size = getattr(value, 'size', None)
+    if isinstance(size, int):
+        return size == 0
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+class AnalysisCache:
+    """
+    Size-bounded, on-disk LRU cache of JSON-serializable stage results.
+
+    All methods are thread-safe. If the store cannot be opened the cache
+    disables itself and every lookup is a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, enabled: bool = True):
+        self.directory = Path(directory)
+        self.max_bytes = max(0, max_bytes)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self._entries = 0
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._evictions = 0
+        # (path, size, mtime_ns) -> sha256, so repeated lookups don't re-read the file
+        self._hash_memo: "OrderedDict[tuple, str]" = OrderedDict()
+        self._hash_memo_size = 4096
+
+        if self.enabled:
+            self._open()
+
+    def _open(self) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.directory / "analysis_cache.sqlite3"),
+                check_same_thread=False,
+                timeout=10,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " stage TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL,"
+                " value TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            conn.commit()
+            self._entries, self._total_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            self._conn = conn
+            logger.info(
+                f"Analysis cache ready at {self.directory} "
+                f"({self._total_bytes / 1024 / 1024:.1f}MB of {self.max_bytes / 1024 / 1024:.0f}MB used)"
+            )
+        except Exception as e:
+            logger.warning(f"Analysis cache disabled, could not open {self.directory}: {str(e)}")
+            self.enabled = False
+            self._conn = None
+
+    def file_hash(self, path: str) -> Optional[str]:
+        """SHA-256 of a file's contents, memoized by path, size and mtime."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._hash_memo.get(memo_key)
+            if cached is not None:
+                self._hash_memo.move_to_end(memo_key)
+                return cached
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        file_hash = digest.hexdigest()
+
+        with self._lock:
+            self._hash_memo[memo_key] = file_hash
+            if len(self._hash_memo) > self._hash_memo_size:
+                self._hash_memo.popitem(last=False)
+        return file_hash
+
+    @staticmethod
+    def stage_key(file_hash: str, stage: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Cache key for one stage of one file under a given option set."""
+        payload = json.dumps(
+            {"v": CACHE_VERSION, "file": file_hash, "stage": stage, "options": options or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, file_hash: Optional[str], stage: str, options: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        if not self.enabled or not file_hash:
+            return None
+        key = self.stage_key(file_hash, stage, options)
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._misses[stage] = self._misses.get(stage, 0) + 1
+                    return None
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+                self._hits[stage] = self._hits.get(stage, 0) + 1
+            except Exception as e:
+                logger.warning(f"Analysis cache read failed for {stage}: {str(e)}")
+                return None
+        return json.loads(row[0])
+
+    def put(self, file_hash: Optional[str], stage: str, options: Optional[Dict[str, Any]], value: Any) -> None:
+        """Store a JSON-serializable value, evicting LRU entries if over budget."""
+        if not self.enabled or not file_hash:
+            return
+        key = self.stage_key(file_hash, stage, options)
+        try:
+            encoded = json.dumps(value)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not caching {stage}: value is not JSON-serializable ({str(e)})")
+            return
+        size = len(encoded)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            try:
+                previous = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, stage, size, last_access, value) VALUES (?, ?, ?, ?, ?)",
+                    (key, stage, size, time.time(), encoded),
+                )
+                self._total_bytes += size - (previous[0] if previous else 0)
+                if previous is None:
+                    self._entries += 1
+                if self._total_bytes > self.max_bytes:
+                    self._evict_locked(int(self.max_bytes * EVICTION_TARGET_RATIO))
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Analysis cache write failed for {stage}: {str(e)}")
+
+    def _evict_locked(self, target_bytes: int) -> None:
+        """Delete least-recently-used entries until the store fits in target_bytes."""
+        cursor = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC")
+        doomed = []
+        for key, size in cursor:
+            if self._total_bytes <= target_bytes:
+                break
+            doomed.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self._entries -= len(doomed)
+        self._evictions += len(doomed)
+        logger.info(f"Analysis cache evicted {len(doomed)} entries")
+
+    def get_or_compute(
+        self,
+        file_hash: Optional[str],
+        stage: str,
+        options: Optional[Dict[str, Any]],
+        compute: Callable[[], Any],
+        encode: Callable[[Any], Any] = lambda value: value,
+        decode: Callable[[Any], Any] = lambda value: value,
+    ) -> Any:
+        """
+        Return the cached stage result or compute, store and return it.
+
+        ``encode``/``decode`` convert between the stage's native value (e.g. a
+        numpy array) and its JSON form. Empty results are not cached, since
+        stages return empty values when they fail.
+        """
+        cached = self.get(file_hash, stage, options)
+        if cached is not None:
+            return decode(cached)
+        value = compute()
+        if not _is_empty(value):
+            self.put(file_hash, stage, options, encode(value))
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit/miss counters per stage plus store size, for /health.
+
+        Reads the in-memory counters without taking the lock, which is held
+        across SQLite commits and eviction: /health calls this on the event
+        loop. Each counter read and dict copy is atomic under the GIL, so the
+        snapshot can be a moment stale but never fails.
+        """
+        hits = dict(self._hits)
+        misses = dict(self._misses)
+        total_hits = sum(hits.values())
+        total_lookups = total_hits + sum(misses.values())
+        return {
+            "enabled": self.enabled,
+            "entries": self._entries,
+            "size_mb": round(self._total_bytes / 1024 / 1024, 2),
+            "max_size_mb": round(self.max_bytes / 1024 / 1024, 2),
+            "evictions": self._evictions,
+            "hit_rate": round(total_hits / total_lookups, 3) if total_lookups else 0.0,
+            "stages": {
+                stage: {"hits": hits.get(stage, 0), "misses": misses.get(stage, 0)}
+                for stage in sorted(set(hits) | set(misses))
+            },
+        }
+
+
+def create_analysis_cache() -> AnalysisCache:
+    """Build an AnalysisCache from environment configuration."""
+    return AnalysisCache(
+        directory=os.getenv('ANALYSIS_CACHE_DIR', os.path.expanduser('~/.cache/avinash-eye/analysis')),
+        max_bytes=int(float(os.getenv('ANALYSIS_CACHE_MAX_MB', '512')) * 1024 * 1024),
+        enabled=os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+    )
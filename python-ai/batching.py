@@ -0,0 +1,156 @@
+"""
+Request-coalescing micro-batcher for model forward passes.
+
+Handlers run in executor lanes (see inference_executor.py) and each one asks
+for a single embedding. Running the model once per image wastes most of the
+CPU on per-call overhead, so MicroBatcher collects pending requests from all
+threads for up to ``max_batch_size`` items or ``max_wait_ms`` milliseconds,
+runs one batched call, and hands each caller its own result.
+
+Usage:
+    batcher = MicroBatcher("clip", embed_images_clip, max_batch_size=16, max_wait_ms=10)
+    vector = batcher.run(image)  # blocks until the batch containing image finishes
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces single-item requests into batched calls on a worker thread.
+
+    ``batch_fn`` receives a list of items and must return a sequence of the
+    same length, one result per item in order. If it raises, every caller in
+    that batch receives the exception.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.total_batch_seconds = 0.0
+        self.batch_size_histogram: Dict[int, int] = {}
+
+    def submit(self, item: Any) -> Future:
+        """Queue an item and return a Future for its result."""
+        if self._closed:
+            raise RuntimeError(f"Batcher '{self.name}' is closed")
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def run(self, item: Any) -> Any:
+        """Queue an item and block until its batch has been processed."""
+        return self.submit(item).result()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._loop, name=f"batcher-{self.name}", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[tuple]:
+        """Block for the first request, then gather more until full or the window closes."""
+        first = self._queue.get()
+        if first is None:
+            return []
+        pending = [first]
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                self._closed = True
+                break
+            pending.append(entry)
+        return pending
+
+    def _loop(self) -> None:
+        while True:
+            pending = self._collect()
+            if not pending:
+                return
+            # Skip requests whose callers already gave up
+            pending = [(item, future) for item, future in pending if future.set_running_or_notify_cancel()]
+            if pending:
+                self._process(pending)
+            if self._closed and self._queue.empty():
+                return
+
+    def _process(self, pending: List[tuple]) -> None:
+        items = [item for item, _ in pending]
+        started = time.perf_counter()
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch function for '{self.name}' returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            logger.error(f"Batch of {len(items)} failed in '{self.name}': {str(e)}")
+            for _, future in pending:
+                future.set_exception(e)
+            self._record(len(items), time.perf_counter() - started, failed=True)
+            return
+
+        for (_, future), result in zip(pending, results):
+            future.set_result(result)
+        self._record(len(items), time.perf_counter() - started, failed=False)
+
+    def _record(self, size: int, seconds: float, failed: bool) -> None:
+        with self._stats_lock:
+            self.batches += 1
+            self.items += size
+            self.total_batch_seconds += seconds
+            self.batch_size_histogram[size] = self.batch_size_histogram.get(size, 0) + 1
+            if failed:
+                self.failed_batches += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counters and the batch-size histogram (size -> number of batches)."""
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "batches": self.batches,
+                "items": self.items,
+                "failed_batches": self.failed_batches,
+                "pending": self._queue.qsize(),
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "avg_batch_ms": round(self.total_batch_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            }
+
+    def close(self) -> None:
+        """Stop the worker after it drains already queued requests."""
+        if self._worker is not None and not self._closed:
+            self._queue.put(None)
+        self._closed = True
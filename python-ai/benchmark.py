@@ -0,0 +1,495 @@
+"""
+Benchmark harness for the python-ai pipeline.
+
+Drives each stage function of main_multimedia.py directly and each endpoint
+through FastAPI's TestClient against synthetic fixtures (see
+benchmark_fixtures.py), and reports per case:
+
+- p50/p95/mean/min/max latency and throughput (calls per second)
+- Peak process RSS while the case ran, and the growth over the RSS before it
+
+Results are written as JSON so a run can be compared against a saved
+baseline; --fail-on-regression turns a slower p50/p95, lower throughput or
+higher peak RSS (beyond --threshold) into a non-zero exit code for CI.
+
+By default the models are replaced with deterministic stand-ins that cost
+roughly nothing, so the harness runs offline and measures everything around
+the forward passes (decode, resize, colors, quality, hashes, thumbnails,
+video/PDF/audio handling, batching and endpoint overhead). --real-models
+benchmarks the real models instead, which needs the weights available.
+Face detection, OCR, PDF rendering and audio decoding always run for real.
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --fail-on-regression
+    python benchmark.py --only stage:colors,endpoint:/analyze-image -n 20
+    python benchmark.py --real-models --iterations 3
+
+Configuration (environment variables):
+- BENCHMARK_FIXTURES_DIR: where fixtures are generated and reused (default: /tmp/eye-benchmark)
+- Every main_multimedia.py setting applies; the analysis cache and thumbnail
+  freshness checks are disabled unless --with-cache is passed, so repeated
+  iterations measure real work
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+from benchmark_fixtures import create_fixtures
+from image_context import ImageContext
+
+logger = logging.getLogger(__name__)
+
+# Settings captured into the results so runs with different tuning are told apart
+CONFIG_PREFIXES = (
+    "MODEL_", "VIDEO_", "SCENE_", "EMBEDDING_", "CAPTION_", "BULK_", "INFERENCE_", "ANALYSIS_CACHE_",
+    "THUMBNAIL_", "TRANSCRIBE_", "TRANSCRIPT_", "TEXT_EMBEDDING_", "VAD_", "WHISPER_", "OCR_",
+)
+
+# metric -> True when a higher value is worse
+COMPARED_METRICS = {
+    "p50_ms": True,
+    "p95_ms": True,
+    "throughput_per_s": False,
+    "peak_rss_mb": True,
+}
+
+
+# ===== MEASUREMENT =====
+
+def _rss_bytes() -> int:
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    import resource
+    # ru_maxrss is a lifetime peak (KB on Linux), the best we can do without psutil
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class RssSampler:
+    """Samples process RSS on a background thread and keeps the peak."""
+
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval_seconds = interval_seconds
+        self.start_bytes = 0
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "RssSampler":
+        self.start_bytes = self.peak_bytes = _rss_bytes()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.peak_bytes = max(self.peak_bytes, _rss_bytes())
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, _rss_bytes())
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float, sampler: RssSampler) -> Dict[str, Any]:
+    """Latency percentiles, throughput and memory for one case."""
+    summary: Dict[str, Any] = {"iterations": len(latencies), "errors": errors}
+    if latencies:
+        ms = np.asarray(latencies) * 1000
+        summary.update({
+            "mean_ms": round(float(ms.mean()), 3),
+            "p50_ms": round(float(np.percentile(ms, 50)), 3),
+            "p95_ms": round(float(np.percentile(ms, 95)), 3),
+            "min_ms": round(float(ms.min()), 3),
+            "max_ms": round(float(ms.max()), 3),
+            "throughput_per_s": round(len(latencies) / wall_seconds, 3) if wall_seconds > 0 else None,
+        })
+    summary["peak_rss_mb"] = round(sampler.peak_bytes / 1024 / 1024, 1)
+    summary["rss_growth_mb"] = round((sampler.peak_bytes - sampler.start_bytes) / 1024 / 1024, 1)
+    return summary
+
+
+def measure(fn: Callable[[], Any], iterations: int, warmup: int) -> Dict[str, Any]:
+    """Run fn warmup + iterations times; failed calls are counted, not timed."""
+    for _ in range(warmup):
+        try:
+            fn()
+        except Exception as e:
+            logger.warning(f"Warmup call failed: {str(e)}")
+
+    latencies = []
+    errors = 0
+    last_error = None
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            call_started = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                errors += 1
+                last_error = str(e)
+                continue
+            latencies.append(time.perf_counter() - call_started)
+        wall = time.perf_counter() - started
+
+    summary = summarize(latencies, errors, wall, sampler)
+    if last_error:
+        summary["last_error"] = last_error[:500]
+    return summary
+
+
+# ===== MODEL STAND-INS =====
+
+class _StandInWhisper:
+    """Whisper look-alike: one segment per 5s of the chunk instead of a transcript."""
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **options) -> Dict[str, Any]:
+        seconds = len(audio) / 16000
+        segments = [
+            {"start": start, "end": min(seconds, start + 5.0), "text": f"stand-in words at {start:g}s",
+             "avg_logprob": -0.2, "no_speech_prob": 0.01}
+            for start in np.arange(0.0, seconds, 5.0)
+        ]
+        return {"text": " ".join(s["text"] for s in segments), "segments": segments, "language": language or "en"}
+
+
+_projections: Dict[int, np.ndarray] = {}
+
+
+def _stand_in_embeddings(images: List[Image.Image], dimension: int) -> np.ndarray:
+    """Fixed random projection of a 16x16 grayscale thumbnail, L2-normalized."""
+    projection = _projections.get(dimension)
+    if projection is None:
+        projection = _projections[dimension] = np.random.default_rng(dimension).standard_normal(
+            (256, dimension)
+        ).astype(np.float32)
+    pixels = np.stack([
+        np.asarray(image.convert("L").resize((16, 16)), dtype=np.float32).ravel() / 255.0
+        for image in images
+    ])
+    vectors = pixels @ projection
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+
+
+def _stand_in_captions(images: List[Image.Image], *args, **kwargs) -> List[str]:
+    captions = []
+    for image in images:
+        r, g, b = (int(c) for c in np.asarray(image.resize((1, 1))).reshape(-1)[:3])
+        captions.append(f"a synthetic image with mean color {r} {g} {b}")
+    return captions
+
+
+def install_model_stand_ins(m) -> None:
+    """
+    Swap every model forward pass in main_multimedia for a stand-in.
+
+    The registry keeps working (loads, readiness, eviction), it just loads
+    stand-in objects, so the endpoints' model checks pass unchanged.
+    """
+    sentinel = (object(), object())
+    for name in ("blip", "clip", "florence", "siglip", "aimv2"):
+        m.model_registry.register(name, lambda: sentinel)
+    m.model_registry.register("whisper", _StandInWhisper)
+    m.WHISPER_AVAILABLE = True
+
+    m.generate_captions_blip = _stand_in_captions
+    m._generate_captions_florence_batch = _stand_in_captions
+    for batcher in m.caption_batchers.values():
+        batcher.batch_fn = _stand_in_captions
+
+    for name, batcher in m.embedding_batchers.items():
+        dimension = m.EMBEDDING_DIMENSIONS[name]
+        embed = lambda images, dimension=dimension: _stand_in_embeddings(images, dimension)
+        batcher.batch_fn = embed
+        setattr(m, f"_embed_images_{name}", embed)
+
+    def generate_text_embeddings(texts: List[str]) -> np.ndarray:
+        vectors = np.stack([
+            np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(m.EMBEDDING_DIMENSIONS["clip"])
+            for text in texts
+        ]).astype(np.float32) if texts else np.zeros((0, m.EMBEDDING_DIMENSIONS["clip"]), dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def detect_objects_florence(image) -> Dict[str, Any]:
+        width, height = ImageContext.wrap(image).original_size
+        return {"labels": ["shape"], "bboxes": [[0, 0, width, height]], "label_counts": {"shape": 1}}
+
+    def classify_scene_ollama(image, ollama_model: str = "") -> Dict[str, Any]:
+        return {"environment": "indoor", "setting": "synthetic", "confidence": 1.0}
+
+    m.generate_text_embeddings = generate_text_embeddings
+    # Keep the stage timers on the functions that are replaced wholesale
+    m.detect_objects_florence = m.stage_metrics.timed("objects")(detect_objects_florence)
+    m.classify_scene_ollama = m.stage_metrics.timed("scene")(classify_scene_ollama)
+
+
+# ===== CASES =====
+
+def build_stage_cases(m, fixtures: Dict[str, str]) -> Dict[str, Callable[[], Any]]:
+    """Stage functions of main_multimedia.py, called directly."""
+    image = Image.open(fixtures["image_small"]).convert("RGB")
+    cases: Dict[str, Callable[[], Any]] = {
+        "stage:decode_large_image": lambda: Image.open(fixtures["image_large"]).convert("RGB"),
+        "stage:caption": lambda: m.generate_caption(image, model="florence"),
+        "stage:embedding": lambda: m.generate_image_embedding(image, model="aimv2"),
+        "stage:faces": lambda: m.detect_faces(image),
+        "stage:objects": lambda: m.detect_objects_florence(image),
+        "stage:colors": lambda: m.extract_dominant_colors(image),
+        "stage:quality": lambda: m.analyze_image_quality(image),
+        "stage:hashes": lambda: m.compute_perceptual_hashes(image),
+        "stage:scene": lambda: m.classify_scene_ollama(image, "llava:13b-v1.6"),
+        "stage:thumbnail": lambda: m.generate_thumbnail(fixtures["image_large"]),
+        "stage:video_decode": lambda: m.decode_video(
+            fixtures["video"],
+            scene_threshold=m.SCENE_THRESHOLD,
+            min_scene_duration_frames=m.MIN_SCENE_DURATION,
+            keyframe_max_side=m.VIDEO_KEYFRAME_MAX_SIDE,
+            max_keyframes=m.VIDEO_MAX_KEYFRAMES,
+            analysis_width=m.SCENE_ANALYSIS_WIDTH,
+            frame_stride=m.SCENE_FRAME_STRIDE,
+        ),
+        "stage:video_thumbnail": lambda: m.generate_video_thumbnail(fixtures["video"]),
+        "stage:audio_thumbnail": lambda: m.generate_audio_thumbnail(fixtures["audio"]),
+        "stage:transcribe": lambda: m.transcribe_audio(fixtures["audio"]),
+        "stage:text_embedding": lambda: m.generate_text_embedding("red boat moored in a harbour at sunset"),
+    }
+    if "pdf" in fixtures:
+        cases["stage:pdf_text"] = lambda: m.extract_pdf_text(fixtures["pdf"])
+        cases["stage:pdf_extract"] = lambda: m.document_ocr.extract_pdf(fixtures["pdf"], None)
+        cases["stage:document_thumbnail"] = lambda: m.generate_document_thumbnail(fixtures["pdf"])
+        if m.OCR_AVAILABLE:
+            cases["stage:ocr"] = lambda: m.perform_ocr(fixtures["pdf"])
+    return cases
+
+
+def _post(client, path: str, payload: Dict[str, Any]) -> Callable[[], Any]:
+    def call():
+        response = client.post(path, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.text[:200]}")
+        return response
+    return call
+
+
+def build_endpoint_cases(client, fixtures: Dict[str, str], bulk_items: int) -> Dict[str, Callable[[], Any]]:
+    """Endpoints through the TestClient, so lanes, batchers and serialization are included."""
+    image_request = {"image_path": fixtures["image_small"], "use_ollama": True}
+    cases = {
+        "endpoint:/health": lambda: client.get("/health"),
+        "endpoint:/analyze-image": _post(client, "/analyze-image", image_request),
+        "endpoint:/analyze-image (4000x3000)": _post(
+            client, "/analyze-image", dict(image_request, image_path=fixtures["image_large"])
+        ),
+        "endpoint:/analyze-images": _post(client, "/analyze-images", {
+            "items": [dict(image_request, image_path=fixtures[name])
+                      for name in ("image_small", "image_png") * (bulk_items // 2 + 1)][:bulk_items]
+        }),
+        "endpoint:/analyze-video": _post(client, "/analyze-video", {"video_path": fixtures["video"]}),
+        "endpoint:/transcribe-audio": _post(client, "/transcribe-audio", {"audio_path": fixtures["audio"]}),
+        "endpoint:/embed-text": _post(client, "/embed-text", {"query": "red boat moored in a harbour at sunset"}),
+    }
+    if "pdf" in fixtures:
+        cases["endpoint:/analyze-document"] = _post(
+            client, "/analyze-document", {"document_path": fixtures["pdf"], "perform_ocr": True}
+        )
+    return cases
+
+
+def _selected(name: str, only: List[str], skip: List[str]) -> bool:
+    if only and not any(name.startswith(prefix) for prefix in only):
+        return False
+    return not any(name.startswith(prefix) for prefix in skip)
+
+
+# ===== BASELINE COMPARISON =====
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Relative change of each compared metric for cases present in both runs.
+
+    Returns one row per (case, metric) with status "regression",
+    "improvement" or "unchanged".
+    """
+    rows = []
+    for case, result in current.get("results", {}).items():
+        previous = baseline.get("results", {}).get(case)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > threshold if higher_is_worse else change < -threshold
+            better = change < -threshold if higher_is_worse else change > threshold
+            rows.append({
+                "case": case,
+                "metric": metric,
+                "baseline": old,
+                "current": new,
+                "change_pct": round(change * 100, 1),
+                "status": "regression" if worse else "improvement" if better else "unchanged",
+            })
+    return rows
+
+
+# ===== REPORTING =====
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'case':<40} {'n':>4} {'p50 ms':>10} {'p95 ms':>10} {'per s':>9} {'peak MB':>9} {'+MB':>7}")
+    for case, r in results.items():
+        if not r.get("iterations"):
+            print(f"{case:<40} {'failed':>4}  {r.get('last_error', '')[:80]}")
+            continue
+        print(
+            f"{case:<40} {r['iterations']:>4} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} "
+            f"{r['throughput_per_s']:>9.2f} {r['peak_rss_mb']:>9.1f} {r['rss_growth_mb']:>7.1f}"
+            + (f"  ({r['errors']} errors)" if r["errors"] else "")
+        )
+
+
+def print_comparison(rows: List[Dict[str, Any]]) -> None:
+    changed = [row for row in rows if row["status"] != "unchanged"]
+    if not changed:
+        print("\nNo changes beyond the threshold against the baseline.")
+        return
+    print(f"\n{'case':<40} {'metric':<18} {'baseline':>10} {'current':>10} {'change':>8}")
+    for row in changed:
+        print(
+            f"{row['case']:<40} {row['metric']:<18} {row['baseline']:>10.2f} {row['current']:>10.2f} "
+            f"{row['change_pct']:>+7.1f}%  {row['status']}"
+        )
+
+
+# ===== MAIN =====
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the python-ai stages and endpoints.")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="timed calls per case (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls per case first (default: 1)")
+    parser.add_argument("--only", default="", help="comma-separated case prefixes to run, e.g. stage:,endpoint:/analyze-video")
+    parser.add_argument("--skip", default="", help="comma-separated case prefixes to skip")
+    parser.add_argument("--real-models", action="store_true", help="use the real models instead of stand-ins")
+    parser.add_argument("--with-cache", action="store_true", help="leave the analysis cache and thumbnail freshness checks enabled")
+    parser.add_argument("--bulk-items", type=int, default=8, help="images per /analyze-images call (default: 8)")
+    parser.add_argument("--video-seconds", type=float, default=20.0, help="length of the video fixture")
+    parser.add_argument("--audio-seconds", type=float, default=30.0, help="length of the audio fixture")
+    parser.add_argument("--fixtures-dir", default=os.getenv("BENCHMARK_FIXTURES_DIR", "/tmp/eye-benchmark"))
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression (default: 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if any metric regressed")
+    parser.add_argument("--verbose", action="store_true", help="keep the service's INFO logging")
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Run the selected cases; returns (results document, baseline comparison rows)."""
+    # Must be set before main_multimedia is imported, since it reads its config at import time
+    os.environ.setdefault("MODEL_STARTUP_MODE", "lazy" if not args.real_models else "blocking")
+    if not args.real_models:
+        # Worker processes would load the real Whisper; transcribe chunks with the stand-in instead
+        os.environ.setdefault("TRANSCRIBE_WORKERS", "0")
+    if not args.with_cache:
+        os.environ["ANALYSIS_CACHE_ENABLED"] = "false"
+        os.environ["THUMBNAIL_FRESHNESS"] = "off"
+
+    fixtures = create_fixtures(args.fixtures_dir, video_seconds=args.video_seconds, audio_seconds=args.audio_seconds)
+
+    import main_multimedia as m
+    from fastapi.testclient import TestClient
+
+    if not args.verbose:
+        # Quiet the service's per-call INFO lines; keep this module's progress output
+        logging.getLogger().setLevel(logging.WARNING)
+        logger.setLevel(logging.INFO)
+    if not args.real_models:
+        install_model_stand_ins(m)
+
+    only = [prefix for prefix in args.only.split(",") if prefix]
+    skip = [prefix for prefix in args.skip.split(",") if prefix]
+    results: Dict[str, Dict[str, Any]] = {}
+
+    with TestClient(m.app) as client:
+        cases = build_stage_cases(m, fixtures)
+        cases.update(build_endpoint_cases(client, fixtures, args.bulk_items))
+        for name, fn in cases.items():
+            if not _selected(name, only, skip):
+                continue
+            logger.info(f"Benchmarking {name}")
+            results[name] = measure(fn, args.iterations, args.warmup)
+
+    document = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "stand_in_models": not args.real_models,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "fixtures": {name: os.path.basename(path) for name, path in fixtures.items()},
+            "config": {key: value for key, value in sorted(os.environ.items()) if key.startswith(CONFIG_PREFIXES)},
+        },
+        "results": results,
+    }
+
+    rows = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare_results(document, json.load(f), args.threshold)
+        document["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "rows": rows}
+    return document, rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+    document, rows = run(args)
+
+    print_results(document["results"])
+    if args.baseline:
+        print_comparison(rows)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    regressions = [row for row in rows if row["status"] == "regression"]
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
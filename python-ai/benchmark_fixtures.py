@@ -0,0 +1,186 @@
+"""
+Synthetic media fixtures for benchmark.py.
+
+Every fixture is generated locally from a fixed seed, so two runs on the same
+machine benchmark byte-identical inputs and no sample media has to be checked
+in or downloaded:
+
+- Images: textured JPEG/PNG photos with shapes and noise (small and large)
+- Video: MP4 with hard scene cuts and moving shapes, so scene detection and
+  keyframe sampling have real work to do
+- PDF: pages of native text plus one scanned-style page rendered as an
+  image (needs PyMuPDF; skipped without it)
+- Audio: 16-bit mono WAV of tones, noise bursts and silent gaps
+
+Usage:
+    fixtures = create_fixtures("/tmp/eye-bench")
+    fixtures["image_small"]  # -> "/tmp/eye-bench/image_small.jpg"
+"""
+
+import logging
+import wave
+from pathlib import Path
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SEED = 1234
+
+LOREM = (
+    "Invoice 2024-0117 issued to Avinash EYE for media indexing services. "
+    "The quarterly report covers image captioning, video scene detection, "
+    "document OCR and audio transcription throughput across all workers. "
+)
+
+
+def make_image(path: Path, size: Tuple[int, int], seed: int = SEED) -> Path:
+    """Gradient background with random rectangles/ellipses and sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([
+        np.broadcast_to(x, (height, width)),
+        np.broadcast_to(y, (height, width)),
+        np.broadcast_to((x + y) / 2, (height, width)),
+    ], axis=-1)
+    image = Image.fromarray(base.astype(np.uint8))
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(24):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        x1 = min(width - 1, x0 + int(rng.integers(width // 20, width // 4)))
+        y1 = min(height - 1, y0 + int(rng.integers(height // 20, height // 4)))
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        if rng.random() < 0.5:
+            draw.rectangle([x0, y0, x1, y1], fill=color)
+        else:
+            draw.ellipse([x0, y0, x1, y1], fill=color)
+
+    pixels = np.asarray(image, dtype=np.int16)
+    pixels = pixels + rng.integers(-12, 13, pixels.shape, dtype=np.int16)
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    if path.suffix.lower() in (".jpg", ".jpeg"):
+        image.save(path, quality=90)
+    else:
+        image.save(path)
+    return path
+
+
+def make_video(path: Path, size: Tuple[int, int], seconds: float, fps: float = 30.0,
+               scene_seconds: float = 3.0, seed: int = SEED) -> Path:
+    """MP4 of solid-colour scenes with a moving square; hard cut every scene_seconds."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV cannot write {path}")
+
+    total_frames = int(seconds * fps)
+    frames_per_scene = max(1, int(scene_seconds * fps))
+    square = max(8, min(width, height) // 6)
+    try:
+        for index in range(total_frames):
+            if index % frames_per_scene == 0:
+                background = tuple(int(c) for c in rng.integers(0, 256, 3))
+                foreground = tuple(255 - c for c in background)
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            frame[:] = background
+            offset = (index % frames_per_scene) / frames_per_scene
+            x = int(offset * (width - square))
+            y = int((height - square) / 2)
+            cv2.rectangle(frame, (x, y), (x + square, y + square), foreground, -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return path
+
+
+def make_pdf(path: Path, text_pages: int = 4, seed: int = SEED) -> Path:
+    """Native-text pages followed by one page that is only an image of text (OCR input)."""
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("PyMuPDF is required to generate PDF fixtures")
+
+    doc = fitz.open()
+    for number in range(text_pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(56, 56, 540, 780), f"Page {number + 1}\n\n" + LOREM * 12, fontsize=11)
+
+    scan = Image.new("RGB", (1240, 1754), "white")
+    draw = ImageDraw.Draw(scan)
+    for line in range(40):
+        draw.text((100, 100 + line * 38), LOREM[(line * 7) % 60:(line * 7) % 60 + 90], fill="black")
+    scan_path = path.with_suffix(".scan.png")
+    scan.save(scan_path)
+    page = doc.new_page()
+    page.insert_image(page.rect, filename=str(scan_path))
+    doc.save(str(path))
+    doc.close()
+    scan_path.unlink()
+    return path
+
+
+def make_audio(path: Path, seconds: float, sample_rate: int = 16000, seed: int = SEED) -> Path:
+    """Alternating tone and noise segments with silent gaps, 16-bit mono WAV."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    signal = np.zeros(total, dtype=np.float32)
+    position = 0
+    while position < total:
+        length = int(rng.uniform(1.0, 4.0) * sample_rate)
+        end = min(total, position + length)
+        t = np.arange(end - position, dtype=np.float32) / sample_rate
+        if rng.random() < 0.5:
+            signal[position:end] = 0.4 * np.sin(2 * np.pi * rng.uniform(120, 880) * t)
+        else:
+            signal[position:end] = 0.2 * rng.standard_normal(end - position)
+        position = end + int(rng.uniform(0.3, 1.2) * sample_rate)  # silence
+
+    with wave.open(str(path), "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes((np.clip(signal, -1, 1) * 32767).astype("<i2").tobytes())
+    return path
+
+
+def create_fixtures(directory: str, video_seconds: float = 20.0, audio_seconds: float = 30.0) -> Dict[str, str]:
+    """
+    Generate every fixture into directory, reusing files from a previous run.
+
+    Returns:
+        Fixture name -> absolute path
+    """
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+
+    builders = {
+        "image_small": (root / "image_small.jpg", lambda p: make_image(p, (640, 480))),
+        "image_large": (root / "image_large.jpg", lambda p: make_image(p, (4000, 3000), seed=SEED + 1)),
+        "image_png": (root / "image_png.png", lambda p: make_image(p, (1920, 1080), seed=SEED + 2)),
+        "video": (root / f"video_720p_{video_seconds:g}s.mp4", lambda p: make_video(p, (1280, 720), video_seconds)),
+        "audio": (root / f"audio_{audio_seconds:g}s.wav", lambda p: make_audio(p, audio_seconds)),
+    }
+    if PYMUPDF_AVAILABLE:
+        builders["pdf"] = (root / "document.pdf", make_pdf)
+    else:
+        logger.warning("PyMuPDF not available, skipping PDF fixture")
+
+    fixtures = {}
+    for name, (path, build) in builders.items():
+        if not path.exists():
+            logger.info(f"Generating fixture {path.name}")
+            build(path)
+        fixtures[name] = str(path.resolve())
+    return fixtures
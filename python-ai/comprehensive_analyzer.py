@@ -103,6 +103,7 @@ class ComprehensiveImageAnalyzer:
         enable_context_chaining: bool = True,
         max_retries: int = 2,
         timeout_seconds: int = 120,
+        max_image_side: int = 1024,
     ):
         """
         Initialize the comprehensive analyzer.
@@ -114,6 +115,7 @@ class ComprehensiveImageAnalyzer:
             enable_context_chaining: Pass context between analysis passes
             max_retries: Max retries per pass on failure
             timeout_seconds: Timeout for each API call
+            max_image_side: Longest side of the image sent to the vision model
         """
         self.ollama_client = ollama_client
         self.ollama_model = ollama_model
@@ -121,6 +123,7 @@ class ComprehensiveImageAnalyzer:
         self.enable_context_chaining = enable_context_chaining
         self.max_retries = max_retries
         self.timeout_seconds = timeout_seconds
+        self.max_image_side = max_image_side
 
         # Import the JSON extractor from main module
         from main_multimedia import extract_json_from_response
@@ -132,6 +135,10 @@ class ComprehensiveImageAnalyzer:
         # Use JPEG for efficiency, preserve RGB
         if image.mode in ('RGBA', 'P'):
             image = image.convert('RGB')
+        # The vision model works at ~1k pixels; don't encode and upload a full-resolution photo
+        if max(image.size) > self.max_image_side:
+            image = image.copy()
+            image.thumbnail((self.max_image_side, self.max_image_side), Image.Resampling.LANCZOS)
         image.save(buffered, format="JPEG", quality=85)
         return base64.b64encode(buffered.getvalue()).decode('utf-8')
 
@@ -397,6 +404,7 @@ def create_analyzer(
     ollama_client,
     ollama_model: str = "llava:13b-v1.6",
     quick_mode: bool = False,
+    max_image_side: int = 1024,
 ) -> ComprehensiveImageAnalyzer:
     """
     Factory function to create a ComprehensiveImageAnalyzer.
@@ -405,6 +413,7 @@ def create_analyzer(
         ollama_client: Initialized ollama client
         ollama_model: Vision model name
         quick_mode: Use quick single-pass mode
+        max_image_side: Longest side of the image sent to the vision model
 
     Returns:
         Configured ComprehensiveImageAnalyzer instance
@@ -413,4 +422,5 @@ def create_analyzer(
         ollama_client=ollama_client,
         ollama_model=ollama_model,
         quick_mode=quick_mode,
+        max_image_side=max_image_side,
     )
@@ -0,0 +1,1017 @@
+"""
+Document OCR - lazy, page-parallel OCR of multi-page PDFs.
+
+Memory stays bounded whatever the page count and pages are OCRed in parallel:
+
+- Renders pages lazily, one page per task, inside the worker that OCRs it
+  (PyMuPDF, or pdf2image limited to that single page), so the parent never
+  holds page bitmaps
+- OCRs pages (and single images) in a pool of worker processes (spawn
+  context). Each worker loads its OCR engines once, when it starts, and
+  serves every later task with them. ``warm()`` starts all workers ahead of
+  the first document, e.g. at service startup. A pool a worker died in is
+  replaced (and re-warmed) on the next task.
+- Bounds the pool's queue: at most OCR_QUEUE_SIZE tasks wait behind the
+  running ones, further submitters block until a slot frees up
+- Measures utilization (worker busy time / worker time available) and queue
+  wait (submission to start of work in a worker) for sizing the pool
+- Keeps at most OCR_MAX_INFLIGHT_PAGES pages rendered or being OCRed at
+  once, which bounds peak memory whatever the page count
+- Yields per-page results as they complete (``iter_pdf``) so callers can
+  stream them; ``ocr_pdf`` collects them back into page order
+- Classifies each page from PyMuPDF stats (text-layer length, share of the
+  page covered by images) and OCRs only the pages without a usable text
+  layer (``extract_pdf``), so mixed PDFs keep their scanned inserts and
+  born-digital pages are never OCRed. A page with little text and nothing
+  to read it from (no images, no outlined text) is native, possibly empty:
+  blank separators and sparse title pages or slides are not OCRed.
+- Keeps each page's line and word boxes with confidences (ocr_layout.py) and
+  re-OCRs the least confident lines from a sharper render of just that
+  region (up to OCR_REOCR_MAX_LINES per page)
+- Picks the render resolution per page: a cheap low-resolution probe render
+  measures the height of the text lines, and the page is rendered at the
+  zoom that brings them to OCR_TARGET_TEXT_HEIGHT pixels, so large print is
+  not rendered at needlessly high resolution and small print is not
+  under-resolved. Each page reports its dpi and probe/render/OCR times.
+
+The OCR engine helpers (PaddleOCR, Tesseract) live here so worker processes
+can run them without importing the FastAPI app and its models.
+
+Configuration (environment variables):
+- OCR_WORKERS: worker processes (default: 2; 0 = OCR pages in-process)
+- OCR_QUEUE_SIZE: tasks allowed to wait for a worker (default: 4 x workers)
+- OCR_PRELOAD_ENGINES: engines each worker loads at startup, comma-separated
+  "paddleocr", "tesseract" or "auto" (default: auto)
+- OCR_MAX_INFLIGHT_PAGES: pages rendered or OCRed at once (default: 2 x workers)
+- OCR_RENDER_ZOOM: PDF render scale, 1.0 = 72 DPI (default: 2.0); the fixed
+  scale when adaptive DPI is off, and the fallback for pages where no text
+  lines are found
+- OCR_TARGET_TEXT_HEIGHT: text line height (pixels, ascender to descender)
+  the adaptive render aims for; 0 disables adaptive DPI (default: 28)
+- OCR_DPI_PROBE_ZOOM: scale of the probe render (default: 1.0)
+- OCR_MIN_ZOOM / OCR_MAX_ZOOM: bounds of the adaptive scale (default: 1.0 / 5.0)
+- OCR_MIN_PAGE_TEXT_CHARS: pages with less native text are OCRed if they
+  have something to OCR, see the next two (default: 50)
+- OCR_MIN_IMAGE_COVERAGE: share of a short-text page that images must cover
+  for it to be OCRed (default: 0.05)
+- OCR_MIN_VECTOR_PATHS: vector paths that make a short-text page without
+  images worth OCRing, i.e. text converted to outlines (default: 200)
+- OCR_IMAGE_COVERAGE: share of the page covered by images that makes it a
+  scan (default: 0.5)
+- OCR_IMAGE_PAGE_TEXT_CHARS: scans with less native text than this are OCRed
+  anyway, so a stray text layer (page numbers, a stamp) does not hide the
+  scanned content (default: 200)
+- OCR_REOCR_CONFIDENCE: lines below this confidence (0-1) are re-OCRed;
+  0 disables re-OCR (default: 0.6)
+- OCR_REOCR_ZOOM: render scale of re-OCRed regions (default: 4.0)
+- OCR_REOCR_MAX_LINES: most lines re-OCRed per page (default: 20)
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from ocr_layout import OCRLayout
+from process_pool import SpawnProcessPool
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+try:
+    from paddleocr import PaddleOCR
+    PADDLEOCR_AVAILABLE = True
+except ImportError:
+    PADDLEOCR_AVAILABLE = False
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    PDF2IMAGE_AVAILABLE = True
+except ImportError:
+    PDF2IMAGE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+ENGINE_NAMES = {"paddleocr": "PaddleOCR", "tesseract": "Tesseract"}
+
+# Margin (PDF points) around a line's box when re-rendering it for re-OCR
+REOCR_PADDING_POINTS = 2.0
+
+# How long each warmup task occupies its worker (see DocumentOCR.warm)
+WARMUP_HOLD_SECONDS = 0.5
+
+# Resolution of the grid image rectangles are rasterized on to measure coverage
+COVERAGE_GRID = 64
+
+# Text-height probe: vertical strips the page is split into (so columns
+# are measured separately), ink pixels that make a strip row part of a
+# text line, and fewest lines needed to trust the estimate
+TEXT_HEIGHT_STRIPS = 4
+TEXT_ROW_MIN_INK = 2
+TEXT_HEIGHT_MIN_LINES = 3
+
+# Adaptive zooms are rounded up to a multiple of this
+ZOOM_STEP = 0.25
+
+# Where a page's text came from
+SOURCE_NATIVE = "native"
+SOURCE_OCR = "ocr"
+
+# PaddleOCR instance of this process (created on first use, it's heavy to load)
+_paddle_ocr = None
+_paddle_lock = threading.Lock()
+
+# Last PDF opened by each thread, reused across its pages: .entry holds
+# ((path, mtime_ns, size), document), so a file replaced at the same path is reopened
+_open_documents = threading.local()
+
+# Engines this worker process has loaded, with their load time in seconds
+_worker_engines: Dict[str, float] = {}
+
+
+def get_paddle_ocr():
+    """Lazily initialize PaddleOCR (it's heavy to load)."""
+    global _paddle_ocr
+    if _paddle_ocr is None and PADDLEOCR_AVAILABLE:
+        with _paddle_lock:
+            if _paddle_ocr is None:
+                logger.info("Initializing PaddleOCR...")
+                _paddle_ocr = PaddleOCR(use_angle_cls=True, lang='en', show_log=False)
+                logger.info("PaddleOCR initialized")
+    return _paddle_ocr
+
+
+def ocr_layout_with_paddle(image, single_line: bool = False) -> OCRLayout:
+    """OCR a PIL Image with PaddleOCR, keeping line boxes and confidences."""
+    ocr = get_paddle_ocr()
+    if ocr is None:
+        return OCRLayout(size=image.size)
+
+    # PaddleOCR returns list of results: [[box, (text, confidence)], ...]
+    result = ocr.ocr(np.array(image), cls=not single_line)
+    return OCRLayout.from_paddle(result, image.size)
+
+
+def ocr_layout_with_tesseract(image, single_line: bool = False) -> OCRLayout:
+    """OCR a PIL Image with Tesseract, keeping word boxes and confidences."""
+    if not TESSERACT_AVAILABLE:
+        return OCRLayout(size=image.size)
+    # --psm 7: treat the image as a single text line (re-OCR of one line's region)
+    data = pytesseract.image_to_data(
+        image, config="--psm 7" if single_line else "", output_type=pytesseract.Output.DICT
+    )
+    return OCRLayout.from_tesseract(data, image.size)
+
+
+LAYOUT_FUNCTIONS: Dict[str, Callable[..., OCRLayout]] = {
+    "paddleocr": ocr_layout_with_paddle,
+    "tesseract": ocr_layout_with_tesseract,
+}
+
+
+def perform_ocr_with_paddle(image) -> str:
+    """Perform OCR using PaddleOCR on a PIL Image."""
+    return ocr_layout_with_paddle(image).text
+
+
+def perform_ocr_with_tesseract(image) -> str:
+    """Perform OCR using Tesseract on a PIL Image."""
+    return ocr_layout_with_tesseract(image).text
+
+
+def resolve_engine(engine: str = "auto") -> Optional[str]:
+    """
+    Engine that will actually run for a requested one.
+
+    "paddleocr" and "tesseract" fall back to each other when missing; "auto"
+    prefers PaddleOCR for its accuracy. Returns None when neither is installed.
+    """
+    if engine == "paddleocr" and not PADDLEOCR_AVAILABLE and TESSERACT_AVAILABLE:
+        logger.warning("PaddleOCR requested but not available, falling back to Tesseract")
+        return "tesseract"
+    if engine == "tesseract" and not TESSERACT_AVAILABLE and PADDLEOCR_AVAILABLE:
+        logger.warning("Tesseract requested but not available, falling back to PaddleOCR")
+        return "paddleocr"
+    if engine in LAYOUT_FUNCTIONS and (PADDLEOCR_AVAILABLE if engine == "paddleocr" else TESSERACT_AVAILABLE):
+        return engine
+    if PADDLEOCR_AVAILABLE:
+        return "paddleocr"
+    if TESSERACT_AVAILABLE:
+        return "tesseract"
+    return None
+
+
+def load_engine(engine: str) -> float:
+    """Load an engine into this process (no-op if already loaded). Returns the seconds it took."""
+    if engine in _worker_engines:
+        return 0.0
+    started = time.perf_counter()
+    if engine == "paddleocr":
+        get_paddle_ocr()
+    elif engine == "tesseract" and TESSERACT_AVAILABLE:
+        # Fails fast here rather than on the first page if the binary is missing
+        pytesseract.get_tesseract_version()
+    seconds = time.perf_counter() - started
+    _worker_engines[engine] = seconds
+    return seconds
+
+
+def _init_worker(engines: Sequence[str]) -> None:
+    """Worker process initializer: load the preload engines before taking tasks."""
+    for engine in engines:
+        try:
+            seconds = load_engine(engine)
+            logger.info(f"OCR worker {os.getpid()} loaded {engine} in {seconds:.1f}s")
+        except Exception as e:
+            logger.error(f"OCR worker {os.getpid()} failed to load {engine}: {str(e)}")
+
+
+def _worker_info(hold_seconds: float = 0.0) -> Dict[str, Any]:
+    # Holding the worker briefly keeps it from taking the next warmup task, so each lands on its own worker
+    time.sleep(hold_seconds)
+    return {"pid": os.getpid(), "engines": dict(_worker_engines)}
+
+
+def _timed_call(func: Callable, *args) -> Dict[str, Any]:
+    """Run func in a worker, reporting when it started (wall clock) and how long it ran."""
+    started_at = time.time()
+    started = time.perf_counter()
+    result = func(*args)
+    return {
+        "result": result,
+        "started_at": started_at,
+        "busy_seconds": time.perf_counter() - started,
+        "pid": os.getpid(),
+    }
+
+
+def pdf_page_count(path: str) -> int:
+    """Number of pages, without rendering any."""
+    if PYMUPDF_AVAILABLE:
+        with fitz.open(path) as doc:
+            return len(doc)
+    if PDF2IMAGE_AVAILABLE:
+        return int(pdfinfo_from_path(path)["Pages"])
+    raise RuntimeError("Neither PyMuPDF nor pdf2image available for PDF OCR")
+
+
+def _pdf_document(path: str):
+    """PyMuPDF document for path, kept open by this thread until another file (or version) is rendered."""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    entry = getattr(_open_documents, "entry", None)
+    if entry is None or entry[0] != key:
+        close_pdf_document()
+        _open_documents.entry = (key, fitz.open(path))
+    return _open_documents.entry[1]
+
+
+def close_pdf_document() -> None:
+    """Close the PDF this thread keeps open for rendering, if any."""
+    entry = getattr(_open_documents, "entry", None)
+    if entry is not None:
+        _open_documents.entry = None
+        entry[1].close()
+
+
+def render_pdf_page(
+    path: str,
+    page_index: int,
+    zoom: float,
+    clip: Optional[Tuple[float, float, float, float]] = None,
+) -> Image.Image:
+    """
+    Render one page (0-based) to an RGB image at zoom x 72 DPI.
+
+    clip (x0, y0, x1, y1 in PDF points) renders only that region; it needs
+    PyMuPDF.
+    """
+    if PYMUPDF_AVAILABLE:
+        page = _pdf_document(path)[page_index]
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=fitz.Rect(clip) if clip else None)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    if clip is not None:
+        raise RuntimeError("Rendering a page region needs PyMuPDF")
+    if PDF2IMAGE_AVAILABLE:
+        # first_page/last_page make poppler render only this page
+        return convert_from_path(path, dpi=int(72 * zoom), first_page=page_index + 1, last_page=page_index + 1)[0]
+    raise RuntimeError("Neither PyMuPDF nor pdf2image available for PDF OCR")
+
+
+def estimate_text_height(image: Image.Image) -> Optional[float]:
+    """
+    Median height in pixels of the text lines in an image, None if it has none.
+
+    The image is binarized (Otsu threshold, ink being the minority class)
+    and split into vertical strips; in each strip, runs of consecutive rows
+    holding ink are text lines. Runs shorter than 2 pixels (specks, rules)
+    or taller than an eighth of the image (photos, figures) are ignored.
+    """
+    gray = np.asarray(image.convert("L"))
+    height, width = gray.shape
+    if height < 16 or width < TEXT_HEIGHT_STRIPS or int(gray.max()) - int(gray.min()) < 32:
+        return None
+
+    # Otsu: threshold maximizing the between-class variance
+    prob = np.bincount(gray.ravel(), minlength=256) / gray.size
+    omega = np.cumsum(prob)
+    mu = np.cumsum(prob * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu[-1] * omega - mu) ** 2 / (omega * (1.0 - omega))
+    ink = gray <= int(np.nanargmax(between))
+    if ink.mean() > 0.5:
+        ink = ~ink  # Light text on a dark background
+
+    bounds = np.linspace(0, width, TEXT_HEIGHT_STRIPS + 1).astype(np.int64)[:-1]
+    rows = np.add.reduceat(ink, bounds, axis=1) >= TEXT_ROW_MIN_INK  # (height, strips)
+    edges = np.diff(np.pad(rows.astype(np.int8), ((1, 1), (0, 0))), axis=0).T
+    # Row-major nonzero keeps starts and ends of each strip paired in order
+    runs = np.nonzero(edges == -1)[1] - np.nonzero(edges == 1)[1]
+    runs = runs[(runs >= 2) & (runs <= height / 8)]
+    if len(runs) < TEXT_HEIGHT_MIN_LINES:
+        return None
+    return float(np.median(runs))
+
+
+def choose_zoom(
+    path: str,
+    page_index: int,
+    target_text_height: float,
+    probe_zoom: float,
+    min_zoom: float,
+    max_zoom: float,
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Render scale that brings a page's text lines to target_text_height pixels.
+
+    Returns (zoom, text height in PDF points), both None when the probe
+    render finds no text lines.
+    """
+    text_height = estimate_text_height(render_pdf_page(path, page_index, probe_zoom))
+    if text_height is None:
+        return None, None
+    text_points = text_height / probe_zoom
+    zoom = min(max_zoom, max(min_zoom, target_text_height / text_points))
+    return float(np.ceil(zoom / ZOOM_STEP) * ZOOM_STEP), text_points
+
+
+def reocr_low_confidence_lines(
+    layout: OCRLayout,
+    path: str,
+    page_index: int,
+    zoom: float,
+    engine: str,
+    threshold: float,
+    reocr_zoom: float,
+    max_lines: int,
+) -> Tuple[int, int]:
+    """
+    Re-render the least confident lines of a page at reocr_zoom and OCR them again.
+
+    A line is replaced when the re-OCR is more confident. Returns (lines
+    re-OCRed, lines replaced).
+    """
+    lines = layout.low_confidence_lines(threshold, max_lines)
+    replaced = 0
+    for index in lines:
+        x0, y0, x1, y1 = (float(v) / zoom for v in layout.line_boxes[index])
+        clip = (
+            max(0.0, x0 - REOCR_PADDING_POINTS), max(0.0, y0 - REOCR_PADDING_POINTS),
+            x1 + REOCR_PADDING_POINTS, y1 + REOCR_PADDING_POINTS,
+        )
+        region = LAYOUT_FUNCTIONS[engine](render_pdf_page(path, page_index, reocr_zoom, clip=clip), single_line=True)
+        if region.line_text and region.confidence > layout.line_conf[index]:
+            layout.replace_line(index, region, origin=(clip[0] * zoom, clip[1] * zoom), scale=reocr_zoom / zoom)
+            replaced += 1
+    return len(lines), replaced
+
+
+def ocr_pdf_page(
+    path: str,
+    page_index: int,
+    zoom: float,
+    engine: str,
+    reocr_confidence: float = 0.0,
+    reocr_zoom: float = 4.0,
+    reocr_max_lines: int = 0,
+    target_text_height: float = 0.0,
+    probe_zoom: float = 1.0,
+    min_zoom: float = 1.0,
+    max_zoom: float = 5.0,
+) -> Dict[str, Any]:
+    """
+    Render and OCR one page. Runs in a worker process (or in-process).
+
+    With target_text_height > 0 the page is first probed at probe_zoom and
+    rendered at the zoom chosen by choose_zoom; zoom is the fallback when
+    the probe finds no text. Lines below reocr_confidence are re-OCRed from
+    a reocr_zoom render of their region (PyMuPDF only).
+
+    Returns:
+        Dict with page (1-based), text, characters, confidence, size, dpi,
+        text_height_pt (probed, else None), probe_ms, render_ms, ocr_ms,
+        reocr_lines, reocr_replaced, reocr_ms, page_ms and layout
+        (OCRLayout.to_dict())
+    """
+    probe_started = time.perf_counter()
+    text_points = None
+    if target_text_height > 0:
+        chosen, text_points = choose_zoom(path, page_index, target_text_height, probe_zoom, min_zoom, max_zoom)
+        zoom = chosen or zoom
+    started = time.perf_counter()
+    image = render_pdf_page(path, page_index, zoom)
+    rendered = time.perf_counter()
+    layout = LAYOUT_FUNCTIONS[engine](image)
+    finished = time.perf_counter()
+    reocr_lines = replaced = 0
+    if reocr_confidence > 0 and reocr_max_lines > 0 and reocr_zoom > zoom and PYMUPDF_AVAILABLE:
+        reocr_lines, replaced = reocr_low_confidence_lines(
+            layout, path, page_index, zoom, engine, reocr_confidence, reocr_zoom, reocr_max_lines
+        )
+    text = layout.text.strip()
+    return {
+        "page": page_index + 1,
+        "text": text,
+        "characters": len(text),
+        "confidence": round(layout.confidence, 3),
+        "size": list(image.size),
+        "dpi": round(72 * zoom),
+        "text_height_pt": round(text_points, 2) if text_points is not None else None,
+        "probe_ms": round((started - probe_started) * 1000, 2),
+        "render_ms": round((rendered - started) * 1000, 2),
+        "ocr_ms": round((finished - rendered) * 1000, 2),
+        "reocr_lines": reocr_lines,
+        "reocr_replaced": replaced,
+        "reocr_ms": round((time.perf_counter() - finished) * 1000, 2),
+        "page_ms": round((time.perf_counter() - probe_started) * 1000, 2),
+        "layout": layout.to_dict(),
+    }
+
+
+def ocr_image_file(path: str, engine: str) -> Dict[str, Any]:
+    """
+    OCR an image file. Runs in a worker process (or in-process).
+
+    Returns:
+        Dict with page (1), text, characters, confidence, size and layout
+    """
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        layout = LAYOUT_FUNCTIONS[engine](image)
+    text = layout.text.strip()
+    return {
+        "page": 1,
+        "text": text,
+        "characters": len(text),
+        "confidence": round(layout.confidence, 3),
+        "size": list(layout.size),
+        "layout": layout.to_dict(),
+    }
+
+
+def image_coverage(page) -> float:
+    """Share (0-1) of a PyMuPDF page's area covered by images, overlaps counted once."""
+    rect = page.rect
+    if rect.is_empty:
+        return 0.0
+    mask = np.zeros((COVERAGE_GRID, COVERAGE_GRID), dtype=bool)
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info["bbox"]
+        # Map the bbox onto the grid, clipped to the page
+        left = int(np.clip((x0 - rect.x0) / rect.width * COVERAGE_GRID, 0, COVERAGE_GRID))
+        right = int(np.ceil(np.clip((x1 - rect.x0) / rect.width * COVERAGE_GRID, 0, COVERAGE_GRID)))
+        top = int(np.clip((y0 - rect.y0) / rect.height * COVERAGE_GRID, 0, COVERAGE_GRID))
+        bottom = int(np.ceil(np.clip((y1 - rect.y0) / rect.height * COVERAGE_GRID, 0, COVERAGE_GRID)))
+        mask[top:bottom, left:right] = True
+    return float(mask.mean())
+
+
+def classify_pdf_pages(
+    path: str,
+    min_text_chars: int = 50,
+    image_coverage_threshold: float = 0.5,
+    image_page_text_chars: int = 200,
+    min_image_coverage: float = 0.05,
+    min_vector_paths: int = 200,
+) -> List[Dict[str, Any]]:
+    """
+    Native text and OCR decision for every page, without rendering any.
+
+    A page needs OCR when images cover at least image_coverage_threshold of
+    it and its text layer has fewer than image_page_text_chars characters,
+    or when its text layer has fewer than min_text_chars and it has
+    something to read: images covering at least min_image_coverage, or at
+    least min_vector_paths vector paths (outlined text). Blank and sparse
+    born-digital pages stay native.
+
+    Returns:
+        List of {"page" (1-based), "text", "text_chars", "image_coverage", "needs_ocr"}
+    """
+    pages = []
+    with fitz.open(path) as doc:
+        for index, page in enumerate(doc):
+            text = page.get_text().strip()
+            coverage = image_coverage(page)
+            if coverage >= image_coverage_threshold and len(text) < image_page_text_chars:
+                needs_ocr = True
+            elif len(text) < min_text_chars:
+                # Drawings are only counted for the few pages this decides
+                needs_ocr = coverage >= min_image_coverage or (
+                    min_vector_paths > 0 and len(page.get_drawings()) >= min_vector_paths
+                )
+            else:
+                needs_ocr = False
+            pages.append({
+                "page": index + 1,
+                "text": text,
+                "text_chars": len(text),
+                "image_coverage": round(coverage, 3),
+                "needs_ocr": needs_ocr,
+            })
+    return pages
+
+
+def join_pages(pages: List[Dict[str, Any]]) -> str:
+    """Page texts in page order, each under a "--- Page n ---" header; empty pages skipped."""
+    return "\n\n".join(
+        f"--- Page {page['page']} ---\n{page['text']}"
+        for page in sorted(pages, key=lambda p: p["page"])
+        if page["text"]
+    )
+
+
+class DocumentOCR:
+    """
+    Page-parallel PDF OCR over a pool of warm OCR worker processes.
+
+    Usage:
+        document_ocr.warm()                        # optional, at startup
+        for page in document_ocr.iter_pdf(path, "tesseract"):
+            ...                                    # completion order
+        result = document_ocr.ocr_pdf(path, "tesseract")   # page order
+        page = document_ocr.ocr_image(image_path, "tesseract")
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_inflight_pages: Optional[int] = None,
+        zoom: float = 2.0,
+        queue_size: Optional[int] = None,
+        preload_engines: Sequence[str] = ("auto",),
+        reocr_confidence: float = 0.6,
+        reocr_zoom: float = 4.0,
+        reocr_max_lines: int = 20,
+        target_text_height: float = 28.0,
+        probe_zoom: float = 1.0,
+        min_zoom: float = 1.0,
+        max_zoom: float = 5.0,
+        min_text_chars: int = 50,
+        image_coverage: float = 0.5,
+        image_page_text_chars: int = 200,
+        min_image_coverage: float = 0.05,
+        min_vector_paths: int = 200,
+    ):
+        self.workers = max(0, workers)
+        self.max_inflight_pages = max(1, max_inflight_pages or 2 * max(1, self.workers))
+        self.zoom = zoom
+        self.min_text_chars = min_text_chars
+        self.image_coverage = image_coverage
+        self.image_page_text_chars = image_page_text_chars
+        self.min_image_coverage = min_image_coverage
+        self.min_vector_paths = min_vector_paths
+        self._native_pages = 0
+        self.queue_size = max(0, queue_size if queue_size is not None else 4 * self.workers)
+        self.reocr_confidence = reocr_confidence
+        self.reocr_zoom = reocr_zoom
+        self.reocr_max_lines = reocr_max_lines
+        self._reocr_lines = 0
+        self._reocr_replaced = 0
+        self.target_text_height = target_text_height
+        self.probe_zoom = probe_zoom
+        self.min_zoom = min_zoom
+        self.max_zoom = max(min_zoom, max_zoom)
+        self._dpi_pages = 0
+        self._dpi_total = 0
+        self._probe_seconds = 0.0
+        self.preload_engines = [e for e in (resolve_engine(name) for name in preload_engines) if e]
+        self._lock = threading.Lock()
+        self._pool = SpawnProcessPool(
+            "OCR", self.workers,
+            initializer=_init_worker,
+            initargs=(self.preload_engines,),
+            description=(
+                f"preloading {', '.join(self.preload_engines) or 'nothing'}, queue of {self.queue_size}, "
+                f"at most {self.max_inflight_pages} page(s) in flight per document"
+            ),
+            on_replaced=self._pool_replaced,
+        )
+        # Running plus waiting tasks; submitters block once every slot is taken
+        self._slots = threading.BoundedSemaphore(max(1, self.workers + self.queue_size))
+        self._documents = 0
+        self._pages = 0
+        self._document_seconds = 0.0
+        self._inflight = 0
+        self._peak_inflight = 0
+        self._outstanding = 0
+        self._max_queue_depth = 0
+        self._tasks = 0
+        self._failed = 0
+        self._worker_busy_seconds = 0.0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._worker_pids: set = set()
+        self._engine_load_seconds: Dict[str, float] = {}
+        self._warmed = False
+
+    def _pool_replaced(self) -> None:
+        """A worker died and the pool was replaced; re-warm the new one if the old one was warm."""
+        with self._lock:
+            self._worker_pids.clear()
+            rewarm = self._warmed
+        if rewarm:
+            threading.Thread(target=self._rewarm, name="ocr-pool-rewarm", daemon=True).start()
+
+    def _rewarm(self) -> None:
+        try:
+            self.warm()
+        except Exception as e:
+            logger.error(f"Re-warming the OCR pool failed: {str(e)}")
+
+    def _submit(self, func: Callable, *args) -> Future:
+        """Queue func(*args) for a worker, blocking while the queue is full. Resolve with _result()."""
+        enqueued_at = time.time()
+        self._slots.acquire()
+        with self._lock:
+            self._outstanding += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._outstanding - self.workers)
+        try:
+            future = self._pool.submit(_timed_call, func, *args)
+        except BaseException:
+            self._slots.release()
+            with self._lock:
+                self._outstanding -= 1
+            raise
+        future.add_done_callback(lambda f: self._task_done(f, enqueued_at))
+        return future
+
+    def _task_done(self, future: Future, enqueued_at: float) -> None:
+        self._slots.release()
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._outstanding -= 1
+            if future.cancelled():
+                return
+            if error is not None:
+                self._failed += 1
+            else:
+                report = future.result()
+                wait_seconds = max(0.0, report["started_at"] - enqueued_at)
+                self._tasks += 1
+                self._worker_busy_seconds += report["busy_seconds"]
+                self._total_wait_seconds += wait_seconds
+                self._max_wait_seconds = max(self._max_wait_seconds, wait_seconds)
+                self._worker_pids.add(report["pid"])
+
+    @staticmethod
+    def _result(future: Future) -> Any:
+        return future.result()["result"]
+
+    def _call(self, func: Callable, *args) -> Any:
+        """Run one task on a worker (or in-process without workers) and wait for it."""
+        if self.workers == 0:
+            report = _timed_call(func, *args)
+            with self._lock:
+                self._tasks += 1
+                self._worker_busy_seconds += report["busy_seconds"]
+            return report["result"]
+        return self._result(self._submit(func, *args))
+
+    def warm(self) -> Dict[str, Any]:
+        """
+        Start every worker and load its engines now instead of on the first document.
+
+        Returns:
+            Dict with the worker pids that answered, the engines they loaded
+            (seconds per engine, slowest worker) and the total warmup seconds
+        """
+        started = time.perf_counter()
+        if self.workers == 0:
+            engines = {engine: load_engine(engine) for engine in self.preload_engines}
+            reports = [{"pid": os.getpid(), "engines": engines}]
+        else:
+            # Each submission finds no idle worker yet, so the pool spawns one per task
+            futures = [self._submit(_worker_info, WARMUP_HOLD_SECONDS) for _ in range(self.workers)]
+            reports = [self._result(future) for future in futures]
+        with self._lock:
+            for report in reports:
+                for engine, seconds in report["engines"].items():
+                    self._engine_load_seconds[engine] = max(self._engine_load_seconds.get(engine, 0.0), seconds)
+            engine_seconds = dict(self._engine_load_seconds)
+            self._warmed = True
+        elapsed = time.perf_counter() - started
+        logger.info(f"OCR pool warm: {len({r['pid'] for r in reports})} worker(s) in {elapsed:.1f}s, engines {engine_seconds}")
+        return {
+            "workers": sorted({r["pid"] for r in reports}),
+            "engines": engine_seconds,
+            "seconds": round(elapsed, 2),
+        }
+
+    def ocr_image(self, path: str, engine: str) -> Dict[str, Any]:
+        """OCR one image file on a warm worker (see ocr_image_file)."""
+        return self._call(ocr_image_file, path, engine)
+
+    def _record_page(self, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._reocr_lines += result.get("reocr_lines", 0)
+            self._reocr_replaced += result.get("reocr_replaced", 0)
+            if "dpi" in result:
+                self._dpi_pages += 1
+                self._dpi_total += result["dpi"]
+                self._probe_seconds += result["probe_ms"] / 1000
+
+    def _track_inflight(self, delta: int) -> None:
+        with self._lock:
+            self._inflight += delta
+            self._peak_inflight = max(self._peak_inflight, self._inflight)
+
+    @staticmethod
+    def _failed_page(path: str, page_index: int, error: Exception) -> Dict[str, Any]:
+        """Result of a page whose render or OCR raised: empty text plus the error."""
+        logger.error(f"OCR of page {page_index + 1} of {path} failed: {str(error)}")
+        return {"page": page_index + 1, "text": "", "characters": 0, "error": str(error)}
+
+    def _page_args(self, adaptive: bool) -> Tuple:
+        """ocr_pdf_page's re-OCR and adaptive DPI arguments."""
+        return (
+            self.reocr_confidence, self.reocr_zoom, self.reocr_max_lines,
+            self.target_text_height if adaptive else 0.0, self.probe_zoom, self.min_zoom, self.max_zoom,
+        )
+
+    def iter_pdf(
+        self,
+        path: str,
+        engine: str,
+        zoom: Optional[float] = None,
+        pages: Optional[Sequence[int]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        OCR the pages of a PDF, yielding each page's result as it completes.
+
+        Pages (0-based indices, default all) are submitted in order with at
+        most max_inflight_pages outstanding. Closing the generator early
+        cancels the pages not yet started. Each page's zoom is chosen from
+        its text height unless zoom is given. A page that fails is yielded
+        with empty text and its "error", the other pages carry on.
+        """
+        page_args = self._page_args(adaptive=zoom is None)
+        zoom = zoom or self.zoom
+        page_count = pdf_page_count(path)
+        page_indices = list(range(page_count)) if pages is None else list(pages)
+        started = time.perf_counter()
+        done_pages = 0
+        try:
+            if self.workers == 0:
+                for page_index in page_indices:
+                    self._track_inflight(1)
+                    try:
+                        result = self._call(ocr_pdf_page, path, page_index, zoom, engine, *page_args)
+                    except Exception as e:
+                        result = self._failed_page(path, page_index, e)
+                    finally:
+                        self._track_inflight(-1)
+                    done_pages += 1
+                    self._record_page(result)
+                    yield {**result, "page_count": page_count}
+                return
+
+            pending: Dict[Future, int] = {}
+            queue = iter(page_indices)
+            next_page = next(queue, None)
+            try:
+                while next_page is not None or pending:
+                    while next_page is not None and len(pending) < self.max_inflight_pages:
+                        pending[self._submit(ocr_pdf_page, path, next_page, zoom, engine, *page_args)] = next_page
+                        self._track_inflight(1)
+                        next_page = next(queue, None)
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for future in sorted(done, key=pending.get):
+                        page_index = pending.pop(future)
+                        self._track_inflight(-1)
+                        done_pages += 1
+                        try:
+                            result = self._result(future)
+                        except Exception as e:
+                            result = self._failed_page(path, page_index, e)
+                        self._record_page(result)
+                        yield {**result, "page_count": page_count}
+            finally:
+                for future in pending:
+                    future.cancel()
+                self._track_inflight(-len(pending))
+        finally:
+            if self.workers == 0:
+                # Rendered in this thread; worker processes swap theirs on the next document
+                close_pdf_document()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self._documents += 1
+                self._pages += done_pages
+                self._document_seconds += elapsed
+            logger.info(f"OCRed {done_pages}/{len(page_indices)} page(s) of {path} with {engine} in {elapsed:.1f}s")
+
+    def iter_hybrid(self, path: str, engine: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Yield every page's text, native where the text layer is usable, OCR elsewhere.
+
+        Native pages come first (they need no rendering), then OCR pages in
+        completion order. Each result carries "source" ("native" or "ocr")
+        plus the classifier's text_chars and image_coverage. An OCR page
+        that found nothing or failed (its "error" is kept) falls back to
+        its native text. With engine None
+        every page keeps its native text. Without PyMuPDF every page is OCRed.
+        """
+        if not PYMUPDF_AVAILABLE:
+            if engine is not None:
+                for page in self.iter_pdf(path, engine):
+                    yield {**page, "source": SOURCE_OCR}
+            return
+
+        classified = classify_pdf_pages(
+            path, self.min_text_chars, self.image_coverage, self.image_page_text_chars,
+            self.min_image_coverage, self.min_vector_paths,
+        )
+        page_count = len(classified)
+        ocr_indices = [p["page"] - 1 for p in classified if p["needs_ocr"]] if engine is not None else []
+        to_ocr = set(ocr_indices)
+        native_text = {p["page"]: p["text"] for p in classified}
+        stats = {p["page"]: {"text_chars": p["text_chars"], "image_coverage": p["image_coverage"]} for p in classified}
+
+        native = [p for p in classified if p["page"] - 1 not in to_ocr]
+        with self._lock:
+            self._native_pages += len(native)
+        for page in native:
+            yield {
+                "page": page["page"],
+                "page_count": page_count,
+                "text": page["text"],
+                "characters": page["text_chars"],
+                "source": SOURCE_NATIVE,
+                **stats[page["page"]],
+            }
+        if ocr_indices:
+            logger.info(f"{len(ocr_indices)}/{page_count} page(s) of {path} have no usable text layer, OCRing them")
+            for page in self.iter_pdf(path, engine, pages=ocr_indices):
+                if not page["text"] and native_text[page["page"]]:
+                    # OCR found nothing or failed: keep whatever the text layer had
+                    text = native_text[page["page"]]
+                    page = {**page, "text": text, "characters": len(text), "source": SOURCE_NATIVE}
+                yield {"source": SOURCE_OCR, **page, **stats[page["page"]]}
+
+    def extract_pdf(
+        self,
+        path: str,
+        engine: Optional[str],
+        on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Text of every page of a PDF, OCRing only the pages that need it (see iter_hybrid).
+
+        Returns:
+            Dict with text (pages merged in page order), pages (per-page
+            results in page order), page_count and ocr_pages (1-based)
+        """
+        pages = []
+        for page in self.iter_hybrid(path, engine):
+            pages.append(page)
+            if on_page is not None:
+                on_page(page)
+        pages.sort(key=lambda p: p["page"])
+        ocr_pages = [p["page"] for p in pages if p["source"] == SOURCE_OCR]
+        if ocr_pages:
+            text = join_pages(pages)
+        else:
+            # Same layout as a plain text-layer extraction
+            text = "\n\n".join(p["text"] for p in pages if p["text"])
+        return {
+            "text": text,
+            "pages": pages,
+            "page_count": pages[0]["page_count"] if pages else 0,
+            "ocr_pages": ocr_pages,
+        }
+
+    def ocr_pdf(
+        self,
+        path: str,
+        engine: str,
+        on_page: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        OCR every page of a PDF.
+
+        Args:
+            path: PDF file
+            engine: Resolved engine name ("paddleocr" or "tesseract", see resolve_engine)
+            on_page: Called with each page's result as it completes
+
+        Returns:
+            Dict with text (pages joined in order), pages (per-page results in
+            page order) and page_count
+        """
+        pages = []
+        page_count = 0
+        for page in self.iter_pdf(path, engine):
+            page_count = page["page_count"]
+            pages.append(page)
+            if on_page is not None:
+                on_page(page)
+        pages.sort(key=lambda p: p["page"])
+        return {"text": join_pages(pages), "pages": pages, "page_count": page_count}
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Pool settings, counters, utilization and queue wait, for /health.
+
+        utilization is worker busy time over the worker time available since
+        the pool started; queued is the tasks beyond one per worker, i.e.
+        those waiting for a free worker.
+        """
+        with self._lock:
+            started_at = self._pool.started_at
+            uptime = time.time() - started_at if started_at else 0.0
+            capacity = uptime * self.workers
+            return {
+                "workers": self.workers,
+                "warm_workers": len(self._worker_pids),
+                "pool_restarts": self._pool.restarts,
+                "preload_engines": self.preload_engines,
+                "engine_load_seconds": {e: round(s, 2) for e, s in self._engine_load_seconds.items()},
+                "queue_size": self.queue_size,
+                "max_inflight_pages": self.max_inflight_pages,
+                "zoom": self.zoom,
+                "adaptive_dpi": self.target_text_height > 0,
+                "target_text_height": self.target_text_height,
+                "avg_dpi": round(self._dpi_total / self._dpi_pages) if self._dpi_pages else None,
+                "avg_probe_ms": round(self._probe_seconds / self._dpi_pages * 1000, 2) if self._dpi_pages else 0.0,
+                "started": self._pool.started,
+                "documents": self._documents,
+                "pages": self._pages,
+                "native_pages": self._native_pages,
+                "inflight_pages": self._inflight,
+                "peak_inflight_pages": self._peak_inflight,
+                "running": min(self._outstanding, self.workers),
+                "queued": max(0, self._outstanding - self.workers),
+                "max_queue_depth": self._max_queue_depth,
+                "tasks": self._tasks,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._total_wait_seconds / self._tasks * 1000, 2) if self._tasks else 0.0,
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 2),
+                "utilization": round(min(1.0, self._worker_busy_seconds / capacity), 3) if capacity > 0 else 0.0,
+                "worker_busy_seconds": round(self._worker_busy_seconds, 2),
+                "reocr_lines": self._reocr_lines,
+                "reocr_replaced": self._reocr_replaced,
+                "document_seconds": round(self._document_seconds, 2),
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+
+def create_document_ocr() -> DocumentOCR:
+    """Build a DocumentOCR from environment configuration."""
+    workers = int(os.getenv('OCR_WORKERS', '2'))
+    inflight = os.getenv('OCR_MAX_INFLIGHT_PAGES')
+    queue_size = os.getenv('OCR_QUEUE_SIZE')
+    return DocumentOCR(
+        workers=workers,
+        max_inflight_pages=int(inflight) if inflight else None,
+        queue_size=int(queue_size) if queue_size else None,
+        preload_engines=[e.strip() for e in os.getenv('OCR_PRELOAD_ENGINES', 'auto').split(',') if e.strip()],
+        reocr_confidence=float(os.getenv('OCR_REOCR_CONFIDENCE', '0.6')),
+        reocr_zoom=float(os.getenv('OCR_REOCR_ZOOM', '4.0')),
+        reocr_max_lines=int(os.getenv('OCR_REOCR_MAX_LINES', '20')),
+        zoom=float(os.getenv('OCR_RENDER_ZOOM', '2.0')),
+        target_text_height=float(os.getenv('OCR_TARGET_TEXT_HEIGHT', '28')),
+        probe_zoom=float(os.getenv('OCR_DPI_PROBE_ZOOM', '1.0')),
+        min_zoom=float(os.getenv('OCR_MIN_ZOOM', '1.0')),
+        max_zoom=float(os.getenv('OCR_MAX_ZOOM', '5.0')),
+        min_text_chars=int(os.getenv('OCR_MIN_PAGE_TEXT_CHARS', '50')),
+        image_coverage=float(os.getenv('OCR_IMAGE_COVERAGE', '0.5')),
+        image_page_text_chars=int(os.getenv('OCR_IMAGE_PAGE_TEXT_CHARS', '200')),
+        min_image_coverage=float(os.getenv('OCR_MIN_IMAGE_COVERAGE', '0.05')),
+        min_vector_paths=int(os.getenv('OCR_MIN_VECTOR_PATHS', '200')),
+    )
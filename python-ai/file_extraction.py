@@ -0,0 +1,605 @@
+"""
+File Extraction - text and metadata from office documents, email, archives and code.
+
+These extractors are pure-Python parsing (python-docx, openpyxl, python-pptx,
+odfpy, the email package, zipfile/tarfile/py7zr/rarfile, Pygments) that holds
+the GIL, so the service runs them in the inference process pool. A spawned
+pool worker imports the module a task's function lives in; keeping them here
+instead of in main_multimedia.py means a worker loads only this module, not
+torch, transformers and the FastAPI app with its models.
+
+Every extractor catches its own errors, logs them and returns an empty result.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def extract_word_document(document_path: str) -> str:
+    """Extract text from Word documents (.docx, .doc, .odt, .rtf)."""
+    try:
+        from pathlib import Path
+        doc_path = Path(document_path)
+        extension = doc_path.suffix.lower()
+
+        if extension in ['.docx', '.doc']:
+            # Handle Word documents
+            try:
+                from docx import Document
+                doc = Document(document_path)
+                full_text = []
+                for para in doc.paragraphs:
+                    if para.text.strip():
+                        full_text.append(para.text)
+                return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract Word document: {str(e)}")
+                return ""
+
+        elif extension == '.odt':
+            # Handle OpenDocument Text
+            try:
+                from odf import text, teletype
+                from odf.opendocument import load
+                textdoc = load(document_path)
+                all_paragraphs = textdoc.getElementsByType(text.P)
+                full_text = [teletype.extractText(p) for p in all_paragraphs if teletype.extractText(p).strip()]
+                return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract ODT document: {str(e)}")
+                return ""
+
+        elif extension == '.rtf':
+            # RTF files - try to read as plain text (basic extraction)
+            try:
+                with open(document_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
+                # Remove RTF control codes (basic cleanup)
+                import re
+                text = re.sub(r'\\[a-z]+\d*\s?', '', content)
+                text = re.sub(r'[{}]', '', text)
+                return text.strip()
+            except Exception as e:
+                logger.error(f"Failed to extract RTF document: {str(e)}")
+                return ""
+
+        return ""
+
+    except Exception as e:
+        logger.error(f"Error extracting Word document: {str(e)}")
+        return ""
+
+
+def extract_spreadsheet(document_path: str) -> str:
+    """Extract text and data from spreadsheets (.xlsx, .xls, .ods, .csv)."""
+    try:
+        from pathlib import Path
+        doc_path = Path(document_path)
+        extension = doc_path.suffix.lower()
+
+        if extension in ['.xlsx', '.xls']:
+            # Handle Excel files
+            try:
+                from openpyxl import load_workbook
+                wb = load_workbook(document_path, read_only=True, data_only=True)
+                full_text = []
+
+                for sheet_name in wb.sheetnames:
+                    sheet = wb[sheet_name]
+                    full_text.append(f"=== Sheet: {sheet_name} ===")
+
+                    # Extract headers (first row)
+                    headers = []
+                    for cell in sheet[1]:
+                        if cell.value:
+                            headers.append(str(cell.value))
+
+                    if headers:
+                        full_text.append("Headers: " + ", ".join(headers))
+
+                    # Extract data (sample first 20 rows to avoid huge text dumps)
+                    for idx, row in enumerate(sheet.iter_rows(min_row=2, max_row=21, values_only=True), 2):
+                        row_values = [str(cell) for cell in row if cell is not None]
+                        if row_values:
+                            full_text.append(f"Row {idx}: " + " | ".join(row_values))
+
+                wb.close()
+                return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract Excel document: {str(e)}")
+                return ""
+
+        elif extension == '.ods':
+            # Handle OpenDocument Spreadsheet
+            try:
+                from odf.opendocument import load
+                from odf.table import Table, TableRow, TableCell
+                from odf import teletype
+
+                spreadsheet = load(document_path)
+                full_text = []
+
+                tables = spreadsheet.getElementsByType(Table)
+                for table in tables[:3]:  # Limit to first 3 sheets
+                    table_name = table.getAttribute("name") or "Sheet"
+                    full_text.append(f"=== Sheet: {table_name} ===")
+
+                    rows = table.getElementsByType(TableRow)
+                    for idx, row in enumerate(rows[:21], 1):  # First 20 rows
+                        cells = row.getElementsByType(TableCell)
+                        row_values = [teletype.extractText(cell).strip() for cell in cells if teletype.extractText(cell).strip()]
+                        if row_values:
+                            full_text.append(f"Row {idx}: " + " | ".join(row_values))
+
+                return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract ODS document: {str(e)}")
+                return ""
+
+        elif extension == '.csv':
+            # Handle CSV files
+            try:
+                import csv
+                with open(document_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    reader = csv.reader(f)
+                    rows = list(reader)[:21]  # First 20 rows
+                    full_text = [" | ".join(row) for row in rows]
+                    return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract CSV document: {str(e)}")
+                return ""
+
+        return ""
+
+    except Exception as e:
+        logger.error(f"Error extracting spreadsheet: {str(e)}")
+        return ""
+
+
+def extract_presentation(document_path: str) -> str:
+    """Extract text from presentations (.pptx, .ppt, .odp)."""
+    try:
+        from pathlib import Path
+        doc_path = Path(document_path)
+        extension = doc_path.suffix.lower()
+
+        if extension in ['.pptx', '.ppt']:
+            # Handle PowerPoint files
+            try:
+                from pptx import Presentation
+                prs = Presentation(document_path)
+                full_text = []
+
+                for slide_num, slide in enumerate(prs.slides, 1):
+                    full_text.append(f"=== Slide {slide_num} ===")
+
+                    for shape in slide.shapes:
+                        if hasattr(shape, "text") and shape.text.strip():
+                            full_text.append(shape.text)
+
+                    # Extract notes
+                    if slide.has_notes_slide and slide.notes_slide.notes_text_frame.text.strip():
+                        full_text.append(f"Notes: {slide.notes_slide.notes_text_frame.text}")
+
+                return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract PowerPoint document: {str(e)}")
+                return ""
+
+        elif extension == '.odp':
+            # Handle OpenDocument Presentation
+            try:
+                from odf.opendocument import load
+                from odf.text import P
+                from odf import teletype
+
+                presentation = load(document_path)
+                full_text = []
+
+                # Extract all text paragraphs
+                paragraphs = presentation.getElementsByType(P)
+                for para in paragraphs:
+                    text = teletype.extractText(para).strip()
+                    if text:
+                        full_text.append(text)
+
+                return '\n'.join(full_text)
+            except Exception as e:
+                logger.error(f"Failed to extract ODP document: {str(e)}")
+                return ""
+
+        return ""
+
+    except Exception as e:
+        logger.error(f"Error extracting presentation: {str(e)}")
+        return ""
+
+
+def extract_email(email_path: str) -> dict:
+    """
+    Extract metadata and content from email files (.eml, .msg).
+
+    Returns:
+        dict with sender, recipients, subject, date, body, and attachment count
+    """
+    try:
+        from pathlib import Path
+        import email
+        from email import policy
+        from email.parser import BytesParser
+        import datetime
+
+        email_file_path = Path(email_path)
+        extension = email_file_path.suffix.lower()
+
+        result = {
+            'sender': None,
+            'recipients': [],
+            'subject': None,
+            'date': None,
+            'body': '',
+            'attachment_count': 0,
+            'has_html': False
+        }
+
+        if extension == '.eml':
+            # Handle .eml files (standard RFC 822 format)
+            try:
+                with open(email_path, 'rb') as f:
+                    msg = BytesParser(policy=policy.default).parse(f)
+
+                # Extract sender
+                result['sender'] = str(msg.get('From', ''))
+
+                # Extract recipients
+                to_addrs = msg.get('To', '')
+                cc_addrs = msg.get('Cc', '')
+                recipients = []
+                if to_addrs:
+                    recipients.extend([addr.strip() for addr in str(to_addrs).split(',')])
+                if cc_addrs:
+                    recipients.extend([addr.strip() for addr in str(cc_addrs).split(',')])
+                result['recipients'] = recipients
+
+                # Extract subject
+                result['subject'] = str(msg.get('Subject', ''))
+
+                # Extract date
+                date_str = msg.get('Date')
+                if date_str:
+                    result['date'] = str(date_str)
+
+                # Extract body
+                body_parts = []
+                if msg.is_multipart():
+                    for part in msg.walk():
+                        content_type = part.get_content_type()
+                        if content_type == 'text/plain':
+                            try:
+                                body_parts.append(part.get_content())
+                            except:
+                                pass
+                        elif content_type == 'text/html':
+                            result['has_html'] = True
+
+                        # Count attachments
+                        if part.get_content_disposition() == 'attachment':
+                            result['attachment_count'] += 1
+                else:
+                    if msg.get_content_type() == 'text/plain':
+                        body_parts.append(msg.get_content())
+
+                result['body'] = '\n\n'.join(body_parts)
+
+                return result
+
+            except Exception as e:
+                logger.error(f"Failed to extract .eml file: {str(e)}")
+                return result
+
+        elif extension == '.msg':
+            # Handle .msg files (Microsoft Outlook format)
+            try:
+                import extract_msg
+
+                msg = extract_msg.Message(email_path)
+
+                # Extract sender
+                result['sender'] = msg.sender or ''
+
+                # Extract recipients
+                recipients = []
+                if msg.to:
+                    recipients.extend([addr.strip() for addr in msg.to.split(';')])
+                if msg.cc:
+                    recipients.extend([addr.strip() for addr in msg.cc.split(';')])
+                result['recipients'] = recipients
+
+                # Extract subject
+                result['subject'] = msg.subject or ''
+
+                # Extract date
+                if msg.date:
+                    result['date'] = str(msg.date)
+
+                # Extract body
+                result['body'] = msg.body or ''
+
+                # Count attachments
+                result['attachment_count'] = len(msg.attachments)
+
+                # Check for HTML body
+                result['has_html'] = bool(msg.htmlBody)
+
+                msg.close()
+                return result
+
+            except Exception as e:
+                logger.error(f"Failed to extract .msg file: {str(e)}")
+                return result
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Error extracting email: {str(e)}")
+        return {
+            'sender': None,
+            'recipients': [],
+            'subject': None,
+            'date': None,
+            'body': '',
+            'attachment_count': 0,
+            'has_html': False
+        }
+
+
+def extract_archive_metadata(archive_path: str) -> dict:
+    """
+    Extract metadata from archive files (.zip, .rar, .7z, .tar, .gz).
+    Does not extract contents, only analyzes the archive structure.
+
+    Returns:
+        dict with file_count, total_size, file_types, and file_list
+    """
+    try:
+        from pathlib import Path
+        import zipfile
+        import tarfile
+
+        archive_file_path = Path(archive_path)
+        extension = archive_file_path.suffix.lower()
+
+        result = {
+            'file_count': 0,
+            'total_size': 0,
+            'file_types': {},
+            'file_list': []
+        }
+
+        if extension == '.zip':
+            # Handle ZIP files
+            try:
+                with zipfile.ZipFile(archive_path, 'r') as zf:
+                    file_list = zf.namelist()
+                    result['file_count'] = len(file_list)
+
+                    # Analyze file types and sizes
+                    for file_info in zf.infolist():
+                        if not file_info.is_dir():
+                            # Get file extension
+                            file_ext = Path(file_info.filename).suffix.lower()
+                            if file_ext:
+                                result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
+
+                            # Add to total size
+                            result['total_size'] += file_info.file_size
+
+                            # Add to file list (limit to first 50 files)
+                            if len(result['file_list']) < 50:
+                                result['file_list'].append({
+                                    'name': file_info.filename,
+                                    'size': file_info.file_size
+                                })
+
+                return result
+
+            except Exception as e:
+                logger.error(f"Failed to extract ZIP metadata: {str(e)}")
+                return result
+
+        elif extension in ['.tar', '.gz', '.tgz']:
+            # Handle TAR files (including .tar.gz)
+            try:
+                mode = 'r:gz' if extension in ['.gz', '.tgz'] or archive_path.endswith('.tar.gz') else 'r'
+                with tarfile.open(archive_path, mode) as tf:
+                    members = tf.getmembers()
+                    result['file_count'] = len([m for m in members if m.isfile()])
+
+                    # Analyze file types and sizes
+                    for member in members:
+                        if member.isfile():
+                            # Get file extension
+                            file_ext = Path(member.name).suffix.lower()
+                            if file_ext:
+                                result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
+
+                            # Add to total size
+                            result['total_size'] += member.size
+
+                            # Add to file list (limit to first 50 files)
+                            if len(result['file_list']) < 50:
+                                result['file_list'].append({
+                                    'name': member.name,
+                                    'size': member.size
+                                })
+
+                return result
+
+            except Exception as e:
+                logger.error(f"Failed to extract TAR metadata: {str(e)}")
+                return result
+
+        elif extension == '.7z':
+            # Handle 7Z files
+            try:
+                import py7zr
+
+                with py7zr.SevenZipFile(archive_path, 'r') as szf:
+                    file_list = szf.getnames()
+                    result['file_count'] = len(file_list)
+
+                    # Analyze file types
+                    for filename in file_list:
+                        file_ext = Path(filename).suffix.lower()
+                        if file_ext:
+                            result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
+
+                        # Add to file list (limit to first 50 files)
+                        if len(result['file_list']) < 50:
+                            result['file_list'].append({
+                                'name': filename,
+                                'size': 0  # py7zr doesn't provide easy size access without extraction
+                            })
+
+                return result
+
+            except Exception as e:
+                logger.error(f"Failed to extract 7Z metadata: {str(e)}")
+                return result
+
+        elif extension == '.rar':
+            # Handle RAR files
+            try:
+                import rarfile
+
+                with rarfile.RarFile(archive_path, 'r') as rf:
+                    file_list = rf.namelist()
+                    result['file_count'] = len(file_list)
+
+                    # Analyze file types and sizes
+                    for file_info in rf.infolist():
+                        if not file_info.isdir():
+                            # Get file extension
+                            file_ext = Path(file_info.filename).suffix.lower()
+                            if file_ext:
+                                result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
+
+                            # Add to total size
+                            result['total_size'] += file_info.file_size
+
+                            # Add to file list (limit to first 50 files)
+                            if len(result['file_list']) < 50:
+                                result['file_list'].append({
+                                    'name': file_info.filename,
+                                    'size': file_info.file_size
+                                })
+
+                return result
+
+            except Exception as e:
+                logger.error(f"Failed to extract RAR metadata: {str(e)}")
+                return result
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Error extracting archive metadata: {str(e)}")
+        return {
+            'file_count': 0,
+            'total_size': 0,
+            'file_types': {},
+            'file_list': []
+        }
+
+
+def analyze_code_file(code_path: str) -> dict:
+    """
+    Analyze code files to extract metadata (language, line count, etc.).
+
+    Returns:
+        dict with language, line_count, code_lines, comment_lines, blank_lines
+    """
+    try:
+        from pathlib import Path
+        from pygments.lexers import get_lexer_for_filename, guess_lexer
+        from pygments.util import ClassNotFound
+        import chardet
+
+        code_file_path = Path(code_path)
+
+        result = {
+            'language': 'unknown',
+            'line_count': 0,
+            'code_lines': 0,
+            'comment_lines': 0,
+            'blank_lines': 0,
+            'file_size': 0,
+            'encoding': 'utf-8',
+            'extracted_text': ''
+        }
+
+        # Get file size
+        result['file_size'] = code_file_path.stat().st_size
+
+        # Detect encoding
+        try:
+            with open(code_path, 'rb') as f:
+                raw_data = f.read()
+                detected = chardet.detect(raw_data)
+                result['encoding'] = detected.get('encoding', 'utf-8') or 'utf-8'
+        except:
+            result['encoding'] = 'utf-8'
+
+        # Read file content
+        try:
+            with open(code_path, 'r', encoding=result['encoding']) as f:
+                content = f.read()
+        except:
+            # Fallback to utf-8 with errors ignored
+            with open(code_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+
+        # Detect language using Pygments
+        try:
+            lexer = get_lexer_for_filename(code_path)
+            result['language'] = lexer.name
+        except ClassNotFound:
+            # Try to guess from content
+            try:
+                lexer = guess_lexer(content)
+                result['language'] = lexer.name
+            except:
+                result['language'] = 'text'
+
+        # Analyze lines
+        lines = content.split('\n')
+        result['line_count'] = len(lines)
+
+        # Simple heuristics for code/comment/blank lines
+        for line in lines:
+            stripped = line.strip()
+            if not stripped:
+                result['blank_lines'] += 1
+            elif stripped.startswith(('#', '//', '/*', '*', '<!--', '--', '%', ';')):
+                result['comment_lines'] += 1
+            else:
+                result['code_lines'] += 1
+
+        # Extract text content for searchability (limit to 50KB for database storage)
+        result['extracted_text'] = content[:50000] if len(content) > 50000 else content
+
+        return result
+
+    except Exception as e:
+        logger.error(f"Error analyzing code file: {str(e)}")
+        return {
+            'language': 'unknown',
+            'line_count': 0,
+            'code_lines': 0,
+            'comment_lines': 0,
+            'blank_lines': 0,
+            'file_size': 0,
+            'encoding': 'utf-8',
+            'extracted_text': ''
+        }
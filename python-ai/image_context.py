@@ -0,0 +1,301 @@
+"""
+Image Context - one decoded image shared by every analysis stage.
+
+The file is decoded once per request and every stage (thumbnail, faces,
+quality, colors, hashes, the models) reads from the same ImageContext, which
+holds:
+
+- The decoded RGB PIL image
+- One RGB ndarray, created on first use and shared by every stage
+- Lazily derived forms: grayscale and HSV
+- A pyramid of power-of-two reductions (1/2, 1/4, ...), each built from the
+  level above it, so stages read the nearest level to the resolution they
+  need instead of the full-resolution original
+
+Stages declare the size they need: models (whose processors resize to 224 to
+768 pixels anyway) take the nearest pyramid level whose short side is large
+enough (``for_short_side``); pixel-statistics stages take an exact
+downscale whose long side fits a bound (``level``), resized from the nearest
+larger pyramid level.
+
+``open()`` decodes at reduced resolution when no stage needs the original:
+
+- JPEG: draft mode, libjpeg scales the DCT by 1/2, 1/4 or 1/8 while decoding,
+  so the full-size bitmap is never produced
+- Anything else, or ``full_resolution=True``: full decode. HEIF/AVIF have no
+  scaled decode, and their embedded thumbnails (typically 320-512px) are
+  smaller than the stages need.
+
+``decode_scale`` records the factor so pixel coordinates (e.g. face boxes)
+can be mapped back to the original. ``decode_report()`` gives the mode used
+and the decode time saved, estimated from the per-format full-decode rate
+(seconds per megapixel) observed by earlier full decodes in this process.
+
+Stages accept either a PIL image or an ImageContext (``ImageContext.wrap``),
+so existing callers keep working. Arrays and images handed out by a context
+are shared and must be treated as read-only.
+
+Configuration (environment variables):
+- STAGE_INPUT_SIZES: per-stage size overrides, e.g. "faces=1600,quality=1024"
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Smallest pyramid level worth building; below this stages resize directly
+MIN_PYRAMID_SIDE = 64
+
+# Decode modes reported by ImageContext.decode_report()
+DECODE_FULL = "full"                        # no stage allowed a reduced decode (or unsupported format)
+DECODE_FULL_REQUESTED = "full_requested"    # caller asked for full resolution
+DECODE_JPEG_DRAFT = "jpeg_draft"            # libjpeg DCT scaling
+
+
+def parse_size_overrides(raw: str) -> Dict[str, int]:
+    """Parse "stage=pixels,stage=pixels" into a dict, ignoring malformed entries."""
+    sizes = {}
+    for entry in raw.split(','):
+        name, _, value = entry.partition('=')
+        if name.strip() and value.strip().isdigit():
+            sizes[name.strip()] = int(value)
+    return sizes
+
+
+def stage_input_sizes(defaults: Dict[str, int]) -> Dict[str, int]:
+    """Defaults updated with STAGE_INPUT_SIZES overrides."""
+    sizes = dict(defaults)
+    sizes.update(parse_size_overrides(os.getenv('STAGE_INPUT_SIZES', '')))
+    return sizes
+
+
+class DecodeRates:
+    """Running average of full-decode cost (seconds per megapixel) per image format."""
+
+    SMOOTHING = 0.2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rates: Dict[str, float] = {}
+
+    def observe(self, image_format: str, seconds: float, pixels: int) -> None:
+        if pixels <= 0:
+            return
+        rate = seconds / (pixels / 1e6)
+        with self._lock:
+            previous = self._rates.get(image_format)
+            self._rates[image_format] = rate if previous is None else previous + self.SMOOTHING * (rate - previous)
+
+    def estimate(self, image_format: str, pixels: int) -> Optional[float]:
+        """Expected full-decode seconds, or None before any full decode of this format."""
+        with self._lock:
+            rate = self._rates.get(image_format)
+        return None if rate is None else rate * pixels / 1e6
+
+
+decode_rates = DecodeRates()
+
+
+def _required_long_side(size: Tuple[int, int], min_short_side: int, min_long_side: int) -> int:
+    """Long side a reduced decode must keep so both limits still hold."""
+    width, height = size
+    return max(min_long_side, math.ceil(min_short_side * max(width, height) / min(width, height)))
+
+
+class ImageContext:
+    """Decoded RGB image plus lazily computed derived forms."""
+
+    def __init__(
+        self,
+        image: Image.Image,
+        path: Optional[str] = None,
+        original_size: Optional[Tuple[int, int]] = None,
+    ):
+        self.image = image if image.mode == "RGB" else image.convert("RGB")
+        self.path = path
+        # Size of the encoded image; differs from image.size after a draft decode
+        self.original_size = original_size or self.image.size
+        self.format: Optional[str] = None
+        self.decode_mode = DECODE_FULL
+        self.decode_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._rgb: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+        self._pyramid: List[Image.Image] = [self.image]
+        self._levels: Dict[int, Image.Image] = {}
+        self._contexts: Dict[int, "ImageContext"] = {}
+
+    @classmethod
+    def open(
+        cls,
+        path: Union[str, Path],
+        min_short_side: int = 0,
+        min_long_side: int = 0,
+        full_resolution: bool = False,
+    ) -> "ImageContext":
+        """
+        Decode a file once, at reduced resolution when the stages allow it.
+
+        Args:
+            path: Image file
+            min_short_side: Smallest short side any stage needs (0 = no limit)
+            min_long_side: Smallest long side any stage needs (0 = no limit)
+            full_resolution: Always decode the original resolution
+
+        With both limits 0 the image is fully decoded. Otherwise JPEGs are
+        decoded with the largest DCT reduction that still meets both limits.
+        """
+        started = time.perf_counter()
+        image = Image.open(path)
+        original_size = image.size
+        image_format = image.format or "unknown"
+        mode = DECODE_FULL_REQUESTED if full_resolution else DECODE_FULL
+
+        if not full_resolution and (min_short_side or min_long_side):
+            width, height = original_size
+            required = _required_long_side(original_size, min_short_side, min_long_side)
+            if image_format == "JPEG" and required < max(width, height):
+                scale = required / max(width, height)
+                # draft() picks the smallest 1/2^k reduction that is at least this size
+                if image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale))) is not None:
+                    mode = DECODE_JPEG_DRAFT
+
+        context = cls(image.convert("RGB"), path=str(path), original_size=original_size)
+        context.format = image_format
+        context.decode_mode = mode
+        context.decode_seconds = time.perf_counter() - started
+        if context.size == original_size:
+            decode_rates.observe(image_format, context.decode_seconds, original_size[0] * original_size[1])
+        return context
+
+    def decode_report(self) -> Dict[str, object]:
+        """Decode mode, sizes and time, plus the estimated time saved versus a full decode."""
+        report = {
+            "mode": self.decode_mode,
+            "format": self.format,
+            "original_size": list(self.original_size),
+            "decoded_size": list(self.size),
+            "decode_ms": round(self.decode_seconds * 1000, 2) if self.decode_seconds is not None else None,
+            "estimated_saved_ms": None,
+        }
+        if self.decode_seconds is not None and self.size != self.original_size:
+            full_seconds = decode_rates.estimate(self.format, self.original_size[0] * self.original_size[1])
+            if full_seconds is not None:
+                report["estimated_saved_ms"] = round(max(0.0, full_seconds - self.decode_seconds) * 1000, 2)
+        return report
+
+    @classmethod
+    def wrap(cls, image: Union[Image.Image, "ImageContext"]) -> "ImageContext":
+        """Return image itself if it is already a context, otherwise wrap it (no copy)."""
+        return image if isinstance(image, ImageContext) else cls(image)
+
+    @property
+    def size(self) -> tuple:
+        return self.image.size
+
+    @property
+    def decode_scale(self) -> float:
+        """Decoded width / original width (1.0 for a full decode)."""
+        return self.image.width / self.original_size[0]
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """H x W x 3 uint8 array of the decoded image."""
+        if self._rgb is None:
+            with self._lock:
+                if self._rgb is None:
+                    self._rgb = np.asarray(self.image)
+        return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        """H x W uint8 luminance."""
+        if self._gray is None:
+            rgb = self.rgb
+            with self._lock:
+                if self._gray is None:
+                    self._gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """H x W x 3 uint8 OpenCV HSV (hue 0-179)."""
+        if self._hsv is None:
+            rgb = self.rgb
+            with self._lock:
+                if self._hsv is None:
+                    self._hsv = cv2.cvtColor(rgb, cv2.COLOR_RGB2HSV)
+        return self._hsv
+
+    def _pyramid_level_locked(self, index: int) -> Optional[Image.Image]:
+        """Level index (image reduced by 2**index), building missing levels; None past the smallest."""
+        while len(self._pyramid) <= index:
+            previous = self._pyramid[-1]
+            if min(previous.size) // 2 < MIN_PYRAMID_SIDE:
+                return None
+            self._pyramid.append(previous.reduce(2))
+        return self._pyramid[index]
+
+    def _nearest_level_locked(self, fits) -> Image.Image:
+        """Smallest pyramid level for which fits(width, height) still holds."""
+        best = self.image
+        index = 1
+        while True:
+            candidate = self._pyramid_level_locked(index)
+            if candidate is None or not fits(*candidate.size):
+                return best
+            best = candidate
+            index += 1
+
+    def for_short_side(self, min_short_side: int) -> Image.Image:
+        """Nearest pyramid level whose short side is at least min_short_side (models)."""
+        with self._lock:
+            return self._nearest_level_locked(lambda w, h: min(w, h) >= min_short_side)
+
+    def level(self, max_side: int) -> Image.Image:
+        """
+        The image scaled so its longer side is at most max_side.
+
+        Returns the decoded image when it is already small enough. Levels are
+        cached and resized (LANCZOS) from the nearest larger pyramid level.
+        """
+        width, height = self.image.size
+        if max(width, height) <= max_side:
+            return self.image
+        with self._lock:
+            cached = self._levels.get(max_side)
+            if cached is not None:
+                return cached
+            source = self._nearest_level_locked(lambda w, h: max(w, h) >= max_side)
+            scale = max_side / max(width, height)
+            target = (max(1, round(width * scale)), max(1, round(height * scale)))
+            level = source if source.size == target else source.resize(target, Image.Resampling.LANCZOS)
+            self._levels[max_side] = level
+            return level
+
+    def at(self, max_side: int) -> "ImageContext":
+        """Context for level(max_side), so stages at the same size share its ndarray/gray/HSV."""
+        level = self.level(max_side)
+        if level is self.image:
+            return self
+        with self._lock:
+            context = self._contexts.get(max_side)
+            if context is None:
+                context = ImageContext(level, path=self.path, original_size=self.original_size)
+                self._contexts[max_side] = context
+            return context
+
+    def level_array(self, max_side: int) -> np.ndarray:
+        """RGB ndarray of level(max_side)."""
+        return self.at(max_side).rgb
@@ -0,0 +1,256 @@
+"""
+Inference Executor - keeps blocking model work off the asyncio event loop.
+
+Every endpoint in main_multimedia.py is ``async def`` but the work behind it
+(BLIP/Florence-2/CLIP forward passes, Whisper, face_recognition, synchronous
+Ollama calls) blocks. This module gives each endpoint its own bounded "lane":
+
+- Thread lanes: one ThreadPoolExecutor per endpoint, sized to that endpoint's
+  concurrency limit. Torch ops release the GIL, so threads are the right fit
+  for model inference. Because lanes are independent, a light call such as
+  /embed-text never queues behind a heavy /analyze-video.
+- Process pool: a shared ProcessPoolExecutor (spawn context, created lazily)
+  for CPU-heavy pure-Python stages that would otherwise hold the GIL. A pool
+  whose worker died is replaced on the next call.
+- Metrics: per-lane running/queued counts, queue wait times and peak queue
+  depth, exposed through stats() for /health.
+
+Configuration (environment variables):
+- INFERENCE_LANE_LIMITS: per-lane overrides, e.g. "analyze-image=3,embed-text=8"
+- INFERENCE_DEFAULT_LANE_LIMIT: limit for lanes not listed (default: 2)
+- INFERENCE_PROCESS_WORKERS: process pool size (default: 2)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from process_pool import SpawnProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Default concurrency per endpoint lane. Heavy endpoints get few slots so they
+# cannot starve the box; light endpoints get more so they stay responsive.
+DEFAULT_LANE_LIMITS = {
+    "analyze-image": 2,
+    "analyze-images": 3,
+    "analyze-comprehensive": 1,
+    "analyze-video": 1,
+    "analyze-document": 2,
+    "transcribe-audio": 1,
+    "embed-text": 4,
+    "extract": 4,
+    "admin": 1,
+}
+
+
+def _parse_lane_limits(raw: str) -> Dict[str, int]:
+    """Parse "lane=limit,lane=limit" into a dict, ignoring malformed entries."""
+    limits = {}
+    for entry in raw.split(','):
+        if '=' not in entry:
+            continue
+        name, value = entry.split('=', 1)
+        try:
+            limits[name.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid lane limit: {entry!r}")
+    return limits
+
+
+class _Lane:
+    """A bounded thread pool for one endpoint plus its queue metrics."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.pool = ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"lane-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    def submit(self, func: Callable, args: tuple, kwargs: dict) -> Future:
+        """Queue a call on this lane's pool."""
+        future = self.pool.submit(self.wrap(func, args, kwargs))
+        future.add_done_callback(self._release_cancelled)
+        return future
+
+    def _release_cancelled(self, future: Future) -> None:
+        # A call cancelled while still queued never runs _call, so its queued
+        # count is released here instead
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    def wrap(self, func: Callable, args: tuple, kwargs: dict) -> Callable[[], Any]:
+        """Register a pending call and return the callable the pool should run."""
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+
+        def _call():
+            started_at = time.perf_counter()
+            wait = started_at - enqueued_at
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            ok = False
+            try:
+                result = func(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.total_run_seconds += time.perf_counter() - started_at
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        return _call
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "limit": self.limit,
+                "running": self.running,
+                "queued": self.queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queue_depth,
+                "avg_wait_ms": round(self.total_wait_seconds / finished * 1000, 2) if finished else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "avg_run_ms": round(self.total_run_seconds / finished * 1000, 2) if finished else 0.0,
+            }
+
+
+class InferenceExecutor:
+    """
+    Dispatches blocking work from async handlers to per-endpoint lanes.
+
+    Usage from an endpoint:
+        result = await executor.run("analyze-image", _analyze_image_sync, request)
+
+    CPU-bound pure-Python work goes to the process pool but is still accounted
+    against the calling lane:
+        result = await executor.run_cpu("extract", extract_email, path)
+    """
+
+    def __init__(
+        self,
+        lane_limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 2,
+        process_workers: int = 2,
+    ):
+        self.lane_limits = dict(DEFAULT_LANE_LIMITS)
+        if lane_limits:
+            self.lane_limits.update(lane_limits)
+        self.default_limit = max(1, default_limit)
+        self.process_workers = max(1, process_workers)
+        self._lanes: Dict[str, _Lane] = {}
+        self._lanes_lock = threading.Lock()
+        self._process_pool = SpawnProcessPool("inference", self.process_workers)
+        self._process_lock = threading.Lock()
+        self._process_pending = 0
+
+    def lane(self, name: str) -> _Lane:
+        """Get (or lazily create) the lane for an endpoint."""
+        with self._lanes_lock:
+            lane = self._lanes.get(name)
+            if lane is None:
+                limit = self.lane_limits.get(name, self.default_limit)
+                lane = _Lane(name, limit)
+                self._lanes[name] = lane
+                logger.info(f"Created inference lane '{name}' with {limit} slot(s)")
+            return lane
+
+    async def run(self, lane_name: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking callable in the endpoint's lane and await the result."""
+        lane = self.lane(lane_name)
+        return await asyncio.wrap_future(lane.submit(func, args, kwargs))
+
+    async def run_cpu(self, lane_name: str, func: Callable, *args) -> Any:
+        """
+        Run a picklable, module-level callable in the process pool.
+
+        The call holds one of the lane's slots while it waits, so lane limits
+        and metrics cover process-pool work too.
+        """
+        return await self.run(lane_name, self.call_cpu, func, *args)
+
+    def submit_cpu(self, func: Callable, *args) -> Future:
+        """
+        Submit a callable to the process pool from synchronous code.
+
+        If a worker died since the last call the pool is broken; it is
+        replaced and the submission retried once on the new one.
+        """
+        for attempt in range(2):
+            try:
+                future = self._process_pool.submit(func, *args)
+                break
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+        with self._process_lock:
+            self._process_pending += 1
+        future.add_done_callback(self._process_done)
+        return future
+
+    def call_cpu(self, func: Callable, *args) -> Any:
+        """Run a callable in the process pool and block until it finishes."""
+        return self.submit_cpu(func, *args).result()
+
+    def _process_done(self, _future: Future) -> None:
+        with self._process_lock:
+            self._process_pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of lane and process pool metrics."""
+        with self._lanes_lock:
+            lanes = list(self._lanes.values())
+        with self._process_lock:
+            process_stats = {
+                "workers": self.process_workers,
+                "started": self._process_pool.started,
+                "pending": self._process_pending,
+                "pool_restarts": self._process_pool.restarts,
+            }
+        return {
+            "lanes": {lane.name: lane.stats() for lane in lanes},
+            "process_pool": process_stats,
+        }
+
+    def shutdown(self) -> None:
+        """Stop all lanes and the process pool."""
+        with self._lanes_lock:
+            lanes = list(self._lanes.values())
+            self._lanes.clear()
+        for lane in lanes:
+            lane.pool.shutdown(wait=False, cancel_futures=True)
+        self._process_pool.shutdown()
+
+
+def create_executor() -> InferenceExecutor:
+    """Build an InferenceExecutor from environment configuration."""
+    return InferenceExecutor(
+        lane_limits=_parse_lane_limits(os.getenv('INFERENCE_LANE_LIMITS', '')),
+        default_limit=int(os.getenv('INFERENCE_DEFAULT_LANE_LIMIT', '2')),
+        process_workers=int(os.getenv('INFERENCE_PROCESS_WORKERS', '2')),
+    )
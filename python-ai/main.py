@@ -14,11 +14,14 @@ import numpy as np
 from pathlib import Path
 import logging
 from typing import Optional, List
+import asyncio
 import json
 import base64
 import io
 import os
 
+from model_registry import create_model_registry
+
 # Register HEIF/HEIC support
 try:
     from pillow_heif import register_heif_opener
@@ -71,13 +74,16 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Avinash-EYE AI Service")
 
-# Global variables for models
-blip_processor = None
-blip_model = None
-clip_processor = None
-clip_model = None
+# BLIP and CLIP are loaded through the model registry (see model_registry.py)
+model_registry = create_model_registry()
 device = None
 
+# Names the Laravel settings may send for the models this service provides
+MODEL_NAME_ALIASES = {
+    "salesforce/blip-image-captioning-large": "blip",
+    "openai/clip-vit-base-patch32": "clip",
+}
+
 
 class AnalyzeRequest(BaseModel):
     """Request model for image analysis. Accepts both legacy (face_detection_enabled,
@@ -113,10 +119,32 @@ class EmbedTextResponse(BaseModel):
     embedding: list[float]
 
 
+def _load_blip():
+    """Load BLIP for image captioning. Returns (processor, model)."""
+    processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-large")
+    model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-large")
+    model.to(device)
+    model.eval()
+    return processor, model
+
+
+def _load_clip():
+    """Load CLIP for embeddings. Returns (processor, model)."""
+    processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
+    model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
+    model.to(device)
+    model.eval()
+    return processor, model
+
+
+model_registry.register("blip", _load_blip)
+model_registry.register("clip", _load_clip)
+
+
 @app.on_event("startup")
 async def load_models():
     """Load AI models on startup."""
-    global blip_processor, blip_model, clip_processor, clip_model, device
+    global device
     
     logger.info("Starting model loading process...")
     
@@ -124,28 +152,12 @@ async def load_models():
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     logger.info(f"Using device: {device}")
     
-    try:
-        # Load BLIP model for image captioning
-        logger.info("Loading BLIP model for image captioning...")
-        blip_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-large")
-        blip_model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-large")
-        blip_model.to(device)
-        blip_model.eval()
-        logger.info("BLIP model loaded successfully!")
-        
-        # Load CLIP model for embeddings
-        logger.info("Loading CLIP model for embeddings...")
-        clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-        clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-        clip_model.to(device)
-        clip_model.eval()
-        logger.info("CLIP model loaded successfully!")
-        
-        logger.info("All models loaded and ready!")
-        
-    except Exception as e:
-        logger.error(f"Error loading models: {str(e)}")
-        raise
+    errors = {name: error for name, error in model_registry.preload(["blip", "clip"]).items() if error}
+    if errors:
+        logger.error(f"Error loading models: {errors}")
+        raise RuntimeError(f"Error loading models: {errors}")
+    
+    logger.info("All models loaded and ready!")
 
 
 def generate_detailed_caption(image: Image.Image) -> str:
@@ -158,46 +170,47 @@ def generate_detailed_caption(image: Image.Image) -> str:
     Returns:
         Detailed caption string
     """
-    # Generate unconditional caption
-    inputs = blip_processor(image, return_tensors="pt").to(device)
+    with model_registry.use("blip") as (blip_processor, blip_model):
+        # Generate unconditional caption
+        inputs = blip_processor(image, return_tensors="pt").to(device)
     
-    with torch.no_grad():
-        out = blip_model.generate(
-            **inputs,
-            max_length=150,
-            num_beams=5,
-            temperature=1.0,
-            do_sample=False
-        )
-    
-    caption = blip_processor.decode(out[0], skip_special_tokens=True)
-    
-    # Generate additional context with prompts
-    prompts = [
-        "a detailed description of",
-        "this image shows",
-    ]
-    
-    additional_details = []
-    for prompt in prompts:
-        inputs = blip_processor(image, text=prompt, return_tensors="pt").to(device)
         with torch.no_grad():
             out = blip_model.generate(
                 **inputs,
-                max_length=100,
-                num_beams=3,
-                temperature=1.0
+                max_length=150,
+                num_beams=5,
+                temperature=1.0,
+                do_sample=False
             )
-        detail = blip_processor.decode(out[0], skip_special_tokens=True)
-        if detail and detail not in additional_details:
-            additional_details.append(detail)
     
-    # Combine all descriptions
-    full_description = caption
-    if additional_details:
-        full_description += ". " + ". ".join(additional_details)
+        caption = blip_processor.decode(out[0], skip_special_tokens=True)
+    
+        # Generate additional context with prompts
+        prompts = [
+            "a detailed description of",
+            "this image shows",
+        ]
+    
+        additional_details = []
+        for prompt in prompts:
+            inputs = blip_processor(image, text=prompt, return_tensors="pt").to(device)
+            with torch.no_grad():
+                out = blip_model.generate(
+                    **inputs,
+                    max_length=100,
+                    num_beams=3,
+                    temperature=1.0
+                )
+            detail = blip_processor.decode(out[0], skip_special_tokens=True)
+            if detail and detail not in additional_details:
+                additional_details.append(detail)
+    
+        # Combine all descriptions
+        full_description = caption
+        if additional_details:
+            full_description += ". " + ". ".join(additional_details)
     
-    return full_description
+        return full_description
 
 
 def generate_image_embedding(image: Image.Image) -> np.ndarray:
@@ -210,10 +223,11 @@ def generate_image_embedding(image: Image.Image) -> np.ndarray:
     Returns:
         Normalized embedding vector as numpy array
     """
-    inputs = clip_processor(images=image, return_tensors="pt").to(device)
+    with model_registry.use("clip") as (clip_processor, clip_model):
+        inputs = clip_processor(images=image, return_tensors="pt").to(device)
 
-    with torch.no_grad():
-        image_features = clip_model.get_image_features(**inputs)
+        with torch.no_grad():
+            image_features = clip_model.get_image_features(**inputs)
 
     if not torch.is_tensor(image_features):
         for attr in ("image_embeds", "pooler_output"):
@@ -239,10 +253,11 @@ def generate_text_embedding(text: str) -> np.ndarray:
     Returns:
         Normalized embedding vector as numpy array
     """
-    inputs = clip_processor(text=[text], return_tensors="pt", padding=True).to(device)
+    with model_registry.use("clip") as (clip_processor, clip_model):
+        inputs = clip_processor(text=[text], return_tensors="pt", padding=True).to(device)
 
-    with torch.no_grad():
-        text_features = clip_model.get_text_features(**inputs)
+        with torch.no_grad():
+            text_features = clip_model.get_text_features(**inputs)
 
     if not torch.is_tensor(text_features):
         for attr in ("text_embeds", "pooler_output"):
@@ -389,12 +404,9 @@ def detect_faces(image: Image.Image) -> dict:
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    models_loaded = all([
-        blip_processor is not None,
-        blip_model is not None,
-        clip_processor is not None,
-        clip_model is not None
-    ])
+    # Readiness, not residency: a model evicted by the registry reloads on its next use
+    models_loaded = model_registry.ready("blip") and model_registry.ready("clip")
+    core_failed = not (model_registry.available("blip") and model_registry.available("clip"))
     
     # Check if Ollama service is actually running and responsive
     ollama_running = False
@@ -408,11 +420,12 @@ async def health_check():
             logger.warning(f"Ollama available but service not responding: {e}")
     
     return {
-        "status": "healthy" if models_loaded else "initializing",
+        "status": "healthy" if models_loaded else ("degraded" if core_failed else "initializing"),
         "models_loaded": models_loaded,
         "device": str(device) if device else "unknown",
         "ollama_available": ollama_running,
-        "face_recognition_available": FACE_RECOGNITION_AVAILABLE
+        "face_recognition_available": FACE_RECOGNITION_AVAILABLE,
+        "models": model_registry.stats()
     }
 
 
@@ -440,7 +453,7 @@ async def analyze_image(request: AnalyzeRequest):
     """
     try:
         # Check if models are loaded
-        if blip_model is None or clip_model is None:
+        if not (model_registry.available("blip") and model_registry.available("clip")):
             raise HTTPException(status_code=503, detail="Models not loaded yet")
         
         # Load image
@@ -525,7 +538,7 @@ async def embed_text(request: EmbedTextRequest):
     """
     try:
         # Check if models are loaded
-        if clip_model is None:
+        if not model_registry.available("clip"):
             raise HTTPException(status_code=503, detail="Models not loaded yet")
         
         logger.info(f"Embedding text query: {request.query}")
@@ -555,9 +568,9 @@ async def get_model_status():
     """
     loaded_models = []
     
-    if blip_model is not None:
+    if model_registry.ready("blip"):
         loaded_models.append("Salesforce/blip-image-captioning-large")
-    if clip_model is not None:
+    if model_registry.ready("clip"):
         loaded_models.append("openai/clip-vit-base-patch32")
     
     # Check Ollama availability
@@ -600,12 +613,21 @@ async def preload_models(request: dict):
         
         logger.info(f"Preloading models: {captioning_model}, {embedding_model}")
         
-        # Models are already loaded on startup for now
-        # In future, this can dynamically load different models
+        # Map setting values to registry names; models this service doesn't
+        # provide (e.g. florence, aimv2) are reported as unsupported
+        requested = [MODEL_NAME_ALIASES.get(name.lower(), name.lower()) for name in (captioning_model, embedding_model)]
+        names = [name for name in requested if name in model_registry.names()]
+        unsupported = [name for name in requested if name not in model_registry.names()]
+        
+        errors = await asyncio.get_running_loop().run_in_executor(None, model_registry.preload, names)
+        failed = {name: error for name, error in errors.items() if error}
         
         return {
-            "success": True,
-            "message": "Models already loaded",
+            "success": not failed,
+            "message": "Models loaded" if not failed else "Some models failed to load",
+            "loaded": [name for name, error in errors.items() if not error],
+            "errors": failed,
+            "unsupported": unsupported,
             "captioning_model": captioning_model,
             "embedding_model": embedding_model
         }
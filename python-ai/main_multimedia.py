@@ -3,7 +3,9 @@ Multi-Media FastAPI service with support for images, videos, documents, and audi
 Includes CLIP embeddings, face detection, video analysis, OCR, and audio transcription.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from transformers import BlipProcessor, BlipForConditionalGeneration
 from transformers import CLIPProcessor, CLIPModel
@@ -15,10 +17,31 @@ from pathlib import Path
 import logging
 import face_recognition
 import cv2
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any, Union
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 import os
+import threading
+import time
+
+from inference_executor import create_executor
+from batching import MicroBatcher
+from analysis_cache import create_analysis_cache
+from model_registry import ModelUnavailableError, create_model_registry
+from video_decoder import SAMPLING_MODES, decode_video, keyframe_spans
+from stage_metrics import create_stage_metrics, timings_ms
+from image_context import ImageContext, stage_input_sizes
+from thumbnails import create_thumbnail_service
+from waveform import SOUNDFILE_AVAILABLE, render_waveform
+from transcription import create_transcription_jobs, create_transcription_pool, transcript_windows
+from file_extraction import (
+    analyze_code_file, extract_archive_metadata, extract_email, extract_presentation, extract_spreadsheet,
+    extract_word_document,
+)
+from document_ocr import (
+    ENGINE_NAMES as OCR_ENGINE_NAMES, PADDLEOCR_AVAILABLE, TESSERACT_AVAILABLE,
+    create_document_ocr, pdf_page_count, resolve_engine as resolve_ocr_engine,
+)
 
 # Register HEIF/HEIC support
 try:
@@ -57,22 +80,22 @@ except ImportError:
     WHISPER_AVAILABLE = False
     logging.warning("Whisper not available, audio transcription disabled")
 
+# accelerate lets from_pretrained() skip random weight init (low_cpu_mem_usage)
 try:
-    import pytesseract
-    TESSERACT_AVAILABLE = True
+    import accelerate  # noqa: F401
+    ACCELERATE_AVAILABLE = True
 except ImportError:
-    TESSERACT_AVAILABLE = False
+    ACCELERATE_AVAILABLE = False
+    logging.info("accelerate not installed, models load without low_cpu_mem_usage")
+
+# OCR engines live in document_ocr.py so its worker processes can use them
+if not TESSERACT_AVAILABLE:
     logging.warning("Tesseract not available")
 
 # PaddleOCR - Better accuracy, especially for complex layouts
-try:
-    from paddleocr import PaddleOCR
-    PADDLE_OCR = None  # Lazy initialization
-    PADDLEOCR_AVAILABLE = True
+if PADDLEOCR_AVAILABLE:
     logging.info("PaddleOCR is available")
-except ImportError:
-    PADDLE_OCR = None
-    PADDLEOCR_AVAILABLE = False
+else:
     logging.warning("PaddleOCR not available")
 
 # At least one OCR engine must be available
@@ -97,24 +120,162 @@ SCENE_THRESHOLD = float(os.getenv('SCENE_THRESHOLD', '0.3'))
 # Set MIN_SCENE_DURATION env variable to override
 MIN_SCENE_DURATION = int(os.getenv('MIN_SCENE_DURATION', '15'))
 
+# Single-pass video decoding (see video_decoder.py)
+# Keyframes are kept downscaled to VIDEO_KEYFRAME_MAX_SIDE pixels on the long
+# edge (still above every model's input size) and capped at VIDEO_MAX_KEYFRAMES
+# so memory does not grow with video length.
+VIDEO_KEYFRAME_MAX_SIDE = int(os.getenv('VIDEO_KEYFRAME_MAX_SIDE', '768'))
+VIDEO_MAX_KEYFRAMES = int(os.getenv('VIDEO_MAX_KEYFRAMES', '64'))
+
+# Scene detection runs on frames downscaled to SCENE_ANALYSIS_WIDTH pixels.
+# SCENE_FRAME_STRIDE > 1 analyzes only every Nth frame (cuts are then found
+# between frames N apart); skipped frames are grabbed but never retrieved.
+SCENE_ANALYSIS_WIDTH = int(os.getenv('SCENE_ANALYSIS_WIDTH', '256'))
+SCENE_FRAME_STRIDE = int(os.getenv('SCENE_FRAME_STRIDE', '1'))
+
+# Frame sampling for long videos
+# In "seek" mode (and "auto" for videos of VIDEO_SEEK_MIN_DURATION seconds or
+# more) at most VIDEO_MAX_SAMPLED_FRAMES frames are decoded, spread evenly over
+# the video and at least VIDEO_MIN_SAMPLE_SPACING seconds apart
+VIDEO_SEEK_MIN_DURATION = float(os.getenv('VIDEO_SEEK_MIN_DURATION', '600'))
+VIDEO_MAX_SAMPLED_FRAMES = int(os.getenv('VIDEO_MAX_SAMPLED_FRAMES', '32'))
+VIDEO_MIN_SAMPLE_SPACING = float(os.getenv('VIDEO_MIN_SAMPLE_SPACING', '1.0'))
+
+# Embedding micro-batching configuration
+# Concurrent embedding requests are coalesced into one forward pass of up to
+# EMBEDDING_BATCH_SIZE images, waiting at most EMBEDDING_BATCH_WAIT_MS for the
+# batch to fill. Set EMBEDDING_BATCH_SIZE=1 to disable batching.
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '16'))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_WAIT_MS', '10'))
+
+# Caption batching configuration
+# Beam search multiplies memory per image, so caption batches are smaller.
+# Video keyframes and concurrent /analyze-image calls share these batches.
+CAPTION_BATCH_SIZE = int(os.getenv('CAPTION_BATCH_SIZE', '4'))
+CAPTION_BATCH_WAIT_MS = float(os.getenv('CAPTION_BATCH_WAIT_MS', '20'))
+
+# Bulk /analyze-images configuration
+# Images are decoded and run through the model stages BULK_ANALYZE_CHUNK_SIZE
+# at a time; BULK_ANALYZE_MAX_ITEMS caps the size of one manifest.
+BULK_ANALYZE_CHUNK_SIZE = int(os.getenv('BULK_ANALYZE_CHUNK_SIZE', '8'))
+BULK_ANALYZE_MAX_ITEMS = int(os.getenv('BULK_ANALYZE_MAX_ITEMS', '500'))
+
+# Input resolution each image stage needs (see image_context.py). Model stages
+# (caption, embedding, objects) read the nearest pyramid level whose short side
+# is at least this size, since their processors resize to 224-768px anyway; the
+# other stages read an exact downscale whose long side is at most this size.
+# JPEGs are decoded in draft mode at the largest size any enabled stage needs.
+# Override with STAGE_INPUT_SIZES, e.g. "faces=1600,quality=1024"
+# Thumbnail sizes are configured separately (THUMBNAIL_SIZES, see thumbnails.py).
+STAGE_INPUT_SIZES = stage_input_sizes({
+    "caption": 768,    # Florence-2 768x768, BLIP 384x384
+    "embedding": 336,  # CLIP/SigLIP/AIMv2 224 (336 for the larger AIMv2 variant)
+    "objects": 768,    # Florence-2 <OD>
+    "faces": 1600,     # HOG still finds faces down to ~80px at this size
+    "quality": 1024,   # sharpness/noise measured at a fixed scale
+    "hashes": 512,     # pHash/dHash shrink to 32x32 / 9x8
+    "colors": 200,
+    "scene": 1024,     # image sent to the Ollama vision model
+})
+
+# Models loaded at startup; everything else loads on first use and may be
+# evicted under MODEL_MEMORY_BUDGET_MB (see model_registry.py).
+# Set MODEL_PRELOAD="" to start with no models resident.
+MODEL_PRELOAD = [name.strip() for name in os.getenv('MODEL_PRELOAD', 'blip,clip,whisper').split(',') if name.strip()]
+
+# How MODEL_PRELOAD is loaded at startup:
+# - parallel: background threads; each endpoint serves once its own models are ready (default)
+# - serial: one model at a time, in the background
+# - blocking: one model at a time before the app accepts requests
+# - lazy: nothing at startup
+MODEL_STARTUP_MODE = os.getenv('MODEL_STARTUP_MODE', 'parallel').lower()
+MODEL_STARTUP_WORKERS = int(os.getenv('MODEL_STARTUP_WORKERS', '3'))
+
+# Try the local Hugging Face cache before contacting the Hub. Cached
+# safetensors weights are memory-mapped rather than read and unpickled.
+MODEL_LOCAL_FILES_FIRST = os.getenv('MODEL_LOCAL_FILES_FIRST', 'true').lower() in ('1', 'true', 'yes')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Avinash-EYE Multi-Media AI Service")
 
-# Global variables for models
-blip_processor = None
-blip_model = None
-clip_processor = None
-clip_model = None
-florence_processor = None
-florence_model = None
-siglip_processor = None
-siglip_model = None
-aimv2_processor = None
-aimv2_model = None
-whisper_model = None
+# Blocking inference runs in per-endpoint lanes so the event loop stays free
+# for /health and light requests (see inference_executor.py)
+inference_executor = create_executor()
+
+# Per-stage analysis results keyed by file content hash (see analysis_cache.py)
+analysis_cache = create_analysis_cache()
+
+# Models are loaded on demand and evicted LRU under a memory budget
+model_registry = create_model_registry()
+
+# Per-stage timers: "timings" in responses, histograms on /metrics (see stage_metrics.py)
+stage_metrics = create_stage_metrics()
+
+# Multi-size thumbnails, skipped when already up to date with the source
+thumbnail_service = create_thumbnail_service()
+
+# Audio thumbnail renderer: "envelope" streams the whole file through a numpy
+# min/max envelope (waveform.py); "matplotlib" is the old librosa plot of the
+# first 60s. Formats soundfile cannot read fall back to "matplotlib".
+AUDIO_THUMBNAIL_RENDERER = os.getenv('AUDIO_THUMBNAIL_RENDERER', 'envelope').strip().lower()
+AUDIO_WAVEFORM_ASPECT = 0.4  # height / width, as the old 10x4in figure
+
+# Whisper checkpoint for in-process and pooled transcription. Long audio is
+# split at silences and transcribed across TRANSCRIBE_WORKERS processes
+# (see transcription.py); /transcribe-audio/jobs runs it in the background.
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')
+transcription_pool = create_transcription_pool(WHISPER_MODEL)
+transcription_jobs = create_transcription_jobs()
+TRANSCRIBE_EVENT_POLL_SECONDS = 0.25
+
+# CLIP's text encoder stops at 77 tokens, so transcripts are embedded per
+# window of consecutive segments (at most TRANSCRIPT_WINDOW_SECONDS and
+# TRANSCRIPT_WINDOW_WORDS, ~50 English words fit in 77 tokens) or, with
+# TRANSCRIPT_EMBEDDING_UNIT=segment, per Whisper segment. Windows are encoded
+# TEXT_EMBEDDING_BATCH_SIZE at a time; the response embedding is their
+# duration-weighted mean.
+TRANSCRIPT_EMBEDDING_UNIT = os.getenv('TRANSCRIPT_EMBEDDING_UNIT', 'window').strip().lower()
+TRANSCRIPT_WINDOW_SECONDS = float(os.getenv('TRANSCRIPT_WINDOW_SECONDS', '30'))
+TRANSCRIPT_WINDOW_WORDS = int(os.getenv('TRANSCRIPT_WINDOW_WORDS', '50'))
+TEXT_EMBEDDING_BATCH_SIZE = int(os.getenv('TEXT_EMBEDDING_BATCH_SIZE', '32'))
+
+# PDF OCR renders pages one at a time inside OCR_WORKERS processes, with at
+# most OCR_MAX_INFLIGHT_PAGES pages in memory (see document_ocr.py);
+# /analyze-document/ocr-stream returns the pages as they finish. Only pages
+# without a usable text layer (OCR_MIN_PAGE_TEXT_CHARS, OCR_IMAGE_COVERAGE)
+# are OCRed; the others keep their native text. The OCR workers load their
+# engines once; OCR_WARMUP starts them (and loads PaddleOCR) at startup
+# instead of on the first document. Each page's render DPI is picked from a
+# low-resolution probe of its text height (OCR_TARGET_TEXT_HEIGHT, 0 = fixed
+# OCR_RENDER_ZOOM); OCR_PAGE_STAT_KEYS are reported per page.
+document_ocr = create_document_ocr()
+OCR_PAGE_STAT_KEYS = ("page", "dpi", "text_height_pt", "probe_ms", "render_ms", "ocr_ms", "reocr_ms", "page_ms")
+OCR_WARMUP = os.getenv('OCR_WARMUP', 'false' if MODEL_STARTUP_MODE == 'lazy' else 'true').lower() == 'true'
+
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """Feed eye_request_duration_seconds, labelled by route template to bound cardinality."""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        stage_metrics.observe_request(route.path, request.method, time.perf_counter() - started)
+    return response
+
+
+# Startup timing breakdown, exposed on /health
+startup_state: Dict[str, Any] = {
+    "mode": MODEL_STARTUP_MODE,
+    "complete": False,
+    "device_seconds": None,
+    "preload_seconds": None,
+    "models": {},
+}
+
 device = None
 
 
@@ -207,13 +368,24 @@ class AnalyzeImageRequest(BaseModel):
     analyze_quality: bool = True  # Image quality metrics via OpenCV
     compute_hashes: bool = True  # pHash/dHash for duplicate detection
     classify_scene: bool = True  # Scene classification via Ollama
+    full_resolution: bool = False  # Decode the original pixels instead of a reduced JPEG/HEIF decode
+
+
+class AnalyzeImagesRequest(BaseModel):
+    """Request model for bulk image analysis (NDJSON streaming response)."""
+    items: List[AnalyzeImageRequest]
+    chunk_size: Optional[int] = None  # Images per pipeline chunk (default: BULK_ANALYZE_CHUNK_SIZE)
 
 
 class AnalyzeVideoRequest(BaseModel):
     """Request model for video analysis."""
     video_path: str
     extract_frames: bool = True
-    frame_interval: int = 30  # Extract 1 frame every N frames
+    frame_interval: int = 30  # Extract 1 frame every N frames (interval mode)
+    sampling_mode: str = "auto"  # "auto", "scene", "interval", "seek"
+    max_sampled_frames: Optional[int] = None  # Cap for interval/seek modes (default: VIDEO_MAX_SAMPLED_FRAMES)
+    embedding_model: str = "aimv2"  # "aimv2", "siglip", "clip"
+    pooling: str = "duration"  # "duration" (weighted by scene length) or "mean"
 
 
 class AnalyzeDocumentRequest(BaseModel):
@@ -221,14 +393,24 @@ class AnalyzeDocumentRequest(BaseModel):
     document_path: str
     perform_ocr: bool = True
     ocr_engine: str = "auto"  # "auto", "paddleocr", "tesseract"
+    include_layout: bool = False  # Return OCR line/word boxes and confidences (ocr_layout)
     use_ollama: bool = False
     ollama_model: str = "qwen2.5:7b"
 
 
+class OCRDocumentRequest(BaseModel):
+    """Request model for streaming document OCR."""
+    document_path: str
+    ocr_engine: str = "auto"  # "auto", "paddleocr", "tesseract"
+    native_text: bool = True  # Use the text layer of PDF pages that have one instead of OCRing them
+    include_layout: bool = False  # Send each OCRed page's line/word boxes and confidences ("layout")
+
+
 class TranscribeAudioRequest(BaseModel):
     """Request model for audio transcription."""
     audio_path: str
     language: Optional[str] = None  # Auto-detect if None
+    embed_segments: bool = True  # Per-window embeddings with timestamps (segment_embeddings)
 
 
 class EmbedTextRequest(BaseModel):
@@ -259,6 +441,7 @@ class AnalyzeImageComprehensiveRequest(BaseModel):
     embedding_model: str = "aimv2"  # Embedding model for similarity search
     detect_faces: bool = True
     generate_embedding: bool = True
+    full_resolution: bool = False  # Decode the original pixels instead of a reduced JPEG/HEIF decode
 
 
 class AnalyzeImageComprehensiveResponse(BaseModel):
@@ -282,6 +465,8 @@ class AnalyzeImageComprehensiveResponse(BaseModel):
     face_locations: List[List[int]] = []
     face_encodings: List[List[float]] = []
     thumbnail_path: Optional[str] = None
+    thumbnails: Dict[str, str] = {}  # "<size>.<ext>" -> path for every THUMBNAIL_SIZES/FORMATS variant
+    decode_stats: Optional[Dict[str, Any]] = None  # Decode mode, decoded/original size, decode_ms, estimated_saved_ms
 
 
 class AnalyzeImageResponse(BaseModel):
@@ -294,6 +479,7 @@ class AnalyzeImageResponse(BaseModel):
     face_locations: List[List[int]] = []
     face_encodings: List[List[float]] = []
     thumbnail_path: Optional[str] = None  # Path to generated thumbnail (JPEG)
+    thumbnails: Dict[str, str] = {}  # "<size>.<ext>" -> path for every THUMBNAIL_SIZES/FORMATS variant
     extracted_text: Optional[str] = ""  # Extracted text for SVG/other special formats
     # Maximum analysis coverage fields
     objects_detected: Optional[Dict[str, Any]] = None  # Florence-2 <OD> results
@@ -303,6 +489,8 @@ class AnalyzeImageResponse(BaseModel):
     quality_tier: Optional[str] = None  # excellent, good, fair, poor
     phash: Optional[str] = None  # Perceptual hash
     dhash: Optional[str] = None  # Difference hash
+    decode_stats: Optional[Dict[str, Any]] = None  # Decode mode, decoded/original size, decode_ms, estimated_saved_ms
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per stage run for this request (cache hits omitted)
 
 
 class AnalyzeVideoResponse(BaseModel):
@@ -312,32 +500,65 @@ class AnalyzeVideoResponse(BaseModel):
     fps: float
     resolution: str
     scene_descriptions: List[Dict[str, Any]] = []
-    embedding: List[float]  # Average embedding of key frames
+    embedding: List[float]  # Pooled embedding of all keyframes
+    embedding_model: Optional[str] = None  # Model that produced the embeddings (after fallbacks)
+    scene_embeddings: List[Dict[str, Any]] = []  # Per-keyframe vectors with start/end seconds and pooling weight
     objects_detected: List[str] = []
     thumbnail_path: Optional[str] = None  # Path to generated thumbnail (JPEG)
+    thumbnails: Dict[str, str] = {}  # "<size>.<ext>" -> path for every THUMBNAIL_SIZES/FORMATS variant
+    decode_stats: Optional[Dict[str, Any]] = None  # Frames decoded/analyzed/grabbed and throughput_fps
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per stage for this request
 
 
 class AnalyzeDocumentResponse(BaseModel):
     """Response model for document analysis."""
     extracted_text: str
     page_count: Optional[int] = None
+    ocr_pages: List[int] = []  # PDF pages (1-based) whose text came from OCR instead of the text layer
+    ocr_failed_pages: List[int] = []  # PDF pages (1-based) whose OCR raised; they keep their native text, if any
+    ocr_confidence: Optional[float] = None  # Mean confidence (0-1) of the OCRed pages
+    ocr_layout: Optional[List[Dict[str, Any]]] = None  # Per OCRed page: {"page", "confidence", "layout"} (include_layout)
+    ocr_page_stats: List[Dict[str, Any]] = []  # Per OCRed PDF page: chosen dpi, text_height_pt and probe/render/OCR milliseconds
     summary: Optional[str] = None
     keywords: List[str] = []
     embedding: List[float]
     thumbnail_path: Optional[str] = None  # Path to generated thumbnail (JPEG)
+    thumbnails: Dict[str, str] = {}  # "<size>.<ext>" -> path for every THUMBNAIL_SIZES/FORMATS variant
     # Intelligent document analysis fields
     document_type: Optional[str] = None  # Classified document type (invoice, receipt, etc.)
     classification_confidence: Optional[float] = None  # Confidence score (0.0-1.0)
     entities: Optional[Dict[str, Any]] = None  # Extracted entities (dates, amounts, parties, etc.)
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per stage for this request
 
 
 class TranscribeAudioResponse(BaseModel):
     """Response model for audio transcription."""
     text: str
     language: str
-    confidence: float
-    embedding: List[float]
+    confidence: float  # Duration-weighted mean of exp(avg_logprob) over segments
+    embedding: List[float]  # Duration-weighted mean of segment_embeddings (whole transcript)
+    segments: List[Dict[str, Any]] = []  # {"id", "start", "end", "text"}, seconds from the start of the file
+    segment_embeddings: List[Dict[str, Any]] = []  # {"index", "start", "end", "text", "segment_ids", "weight", "embedding"}
+    duration_seconds: Optional[float] = None
+    chunks: int = 0  # Silence-split chunks sent to Whisper
     thumbnail_path: Optional[str] = None  # Path to generated waveform thumbnail (JPEG)
+    thumbnails: Dict[str, str] = {}  # "<size>.<ext>" -> path for every THUMBNAIL_SIZES/FORMATS variant
+    timings: Optional[Dict[str, float]] = None  # Milliseconds per stage for this request
+
+
+class TranscriptionJobResponse(BaseModel):
+    """Status of a background transcription job (/transcribe-audio/jobs)."""
+    job_id: str
+    audio_path: str
+    status: str  # queued, running, completed, failed
+    progress: float  # Fraction of chunks transcribed
+    chunks_done: int = 0
+    chunks_total: int = 0
+    segments: List[Dict[str, Any]] = []  # Segments transcribed so far, in time order
+    result: Optional[Dict[str, Any]] = None  # TranscribeAudioResponse once completed
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
 
 
 class EmbedTextResponse(BaseModel):
@@ -376,120 +597,203 @@ class AnalyzeCodeFileResponse(BaseModel):
     extracted_text: str = ""  # Full text content for searchability
 
 
+def _from_pretrained(cls, model_name: str, is_model: bool = False, **kwargs):
+    """
+    from_pretrained() tuned for cold start.
+
+    Models load straight into their final tensors (low_cpu_mem_usage) when
+    accelerate is installed, and the local cache is tried before the Hub so a
+    restart does not wait on network round-trips.
+    """
+    if is_model and ACCELERATE_AVAILABLE:
+        kwargs.setdefault('low_cpu_mem_usage', True)
+    if MODEL_LOCAL_FILES_FIRST:
+        try:
+            return cls.from_pretrained(model_name, local_files_only=True, **kwargs)
+        except (OSError, ValueError):
+            logger.info(f"{model_name} not in local cache, downloading")
+    return cls.from_pretrained(model_name, **kwargs)
+
+
+def _load_blip():
+    """Load BLIP for image captioning. Returns (processor, model)."""
+    processor = _from_pretrained(BlipProcessor, "Salesforce/blip-image-captioning-large")
+    model = _from_pretrained(BlipForConditionalGeneration, "Salesforce/blip-image-captioning-large", is_model=True)
+    model.to(device)
+    model.eval()
+    return processor, model
+
+
+def _load_clip():
+    """Load CLIP for image and text embeddings. Returns (processor, model)."""
+    processor = _from_pretrained(CLIPProcessor, "openai/clip-vit-base-patch32")
+    model = _from_pretrained(CLIPModel, "openai/clip-vit-base-patch32", is_model=True)
+    model.to(device)
+    model.eval()
+    return processor, model
+
+
+def _load_whisper():
+    """Load the Whisper model (WHISPER_MODEL, default base) for audio transcription."""
+    return whisper.load_model(WHISPER_MODEL)
+
+
+def _preload_startup_models(names: List[str], workers: int) -> None:
+    """Preload the startup models and record the per-model timing breakdown."""
+    started = time.perf_counter()
+    errors = model_registry.preload(names, max_workers=workers)
+    elapsed = time.perf_counter() - started
+
+    stats = model_registry.stats()["models"]
+    startup_state["models"] = {
+        name: {
+            "seconds": stats[name]["last_load_seconds"],
+            "size_mb": stats[name]["size_mb"],
+            "error": errors.get(name),
+        }
+        for name in names
+    }
+    startup_state["preload_seconds"] = round(elapsed, 2)
+    startup_state["complete"] = True
+
+    for name, error in errors.items():
+        if error:
+            logger.error(f"Error loading models: {error}")
+    breakdown = ", ".join(f"{name}={info['seconds']:.1f}s" for name, info in startup_state["models"].items())
+    logger.info(
+        f"Model startup ({MODEL_STARTUP_MODE}, {workers} worker(s)) finished in {elapsed:.1f}s "
+        f"(sum of loads {sum(info['seconds'] for info in startup_state['models'].values()):.1f}s): {breakdown}"
+    )
+
+
 @app.on_event("startup")
 async def load_models():
-    """Load AI models on startup."""
-    global blip_processor, blip_model, clip_processor, clip_model, whisper_model, device
+    """Pick the device and start loading the MODEL_PRELOAD models."""
+    global device
 
     logger.info("Starting multi-media model loading process...")
 
     # Determine device
+    started = time.perf_counter()
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    startup_state["device_seconds"] = round(time.perf_counter() - started, 3)
     logger.info(f"Using device: {device}")
 
-    try:
-        # Load BLIP model for image captioning
-        logger.info("Loading BLIP model...")
-        blip_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-large")
-        blip_model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-large")
-        blip_model.to(device)
-        blip_model.eval()
-        logger.info("BLIP model loaded successfully!")
-
-        # Load CLIP model for embeddings
-        logger.info("Loading CLIP model...")
-        clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-        clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-        clip_model.to(device)
-        clip_model.eval()
-        logger.info("CLIP model loaded successfully!")
-
-        # Load Whisper model for audio transcription
-        if WHISPER_AVAILABLE:
-            logger.info("Loading Whisper model...")
-            whisper_model = whisper.load_model("base")
-            logger.info("Whisper model loaded successfully!")
-
-        logger.info("All models loaded and ready!")
+    preload = [name for name in MODEL_PRELOAD if name in model_registry.names()]
+    if MODEL_STARTUP_MODE == "lazy" or not preload:
+        startup_state["complete"] = True
+        logger.info("No models preloaded; all models load on first use")
+    elif MODEL_STARTUP_MODE == "blocking":
+        _preload_startup_models(preload, 1)
+    else:
+        # Load in the background so /health and endpoints whose models are
+        # already ready can serve while the rest are still loading
+        workers = 1 if MODEL_STARTUP_MODE == "serial" else max(1, MODEL_STARTUP_WORKERS)
+        threading.Thread(
+            target=_preload_startup_models,
+            args=(preload, workers),
+            name="model-startup",
+            daemon=True,
+        ).start()
 
-    except Exception as e:
-        logger.error(f"Error loading models: {str(e)}")
-        raise
 
+@app.on_event("startup")
+async def warm_ocr_pool():
+    """Start the OCR workers and load their engines in the background (OCR_WARMUP)."""
+    if OCR_WARMUP and OCR_AVAILABLE:
+        threading.Thread(target=document_ocr.warm, name="ocr-warmup", daemon=True).start()
 
-# ===== IMAGE PROCESSING =====
 
-def generate_caption_blip(image: Image.Image) -> str:
-    """Generate caption using BLIP."""
-    inputs = blip_processor(image, return_tensors="pt").to(device)
+@app.on_event("shutdown")
+async def shutdown_inference():
+    """Stop inference lanes, the process pools and the model batchers."""
+    for batcher in list(embedding_batchers.values()) + list(caption_batchers.values()):
+        batcher.close()
+    inference_executor.shutdown()
+    transcription_pool.shutdown()
+    document_ocr.shutdown()
 
-    with torch.no_grad():
-        out = blip_model.generate(
-            **inputs,
-            max_length=150,
-            num_beams=5,
-            temperature=1.0
-        )
 
-    return blip_processor.decode(out[0], skip_special_tokens=True)
+# ===== IMAGE PROCESSING =====
 
+def generate_captions_blip(images: List[Image.Image]) -> List[str]:
+    """Generate captions for a batch of images with one BLIP generate() call."""
+    with model_registry.use("blip") as (blip_processor, blip_model):
+        inputs = blip_processor(images=images, return_tensors="pt").to(device)
 
-def get_florence_model():
-    """Lazily initialize Florence-2 model (it's heavy to load)."""
-    global florence_processor, florence_model
-    if florence_processor is None or florence_model is None:
-        logger.info("Loading Florence-2 model...")
-        try:
-            # Use Florence-2-base for better performance on Apple Silicon
-            model_name = "microsoft/Florence-2-base"
-            florence_processor = AutoProcessor.from_pretrained(model_name, trust_remote_code=True)
-            florence_model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                trust_remote_code=True,
-                torch_dtype=torch.float32  # Use float32 for CPU/Apple Silicon compatibility
+        with torch.no_grad():
+            out = blip_model.generate(
+                **inputs,
+                max_length=150,
+                num_beams=5,
+                temperature=1.0
             )
-            # Add _supports_sdpa attribute if missing (compatibility fix)
-            if not hasattr(florence_model, '_supports_sdpa'):
-                florence_model._supports_sdpa = False
-            florence_model.to(device)
-            florence_model.eval()
-            logger.info("Florence-2 model loaded successfully!")
-        except Exception as e:
-            logger.error(f"Failed to load Florence-2: {str(e)}")
-            # Set to False to prevent retry
-            florence_processor = False
-            florence_model = False
-            return None, None
-    # Check if previous load failed
-    if florence_processor is False or florence_model is False:
-        return None, None
-    return florence_processor, florence_model
 
+        return [caption.strip() for caption in blip_processor.batch_decode(out, skip_special_tokens=True)]
 
-def generate_caption_florence(image: Image.Image, detailed: bool = True) -> str:
-    """Generate caption using Florence-2."""
-    processor, model = get_florence_model()
-    if processor is None or model is None:
-        logger.warning("Florence-2 not available, falling back to BLIP")
-        return generate_caption_blip(image)
 
-    try:
-        # Use DETAILED_CAPTION for more comprehensive descriptions
-        task_prompt = "<MORE_DETAILED_CAPTION>" if detailed else "<CAPTION>"
+def generate_caption_blip(image: Image.Image) -> str:
+    """Generate caption using BLIP."""
+    return caption_batchers["blip"].run(image)
+
+
+def _load_florence():
+    """Load Florence-2 (heavy; only loaded when a request needs it)."""
+    # Use Florence-2-base for better performance on Apple Silicon
+    model_name = "microsoft/Florence-2-base"
+    processor = _from_pretrained(AutoProcessor, model_name, trust_remote_code=True)
+    model = _from_pretrained(
+        AutoModelForCausalLM,
+        model_name,
+        is_model=True,
+        trust_remote_code=True,
+        torch_dtype=torch.float32  # Use float32 for CPU/Apple Silicon compatibility
+    )
+    # Add _supports_sdpa attribute if missing (compatibility fix)
+    if not hasattr(model, '_supports_sdpa'):
+        model._supports_sdpa = False
+    model.to(device)
+    model.eval()
+    return processor, model
+
+
+def _generate_captions_florence_batch(images: List[Image.Image], detailed: bool = True) -> List[str]:
+    """
+    Run one batched Florence-2 generate() call.
 
-        inputs = processor(text=task_prompt, images=image, return_tensors="pt").to(device)
+    Every image gets the same task prompt, so the prompt tokens line up and the
+    padded batch beam-searches together. Raises if Florence-2 is unavailable.
+    """
+    # ModelUnavailableError is a RuntimeError, so callers fall back to BLIP
+    with model_registry.use("florence") as (processor, model):
+        return _run_florence_caption_batch(processor, model, images, detailed)
 
-        with torch.no_grad():
-            generated_ids = model.generate(
-                input_ids=inputs["input_ids"],
-                pixel_values=inputs["pixel_values"],
-                max_new_tokens=256,
-                num_beams=3,
-                do_sample=False
-            )
 
-        generated_text = processor.batch_decode(generated_ids, skip_special_tokens=False)[0]
+def _run_florence_caption_batch(processor, model, images: List[Image.Image], detailed: bool) -> List[str]:
+    """Florence-2 caption forward pass and output parsing for one batch."""
+    # Use DETAILED_CAPTION for more comprehensive descriptions
+    task_prompt = "<MORE_DETAILED_CAPTION>" if detailed else "<CAPTION>"
 
+    inputs = processor(
+        text=[task_prompt] * len(images),
+        images=images,
+        return_tensors="pt",
+        padding=True
+    ).to(device)
+
+    with torch.no_grad():
+        generated_ids = model.generate(
+            input_ids=inputs["input_ids"],
+            pixel_values=inputs["pixel_values"],
+            max_new_tokens=256,
+            num_beams=3,
+            do_sample=False
+        )
+
+    generated_texts = processor.batch_decode(generated_ids, skip_special_tokens=False)
+
+    captions = []
+    for image, generated_text in zip(images, generated_texts):
         # Parse Florence-2 output format
         parsed = processor.post_process_generation(
             generated_text,
@@ -503,31 +807,128 @@ def generate_caption_florence(image: Image.Image, detailed: bool = True) -> str:
         else:
             caption = str(parsed)
 
-        return caption.strip()
+        captions.append(caption.strip())
 
-    except Exception as e:
-        logger.error(f"Florence-2 caption generation failed: {str(e)}")
-        return generate_caption_blip(image)
+    return captions
+
+
+def _caption_model_name(model: str) -> str:
+    """Canonical captioning model name: "florence" or "blip"."""
+    return "florence" if model.lower() in ("florence", "florence-2") else "blip"
+
+
+def _caption_batch_with_model(images: List[Image.Image], model: str, detailed: bool = True) -> tuple:
+    """Caption one batch; returns (captions, model used after the Florence-2 -> BLIP fallback)."""
+    if _caption_model_name(model) == "florence":
+        try:
+            return _generate_captions_florence_batch(images, detailed=detailed), "florence"
+        except Exception as e:
+            logger.error(f"Florence-2 caption generation failed: {str(e)}, falling back to BLIP")
+    return generate_captions_blip(images), "blip"
+
+
+def generate_captions_florence(images: List[Image.Image], detailed: bool = True) -> List[str]:
+    """Generate captions for a batch of images using Florence-2, falling back to BLIP."""
+    return _caption_batch_with_model(images, "florence", detailed=detailed)[0]
+
+
+def generate_caption_florence(image: Image.Image, detailed: bool = True) -> str:
+    """Generate caption using Florence-2."""
+    if not detailed:
+        return generate_captions_florence([image], detailed=False)[0]
+    return _generate_caption_with_model(image, "florence")[0]
+
+
+def _generate_caption_with_model(image: Image.Image, model: str) -> tuple:
+    """generate_caption() that also returns the model used after fallbacks."""
+    if _caption_model_name(model) == "florence":
+        try:
+            return caption_batchers["florence"].run(image), "florence"
+        except Exception as e:
+            logger.error(f"Florence-2 caption generation failed: {str(e)}, falling back to BLIP")
+    return caption_batchers["blip"].run(image), "blip"
 
 
+@stage_metrics.timed("caption")
 def generate_caption(image: Image.Image, model: str = "blip") -> str:
     """Generate caption using the specified model."""
-    if model.lower() == "florence" or model.lower() == "florence-2":
-        return generate_caption_florence(image, detailed=True)
-    else:
-        return generate_caption_blip(image)
+    return _generate_caption_with_model(image, model)[0]
+
+
+def generate_captions(images: List[Image.Image], model: str = "blip") -> List[str]:
+    """
+    Generate captions for many images, CAPTION_BATCH_SIZE images per generate() call.
+
+    Used by video keyframe analysis and bulk imports, which already hold a full
+    list of images and don't need to go through the micro-batcher.
+    """
+    return _generate_captions_with_models(images, model)[0]
+
+
+def _generate_captions_with_models(images: List[Image.Image], model: str) -> tuple:
+    """generate_captions() that also returns, per image, the model used after fallbacks."""
+    captions, models = [], []
+    step = max(1, CAPTION_BATCH_SIZE)
+    for start in range(0, len(images), step):
+        batch, used_model = _caption_batch_with_model(images[start:start + step], model)
+        captions.extend(batch)
+        models.extend([used_model] * len(batch))
+    return captions, models
+
+
+# Concurrent single-image caption requests (e.g. parallel /analyze-image calls)
+# are coalesced into batched generate() calls (see batching.py)
+caption_batchers = {
+    "blip": MicroBatcher(
+        "caption-blip",
+        generate_captions_blip,
+        max_batch_size=CAPTION_BATCH_SIZE,
+        max_wait_ms=CAPTION_BATCH_WAIT_MS,
+    ),
+    # Raises when Florence-2 fails; _generate_caption_with_model falls back to BLIP
+    "florence": MicroBatcher(
+        "caption-florence",
+        _generate_captions_florence_batch,
+        max_batch_size=CAPTION_BATCH_SIZE,
+        max_wait_ms=CAPTION_BATCH_WAIT_MS,
+    ),
+}
+
+
+# What the response reports for a stage that failed. Stages return None on
+# failure instead, so a failure is never cached as the image's result.
+NO_FACES = {"count": 0, "locations": [], "encodings": []}
+NO_OBJECTS = {"labels": [], "bboxes": [], "label_counts": {}}
+NO_HASHES = {"phash": None, "dhash": None}
+UNKNOWN_IMAGE_QUALITY = {
+    "overall_score": 0.5,
+    "sharpness": 0.5,
+    "brightness": 0.5,
+    "contrast": 0.5,
+    "saturation": 0.5,
+    "noise_score": 0.5,
+    "quality_tier": "unknown",
+    "issues": {}
+}
 
 
-def detect_faces(image: Image.Image) -> Dict:
-    """Detect faces in image and return locations and encodings."""
+@stage_metrics.timed("faces")
+def detect_faces(image: Union[Image.Image, ImageContext]) -> Optional[Dict]:
+    """Detect faces in image and return locations (original image pixels) and encodings, None on failure."""
     try:
-        img_array = np.array(image)
+        context = ImageContext.wrap(image).at(STAGE_INPUT_SIZES["faces"])
+        img_array = context.rgb
         face_locations = face_recognition.face_locations(img_array)
 
         face_encodings = []
         if face_locations:
             face_encodings = face_recognition.face_encodings(img_array, face_locations)
 
+        # Map (top, right, bottom, left) from the downscaled level back to the original
+        scale = 1.0 / context.decode_scale
+        if scale != 1.0:
+            face_locations = [tuple(int(round(v * scale)) for v in location) for location in face_locations]
+
         return {
             "count": len(face_locations),
             "locations": face_locations,
@@ -535,48 +936,55 @@ def detect_faces(image: Image.Image) -> Dict:
         }
     except Exception as e:
         logger.error(f"Face detection failed: {str(e)}")
-        return {"count": 0, "locations": [], "encodings": []}
+        return None
 
 
 # ============================================================================
 # Maximum Analysis Coverage Functions
 # ============================================================================
 
-def detect_objects_florence(image: Image.Image) -> Dict:
+@stage_metrics.timed("objects")
+def detect_objects_florence(image: Union[Image.Image, ImageContext]) -> Optional[Dict]:
     """
     Detect objects in image using Florence-2 <OD> task.
     Zero additional memory cost - reuses the already loaded Florence-2 model.
 
     Returns:
-        Dict with labels, bboxes, and label_counts
+        Dict with labels, bboxes (original image pixels), and label_counts;
+        None if Florence-2 is unavailable or fails
     """
-    processor, model = get_florence_model()
-    if processor is None or model is None:
+    context = ImageContext.wrap(image)
+    image = context.for_short_side(STAGE_INPUT_SIZES["objects"])
+    bbox_scale = context.original_size[0] / image.width
+
+    if not model_registry.available("florence"):
         logger.warning("Florence-2 not available for object detection")
-        return {"labels": [], "bboxes": [], "label_counts": {}}
+        return None
 
     try:
         task_prompt = "<OD>"  # Object Detection task
 
-        inputs = processor(text=task_prompt, images=image, return_tensors="pt").to(device)
-
-        with torch.no_grad():
-            generated_ids = model.generate(
-                input_ids=inputs["input_ids"],
-                pixel_values=inputs["pixel_values"],
-                max_new_tokens=1024,
-                num_beams=3,
-                do_sample=False
-            )
+        # Held for the forward pass so an eviction cannot free it mid-generate
+        with model_registry.use("florence") as (processor, model):
+            inputs = processor(text=task_prompt, images=image, return_tensors="pt").to(device)
+
+            with torch.no_grad():
+                generated_ids = model.generate(
+                    input_ids=inputs["input_ids"],
+                    pixel_values=inputs["pixel_values"],
+                    max_new_tokens=1024,
+                    num_beams=3,
+                    do_sample=False
+                )
 
-        generated_text = processor.batch_decode(generated_ids, skip_special_tokens=False)[0]
+            generated_text = processor.batch_decode(generated_ids, skip_special_tokens=False)[0]
 
-        # Parse Florence-2 output format
-        parsed = processor.post_process_generation(
-            generated_text,
-            task=task_prompt,
-            image_size=(image.width, image.height)
-        )
+            # Parse Florence-2 output format
+            parsed = processor.post_process_generation(
+                generated_text,
+                task=task_prompt,
+                image_size=(image.width, image.height)
+            )
 
         # Extract labels and bboxes with robust multi-format parsing
         labels = []
@@ -631,16 +1039,17 @@ def detect_objects_florence(image: Image.Image) -> Dict:
 
         return {
             "labels": labels,
-            "bboxes": [[int(b) for b in bbox] for bbox in bboxes] if bboxes else [],
+            "bboxes": [[int(b * bbox_scale) for b in bbox] for bbox in bboxes] if bboxes else [],
             "label_counts": label_counts
         }
 
     except Exception as e:
         logger.error(f"Florence-2 object detection failed: {str(e)}")
-        return {"labels": [], "bboxes": [], "label_counts": {}}
+        return None
 
 
-def extract_dominant_colors(image: Image.Image, n_colors: int = 5) -> List[Dict]:
+@stage_metrics.timed("colors")
+def extract_dominant_colors(image: Union[Image.Image, ImageContext], n_colors: int = 5) -> List[Dict]:
     """
     Extract dominant colors from image using K-means clustering.
     CPU-only, memory efficient (~50MB for processing).
@@ -651,18 +1060,8 @@ def extract_dominant_colors(image: Image.Image, n_colors: int = 5) -> List[Dict]
     try:
         from sklearn.cluster import KMeans
 
-        # Resize image for faster processing (max 200x200)
-        img = image.copy()
-        img.thumbnail((200, 200), Image.Resampling.LANCZOS)
-
-        # Convert to numpy array
-        img_array = np.array(img)
-
-        # Handle grayscale images
-        if len(img_array.shape) == 2:
-            img_array = np.stack([img_array] * 3, axis=-1)
-        elif img_array.shape[2] == 4:  # RGBA
-            img_array = img_array[:, :, :3]
+        # Downscaled level for faster processing (max 200x200)
+        img_array = ImageContext.wrap(image).level_array(STAGE_INPUT_SIZES["colors"])
 
         # Reshape to (n_pixels, 3)
         pixels = img_array.reshape(-1, 3)
@@ -751,22 +1150,19 @@ def _get_color_name(r: int, g: int, b: int) -> str:
             return "blue"
 
 
-def analyze_image_quality(image: Image.Image) -> Dict:
+@stage_metrics.timed("quality")
+def analyze_image_quality(image: Union[Image.Image, ImageContext]) -> Optional[Dict]:
     """
     Analyze image quality using OpenCV metrics.
 
     Returns:
-        Dict with overall_score, sharpness, brightness, contrast, saturation, noise, and issues
+        Dict with overall_score, sharpness, brightness, contrast, saturation, noise, and issues;
+        None on failure
     """
     try:
-        # Convert PIL to OpenCV format
-        img_array = np.array(image)
-        if len(img_array.shape) == 2:
-            gray = img_array
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_GRAY2BGR)
-        else:
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+        # Shared grayscale/HSV forms, at a fixed scale so scores don't depend on megapixels
+        context = ImageContext.wrap(image).at(STAGE_INPUT_SIZES["quality"])
+        gray = context.gray
 
         # 1. Sharpness (Laplacian variance)
         laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
@@ -787,19 +1183,15 @@ def analyze_image_quality(image: Image.Image) -> Dict:
         contrast = min(1.0, contrast_raw / 70)
         is_low_contrast = contrast_raw < 30
 
-        # 4. Saturation (for color images)
-        saturation = 0.5  # default for grayscale
-        is_desaturated = False
-        if len(img_array.shape) == 3 and img_array.shape[2] >= 3:
-            hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
-            saturation_raw = np.mean(hsv[:, :, 1])
-            saturation = saturation_raw / 255
-            is_desaturated = saturation_raw < 30
+        # 4. Saturation (the context is always RGB)
+        saturation_raw = np.mean(context.hsv[:, :, 1])
+        saturation = saturation_raw / 255
+        is_desaturated = saturation_raw < 30
 
         # 5. Noise estimation (high-frequency content in smooth areas)
         # Use median filter comparison
         denoised = cv2.medianBlur(gray, 5)
-        noise_raw = np.mean(np.abs(gray.astype(float) - denoised.astype(float)))
+        noise_raw = np.mean(cv2.absdiff(gray, denoised))  # exact |a - b| in uint8, no float copies
         # Normalize: <5 is clean, >20 is noisy
         noise_score = max(0, 1.0 - noise_raw / 20)
         is_noisy = noise_raw > 15
@@ -849,19 +1241,11 @@ def analyze_image_quality(image: Image.Image) -> Dict:
 
     except Exception as e:
         logger.error(f"Image quality analysis failed: {str(e)}")
-        return {
-            "overall_score": 0.5,
-            "sharpness": 0.5,
-            "brightness": 0.5,
-            "contrast": 0.5,
-            "saturation": 0.5,
-            "noise_score": 0.5,
-            "quality_tier": "unknown",
-            "issues": {}
-        }
+        return None
 
 
-def compute_perceptual_hashes(image: Image.Image) -> Dict[str, str]:
+@stage_metrics.timed("hashes")
+def compute_perceptual_hashes(image: Union[Image.Image, ImageContext]) -> Optional[Dict[str, str]]:
     """
     Compute perceptual hashes for duplicate detection.
 
@@ -869,15 +1253,13 @@ def compute_perceptual_hashes(image: Image.Image) -> Dict[str, str]:
     dHash (difference hash) - good for detecting crops and edits
 
     Returns:
-        Dict with phash and dhash as hex strings
+        Dict with phash and dhash as hex strings, None on failure
     """
     try:
         import imagehash
 
-        # Ensure image is in a format imagehash can process
-        img = image.copy()
-        if img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
+        # imagehash converts and shrinks internally without touching the input, so no copy
+        img = ImageContext.wrap(image).level(STAGE_INPUT_SIZES["hashes"])
 
         # pHash - perceptual hash using DCT
         phash = str(imagehash.phash(img))
@@ -894,13 +1276,14 @@ def compute_perceptual_hashes(image: Image.Image) -> Dict[str, str]:
 
     except ImportError:
         logger.error("imagehash library not available")
-        return {"phash": None, "dhash": None}
+        return None
     except Exception as e:
         logger.error(f"Hash computation failed: {str(e)}")
-        return {"phash": None, "dhash": None}
+        return None
 
 
-def classify_scene_ollama(image: Image.Image, ollama_model: str = "llava:13b-v1.6") -> Dict:
+@stage_metrics.timed("scene")
+def classify_scene_ollama(image: Union[Image.Image, ImageContext], ollama_model: str = "llava:13b-v1.6") -> Dict:
     """
     Classify scene/environment using Ollama vision model.
 
@@ -922,9 +1305,8 @@ def classify_scene_ollama(image: Image.Image, ollama_model: str = "llava:13b-v1.
         import base64
         from io import BytesIO
 
-        # Convert image to base64
-        img = image.copy()
-        img.thumbnail((1024, 1024), Image.Resampling.LANCZOS)  # Limit size for Ollama
+        # Convert image to base64 (pyramid level limits the size for Ollama)
+        img = ImageContext.wrap(image).level(STAGE_INPUT_SIZES["scene"])
 
         buffer = BytesIO()
         img.save(buffer, format="JPEG", quality=85)
@@ -986,61 +1368,55 @@ Return ONLY valid JSON, no other text."""
         return {}
 
 
-def generate_image_embedding_clip(image: Image.Image) -> np.ndarray:
-    """Generate normalized embedding vector using CLIP."""
-    inputs = clip_processor(images=image, return_tensors="pt").to(device)
+def _embed_images_clip(images: List[Image.Image]) -> np.ndarray:
+    """Run one batched CLIP forward pass. Returns an (n, dim) array of normalized vectors."""
+    with model_registry.use("clip") as (clip_processor, clip_model):
+        inputs = clip_processor(images=images, return_tensors="pt").to(device)
 
-    with torch.no_grad():
-        image_features = clip_model.get_image_features(**inputs)
+        with torch.no_grad():
+            image_features = clip_model.get_image_features(**inputs)
 
-    embedding = image_features / image_features.norm(dim=-1, keepdim=True)
-    return embedding.cpu().numpy().flatten()
+    embeddings = image_features / image_features.norm(dim=-1, keepdim=True)
+    return embeddings.cpu().numpy()
 
 
-def get_siglip_model():
-    """Lazily initialize SigLIP model (it's heavy to load)."""
-    global siglip_processor, siglip_model
-    if siglip_processor is None or siglip_model is None:
-        logger.info("Loading SigLIP model...")
-        try:
-            from transformers import AutoProcessor, AutoModel
-            # Use SigLIP base for good balance of quality and speed
-            model_name = "google/siglip-base-patch16-224"
-            siglip_processor = AutoProcessor.from_pretrained(model_name)
-            siglip_model = AutoModel.from_pretrained(model_name)
-            siglip_model.to(device)
-            siglip_model.eval()
-            logger.info("SigLIP model loaded successfully!")
-        except Exception as e:
-            logger.error(f"Failed to load SigLIP: {str(e)}")
-            return None, None
-    return siglip_processor, siglip_model
+def generate_image_embedding_clip(image: Image.Image) -> np.ndarray:
+    """Generate normalized embedding vector using CLIP."""
+    return embedding_batchers["clip"].run(image)
+
+
+def _load_siglip():
+    """Load SigLIP (only loaded when a request needs it)."""
+    from transformers import AutoProcessor, AutoModel
+    # Use SigLIP base for good balance of quality and speed
+    model_name = "google/siglip-base-patch16-224"
+    processor = _from_pretrained(AutoProcessor, model_name)
+    model = _from_pretrained(AutoModel, model_name, is_model=True)
+    model.to(device)
+    model.eval()
+    return processor, model
 
 
 def generate_image_embedding_siglip(image: Image.Image) -> np.ndarray:
-    """Generate normalized embedding vector using SigLIP."""
-    processor, model = get_siglip_model()
-    if processor is None or model is None:
-        logger.warning("SigLIP not available, falling back to CLIP")
-        return generate_image_embedding_clip(image)
+    """Generate normalized embedding vector using SigLIP (falls back to CLIP)."""
+    return _generate_image_embedding_with_model(image, "siglip")[0]
 
-    try:
-        inputs = processor(images=image, return_tensors="pt").to(device)
+
+def _embed_images_siglip(images: List[Image.Image]) -> np.ndarray:
+    """Run one batched SigLIP forward pass. Returns an (n, dim) array of normalized vectors."""
+    with model_registry.use("siglip") as (processor, model):
+        inputs = processor(images=images, return_tensors="pt").to(device)
 
         with torch.no_grad():
             outputs = model.get_image_features(**inputs)
 
-        embedding = outputs / outputs.norm(dim=-1, keepdim=True)
-        return embedding.cpu().numpy().flatten()
-
-    except Exception as e:
-        logger.error(f"SigLIP embedding failed: {str(e)}")
-        return generate_image_embedding_clip(image)
+    embeddings = outputs / outputs.norm(dim=-1, keepdim=True)
+    return embeddings.cpu().numpy()
 
 
-def get_aimv2_model():
+def _load_aimv2():
     """
-    Lazily initialize AIMv2 model (Apple's Autoregressive Image Models v2).
+    Load AIMv2 (Apple's Autoregressive Image Models v2).
 
     AIMv2 consistently outperforms state-of-the-art contrastive models like CLIP
     and SigLIP in multimodal image understanding across diverse settings.
@@ -1050,22 +1426,24 @@ def get_aimv2_model():
     - apple/aimv2-huge-patch14-224 (highest quality, more memory)
     - apple/aimv2-large-patch14-336 (larger input, more detail)
     """
-    global aimv2_processor, aimv2_model
-    if aimv2_processor is None or aimv2_model is None:
-        logger.info("Loading AIMv2 model (Apple's state-of-the-art embedding model)...")
-        try:
-            from transformers import AutoProcessor, AutoModel
-            # Use AIMv2-large for good balance of quality and speed on Apple Silicon
-            model_name = "apple/aimv2-large-patch14-224"
-            aimv2_processor = AutoProcessor.from_pretrained(model_name, trust_remote_code=True)
-            aimv2_model = AutoModel.from_pretrained(model_name, trust_remote_code=True)
-            aimv2_model.to(device)
-            aimv2_model.eval()
-            logger.info("AIMv2 model loaded successfully!")
-        except Exception as e:
-            logger.error(f"Failed to load AIMv2: {str(e)}")
-            return None, None
-    return aimv2_processor, aimv2_model
+    from transformers import AutoProcessor, AutoModel
+    # Use AIMv2-large for good balance of quality and speed on Apple Silicon
+    model_name = "apple/aimv2-large-patch14-224"
+    processor = _from_pretrained(AutoProcessor, model_name, trust_remote_code=True)
+    model = _from_pretrained(AutoModel, model_name, is_model=True, trust_remote_code=True)
+    model.to(device)
+    model.eval()
+    return processor, model
+
+
+# Every model the service can use, loaded on first use (see model_registry.py)
+model_registry.register("blip", _load_blip)
+model_registry.register("clip", _load_clip)
+model_registry.register("florence", _load_florence)
+model_registry.register("siglip", _load_siglip)
+model_registry.register("aimv2", _load_aimv2)
+if WHISPER_AVAILABLE:
+    model_registry.register("whisper", _load_whisper)
 
 
 def generate_image_embedding_aimv2(image: Image.Image) -> np.ndarray:
@@ -1073,35 +1451,56 @@ def generate_image_embedding_aimv2(image: Image.Image) -> np.ndarray:
     Generate normalized embedding vector using AIMv2 (Apple's model).
 
     AIMv2 outperforms CLIP and SigLIP for image understanding and retrieval.
+    Falls back to SigLIP, then CLIP.
     """
-    processor, model = get_aimv2_model()
-    if processor is None or model is None:
-        logger.warning("AIMv2 not available, falling back to SigLIP")
-        return generate_image_embedding_siglip(image)
+    return _generate_image_embedding_with_model(image, "aimv2")[0]
 
-    try:
-        inputs = processor(images=image, return_tensors="pt").to(device)
+
+def _embed_images_aimv2(images: List[Image.Image]) -> np.ndarray:
+    """Run one batched AIMv2 forward pass. Returns an (n, dim) array of normalized vectors."""
+    with model_registry.use("aimv2") as (processor, model):
+        inputs = processor(images=images, return_tensors="pt").to(device)
 
         with torch.no_grad():
             outputs = model(inputs["pixel_values"])
 
-        # AIMv2 returns features that need to be extracted
-        # Use the pooled output or mean of last hidden state
-        if hasattr(outputs, 'pooler_output') and outputs.pooler_output is not None:
-            features = outputs.pooler_output
-        else:
-            # Use mean pooling of last hidden state
-            features = outputs.last_hidden_state.mean(dim=1)
+    # AIMv2 returns features that need to be extracted
+    # Use the pooled output or mean of last hidden state
+    if hasattr(outputs, 'pooler_output') and outputs.pooler_output is not None:
+        features = outputs.pooler_output
+    else:
+        # Use mean pooling of last hidden state
+        features = outputs.last_hidden_state.mean(dim=1)
+
+    # Normalize the embeddings
+    embeddings = features / features.norm(dim=-1, keepdim=True)
+    return embeddings.cpu().numpy()
+
+
+# One micro-batcher per embedding model: concurrent single-image requests from
+# all lanes are coalesced into batched forward passes (see batching.py)
+embedding_batchers = {
+    name: MicroBatcher(
+        f"embedding-{name}",
+        batch_fn,
+        max_batch_size=EMBEDDING_BATCH_SIZE,
+        max_wait_ms=EMBEDDING_BATCH_WAIT_MS,
+    )
+    for name, batch_fn in (
+        ("clip", _embed_images_clip),
+        ("siglip", _embed_images_siglip),
+        ("aimv2", _embed_images_aimv2),
+    )
+}
 
-        # Normalize the embedding
-        embedding = features / features.norm(dim=-1, keepdim=True)
-        return embedding.cpu().numpy().flatten()
+# Fallback order when a model fails to load or run (mirrors the single-image functions)
+EMBEDDING_FALLBACKS = {"aimv2": "siglip", "siglip": "clip"}
 
-    except Exception as e:
-        logger.error(f"AIMv2 embedding failed: {str(e)}, falling back to SigLIP")
-        return generate_image_embedding_siglip(image)
+# Output dimension of each image embedding model
+EMBEDDING_DIMENSIONS = {"clip": 512, "siglip": 768, "aimv2": 1024}
 
 
+@stage_metrics.timed("embedding")
 def generate_image_embedding(image: Image.Image, model: str = "aimv2") -> np.ndarray:
     """
     Generate embedding using the specified model.
@@ -1116,83 +1515,118 @@ def generate_image_embedding(image: Image.Image, model: str = "aimv2") -> np.nda
     Returns:
         Normalized embedding vector as numpy array
     """
+    return _generate_image_embedding_with_model(image, model)[0]
+
+
+def _embedding_model_name(model: str) -> str:
+    """Canonical embedding model name; unknown names mean CLIP."""
     model_lower = model.lower()
-    if model_lower == "aimv2":
-        return generate_image_embedding_aimv2(image)
-    elif model_lower == "siglip":
-        return generate_image_embedding_siglip(image)
-    else:
-        return generate_image_embedding_clip(image)
+    return model_lower if model_lower in embedding_batchers else "clip"
+
+
+def _generate_image_embedding_with_model(image: Image.Image, model: str) -> tuple:
+    """generate_image_embedding() that also returns the model used after fallbacks."""
+    model_lower = _embedding_model_name(model)
+    fallback = EMBEDDING_FALLBACKS.get(model_lower)
+    if fallback is not None and model_registry.get_or_none(model_lower) is None:
+        logger.warning(f"{model_lower} not available, falling back to {fallback}")
+        return _generate_image_embedding_with_model(image, fallback)
+
+    try:
+        return embedding_batchers[model_lower].run(image), model_lower
+    except Exception as e:
+        if fallback is None:
+            raise
+        logger.error(f"{model_lower} embedding failed: {str(e)}, falling back to {fallback}")
+        return _generate_image_embedding_with_model(image, fallback)
 
 
-def generate_thumbnail(image_path: str, max_size: tuple = (800, 800)) -> Optional[str]:
+def generate_image_embeddings(images: List[Image.Image], model: str = "aimv2") -> np.ndarray:
     """
-    Generate a browser-compatible JPEG thumbnail for any image format.
+    Generate embeddings for many images with batched forward passes.
+
+    Bypasses the micro-batcher since the caller already holds a full batch.
+    Falls back AIMv2 -> SigLIP -> CLIP like generate_image_embedding().
 
     Args:
-        image_path: Path to the original image file
-        max_size: Maximum dimensions (width, height) for the thumbnail
+        images: PIL Images to embed
+        model: Embedding model to use ("aimv2", "siglip", or "clip")
 
     Returns:
-        Path to the generated thumbnail or None if generation fails
+        (len(images), dim) array of normalized embeddings, in input order
     """
-    try:
-        # Parse the original path
-        original_path = Path(image_path)
-
-        # Create thumbnail directory structure
-        # Original: /app/shared/images/abc.heic
-        # Thumbnail: /app/shared/images/thumbnails/abc.jpg
-        thumbnail_dir = original_path.parent / 'thumbnails'
-        thumbnail_dir.mkdir(parents=True, exist_ok=True)
+    return _generate_image_embeddings_with_model(images, model)[0]
 
-        # Generate thumbnail filename (always .jpg)
-        thumbnail_filename = original_path.stem + '.jpg'
-        thumbnail_path = thumbnail_dir / thumbnail_filename
 
-        # Open and convert the image
-        image = Image.open(image_path).convert("RGB")
+def _generate_image_embeddings_with_model(images: List[Image.Image], model: str) -> tuple:
+    """generate_image_embeddings() that also returns the model used after fallbacks."""
+    model_lower = _embedding_model_name(model)
+    batch_fn = embedding_batchers[model_lower].batch_fn
+    try:
+        chunks = [
+            batch_fn(images[start:start + EMBEDDING_BATCH_SIZE])
+            for start in range(0, len(images), max(1, EMBEDDING_BATCH_SIZE))
+        ]
+        if not chunks:
+            return np.zeros((0, EMBEDDING_DIMENSIONS[model_lower]), dtype=np.float32), model_lower
+        return np.concatenate(chunks, axis=0), model_lower
+    except Exception as e:
+        fallback = EMBEDDING_FALLBACKS.get(model_lower)
+        if fallback is None:
+            raise
+        logger.error(f"Batched {model_lower} embedding failed: {str(e)}, falling back to {fallback}")
+        return _generate_image_embeddings_with_model(images, fallback)
+
+
+@stage_metrics.timed("thumbnail")
+def generate_thumbnail(
+    image_path: str,
+    image: Optional[Union[Image.Image, ImageContext]] = None
+) -> Optional[str]:
+    """
+    Generate browser-compatible thumbnails (THUMBNAIL_SIZES/FORMATS) for any image format.
 
-        # Generate thumbnail (maintains aspect ratio)
-        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    Original: /app/shared/images/abc.heic
+    Thumbnail: /app/shared/images/thumbnails/abc.jpg (plus abc_<size>.<ext> variants)
 
-        # Save as JPEG
-        image.save(str(thumbnail_path), "JPEG", quality=85, optimize=True)
+    Args:
+        image_path: Path to the original image file
+        image: Already decoded image; the file is only opened when omitted
 
-        logger.info(f"Generated thumbnail: {thumbnail_path}")
-        return str(thumbnail_path)
+    Returns:
+        Path to the primary thumbnail or None if generation fails
+    """
+    def render() -> ImageContext:
+        if image is not None:
+            return ImageContext.wrap(image)
+        # Reduced JPEG/HEIF decode; nothing here needs more than the largest thumbnail
+        return ImageContext.open(image_path, min_long_side=thumbnail_service.max_size)
 
-    except Exception as e:
-        logger.error(f"Failed to generate thumbnail for {image_path}: {str(e)}")
-        return None
+    thumbnail_path = thumbnail_service.generate(image_path, render)
+    if thumbnail_path:
+        logger.info(f"Thumbnail ready: {thumbnail_path}")
+    return thumbnail_path
 
 
 # ===== VIDEO PROCESSING =====
 
-def generate_video_thumbnail(video_path: str, time_position: float = 1.0, max_size: tuple = (800, 800)) -> Optional[str]:
+def generate_video_thumbnail(video_path: str, time_position: float = 1.0) -> Optional[str]:
     """
-    Generate a thumbnail from a video file by extracting a frame.
+    Generate thumbnails from a video file by extracting a frame.
 
     Args:
         video_path: Path to the video file
         time_position: Time position in seconds to extract frame (default: 1.0)
-        max_size: Maximum dimensions for the thumbnail
 
     Returns:
-        Path to the generated thumbnail or None if generation fails
+        Path to the primary thumbnail or None if generation fails
     """
-    try:
-        # Parse the original path
-        original_path = Path(video_path)
-
-        # Create thumbnail directory
-        thumbnail_dir = original_path.parent / 'thumbnails'
-        thumbnail_dir.mkdir(parents=True, exist_ok=True)
+    return thumbnail_service.generate(video_path, lambda: _read_video_thumbnail_frame(video_path, time_position))
 
-        # Generate thumbnail filename
-        thumbnail_filename = original_path.stem + '.jpg'
-        thumbnail_path = thumbnail_dir / thumbnail_filename
 
+def _read_video_thumbnail_frame(video_path: str, time_position: float) -> Optional[Image.Image]:
+    """First decodable frame at time_position or one of the fallback positions."""
+    try:
         # Open video and get metadata
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
@@ -1218,23 +1652,13 @@ def generate_video_thumbnail(video_path: str, time_position: float = 1.0, max_si
             ret, frame = cap.read()
 
             if ret and frame is not None and frame.size > 0:
-                # Success! Convert and save the frame
+                # Success! Convert the frame
                 try:
-                    # Convert BGR to RGB
-                    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                    # Convert to PIL Image
-                    image = Image.fromarray(frame_rgb)
-
-                    # Generate thumbnail
-                    image.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-                    # Save as JPEG
-                    image.save(str(thumbnail_path), "JPEG", quality=85, optimize=True)
+                    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
 
                     cap.release()
-                    logger.info(f"Generated video thumbnail at {pos}s: {thumbnail_path}")
-                    return str(thumbnail_path)
+                    logger.info(f"Extracted video thumbnail frame at {pos}s: {video_path}")
+                    return image
                 except Exception as e:
                     logger.warning(f"Failed to process frame at {pos}s: {str(e)}")
                     continue
@@ -1244,42 +1668,21 @@ def generate_video_thumbnail(video_path: str, time_position: float = 1.0, max_si
         return None
 
     except Exception as e:
-        logger.error(f"Failed to generate video thumbnail for {video_path}: {str(e)}")
+        logger.error(f"Failed to read video thumbnail frame for {video_path}: {str(e)}")
         return None
 
 
-def _calculate_frame_difference(frame1: np.ndarray, frame2: np.ndarray) -> float:
+def save_video_thumbnail(video_path: str, frame_rgb: np.ndarray) -> Optional[str]:
     """
-    Calculate the difference between two frames using histogram comparison.
+    Save an already decoded frame as the video's thumbnails.
 
-    Returns a value between 0 (identical) and 1 (completely different).
-    Uses HSV color space for better scene detection accuracy.
+    Returns:
+        Path to the primary thumbnail or None if saving fails
     """
-    try:
-        # Convert to HSV for better color comparison
-        hsv1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2HSV)
-        hsv2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2HSV)
-
-        # Calculate histograms
-        hist1 = cv2.calcHist([hsv1], [0, 1], None, [50, 60], [0, 180, 0, 256])
-        hist2 = cv2.calcHist([hsv2], [0, 1], None, [50, 60], [0, 180, 0, 256])
-
-        # Normalize histograms
-        cv2.normalize(hist1, hist1, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
-        cv2.normalize(hist2, hist2, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
-
-        # Compare histograms (returns value between 0 and 1)
-        # 1 = identical, 0 = completely different
-        similarity = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
-
-        # Convert to difference (0 = identical, 1 = completely different)
-        difference = 1.0 - similarity
-
-        return difference
-
-    except Exception as e:
-        logger.error(f"Failed to calculate frame difference: {str(e)}")
-        return 0.0
+    thumbnail_path = thumbnail_service.generate(video_path, lambda: Image.fromarray(frame_rgb))
+    if thumbnail_path:
+        logger.info(f"Video thumbnail ready: {thumbnail_path}")
+    return thumbnail_path
 
 
 def extract_video_frames_with_scene_detection(
@@ -1292,6 +1695,8 @@ def extract_video_frames_with_scene_detection(
 
     Only extracts frames when a significant scene change is detected, reducing
     redundant processing while capturing all important visual content.
+    /analyze-video calls decode_video() directly to also get metadata and
+    the thumbnail from the same pass.
 
     Args:
         video_path: Path to the video file
@@ -1299,53 +1704,19 @@ def extract_video_frames_with_scene_detection(
         min_scene_duration_frames: Minimum frames between scene changes to avoid flickering
 
     Returns:
-        List of numpy arrays containing only keyframes from unique scenes
+        List of RGB numpy arrays (downscaled to VIDEO_KEYFRAME_MAX_SIDE), one per scene
     """
     try:
-        cap = cv2.VideoCapture(video_path)
-        frames = []
-        prev_frame = None
-        frame_count = 0
-        last_scene_frame = 0
-
-        logger.info(f"Starting smart scene detection with threshold={scene_threshold}")
-
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Always add the first frame
-            if prev_frame is None:
-                frames.append(frame_rgb)
-                prev_frame = frame
-                last_scene_frame = frame_count
-                logger.info(f"Frame {frame_count}: Added first frame")
-                frame_count += 1
-                continue
-
-            # Check if enough frames have passed since last scene
-            frames_since_last_scene = frame_count - last_scene_frame
-
-            if frames_since_last_scene >= min_scene_duration_frames:
-                # Calculate difference from previous frame
-                difference = _calculate_frame_difference(prev_frame, frame)
-
-                # If difference exceeds threshold, it's a new scene
-                if difference >= scene_threshold:
-                    frames.append(frame_rgb)
-                    last_scene_frame = frame_count
-                    logger.info(f"Frame {frame_count}: Scene change detected (diff={difference:.3f})")
-
-            prev_frame = frame
-            frame_count += 1
-
-        cap.release()
-        logger.info(f"Smart scene detection complete: extracted {len(frames)} keyframes from {frame_count} total frames")
-        return frames
+        decoded = decode_video(
+            video_path,
+            scene_threshold=scene_threshold,
+            min_scene_duration_frames=min_scene_duration_frames,
+            keyframe_max_side=VIDEO_KEYFRAME_MAX_SIDE,
+            max_keyframes=VIDEO_MAX_KEYFRAMES,
+            analysis_width=SCENE_ANALYSIS_WIDTH,
+            frame_stride=SCENE_FRAME_STRIDE,
+        )
+        return [keyframe.image for keyframe in decoded.keyframes]
 
     except Exception as e:
         logger.error(f"Failed to extract video frames with scene detection: {str(e)}")
@@ -1357,7 +1728,8 @@ def extract_video_frames(video_path: str, frame_interval: int = 30) -> List[np.n
     Extract frames from video at specified interval (legacy method).
 
     This method is kept for backward compatibility. For better performance,
-    use extract_video_frames_with_scene_detection() instead.
+    use decode_video() with sampling_mode="interval" or "seek" instead.
+    Skipped frames are grabbed but never retrieved.
     """
     try:
         cap = cv2.VideoCapture(video_path)
@@ -1365,14 +1737,19 @@ def extract_video_frames(video_path: str, frame_interval: int = 30) -> List[np.n
         frame_count = 0
 
         while True:
+            if frame_count % frame_interval != 0:
+                if not cap.grab():
+                    break
+                frame_count += 1
+                continue
+
             ret, frame = cap.read()
             if not ret:
                 break
 
-            if frame_count % frame_interval == 0:
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frames.append(frame_rgb)
+            # Convert BGR to RGB
+            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            frames.append(frame_rgb)
 
             frame_count += 1
 
@@ -1409,91 +1786,123 @@ def get_video_metadata(video_path: str) -> Dict:
         return {}
 
 
-def _process_single_frame(idx: int, frame: np.ndarray) -> Optional[Dict]:
-    """Process a single video frame. Helper function for parallel processing."""
-    try:
-        # Convert numpy array to PIL Image
-        pil_image = Image.fromarray(frame)
+@stage_metrics.timed("video_scenes")
+def analyze_video_scenes(frames: List[np.ndarray], timestamps: Optional[List[float]] = None) -> List[Dict]:
+    """
+    Analyze video frames and generate scene descriptions using batched captioning.
 
-        # Generate caption for this frame
-        caption = generate_caption_blip(pil_image)
+    Frames are captioned CAPTION_BATCH_SIZE at a time in a single BLIP
+    generate() call each, instead of one thread per frame fighting over the
+    same cores. A failed batch is logged and its frames are skipped.
 
-        return {
-            "frame_index": idx,
-            "description": caption
-        }
+    Args:
+        frames: RGB keyframes
+        timestamps: Optional time in seconds of each keyframe, added to its description
+    """
+    scene_descriptions = []
+    step = max(1, CAPTION_BATCH_SIZE)
 
-    except Exception as e:
-        logger.error(f"Failed to analyze frame {idx}: {str(e)}")
-        return None
+    logger.info(f"Captioning {len(frames)} video frames in batches of {step}")
 
+    for start in range(0, len(frames), step):
+        batch = frames[start:start + step]
+        try:
+            captions = generate_captions_blip([Image.fromarray(frame) for frame in batch])
+        except Exception as e:
+            logger.error(f"Failed to analyze frames {start}-{start + len(batch) - 1}: {str(e)}")
+            continue
 
-def analyze_video_scenes(frames: List[np.ndarray]) -> List[Dict]:
-    """
-    Analyze video frames and generate scene descriptions using parallel processing.
+        for offset, caption in enumerate(captions):
+            scene = {
+                "frame_index": start + offset,
+                "description": caption
+            }
+            if timestamps is not None:
+                scene["timestamp"] = round(timestamps[start + offset], 3)
+            scene_descriptions.append(scene)
 
-    Uses ThreadPoolExecutor to process multiple frames concurrently for better performance.
-    Number of workers is configurable via MAX_VIDEO_WORKERS constant.
-    """
-    scene_descriptions = []
+    logger.info(f"Successfully analyzed {len(scene_descriptions)}/{len(frames)} frames")
+    return scene_descriptions
 
-    # Use parallel processing if we have multiple frames
-    if len(frames) > 1:
-        logger.info(f"Processing {len(frames)} video frames with {MAX_VIDEO_WORKERS} workers")
 
-        with ThreadPoolExecutor(max_workers=MAX_VIDEO_WORKERS) as executor:
-            # Submit all frames for processing
-            future_to_idx = {
-                executor.submit(_process_single_frame, idx, frame): idx
-                for idx, frame in enumerate(frames)
-            }
+@stage_metrics.timed("video_embedding")
+def embed_video_scenes(
+    frames: List[np.ndarray],
+    spans: List[tuple],
+    model: str = "aimv2",
+    pooling: str = "duration",
+) -> Dict[str, Any]:
+    """
+    Embed every keyframe in batched forward passes and pool them into one vector.
 
-            # Collect results as they complete
-            for future in as_completed(future_to_idx):
-                result = future.result()
-                if result is not None:
-                    scene_descriptions.append(result)
+    Args:
+        frames: RGB keyframes, in video order
+        spans: (start, end) seconds each keyframe stands for
+        model: Embedding model ("aimv2", "siglip", "clip")
+        pooling: "duration" weights each keyframe by its span; "mean" weights them equally
 
-        # Sort by frame index to maintain order
-        scene_descriptions.sort(key=lambda x: x['frame_index'])
+    Returns:
+        Dict with the L2-normalized pooled "embedding", per-keyframe
+        "scene_embeddings" and the "model" that produced them
+    """
+    vectors, used_model = _generate_image_embeddings_with_model(
+        [Image.fromarray(frame) for frame in frames], model
+    )
 
+    durations = np.array([max(0.0, end - start) for start, end in spans], dtype=np.float64)
+    if pooling == "duration" and durations.sum() > 0:
+        weights = durations / durations.sum()
     else:
-        # Single frame - no need for parallel processing
-        result = _process_single_frame(0, frames[0])
-        if result is not None:
-            scene_descriptions.append(result)
+        weights = np.full(len(frames), 1.0 / len(frames))
+
+    pooled = (vectors * weights[:, None]).sum(axis=0)
+    norm = np.linalg.norm(pooled)
+    if norm > 0:
+        pooled = pooled / norm
+
+    scene_embeddings = [
+        {
+            "scene_index": index,
+            "start_seconds": round(start, 3),
+            "end_seconds": round(end, 3),
+            "weight": round(float(weight), 4),
+            "embedding": vector.tolist(),
+        }
+        for index, ((start, end), weight, vector) in enumerate(zip(spans, weights, vectors))
+    ]
 
-    logger.info(f"Successfully analyzed {len(scene_descriptions)}/{len(frames)} frames")
-    return scene_descriptions
+    logger.info(f"Embedded {len(frames)} keyframes with {used_model} ({vectors.shape[1]}-d, {pooling} pooling)")
+    return {"embedding": pooled, "scene_embeddings": scene_embeddings, "model": used_model}
 
 
 # ===== DOCUMENT PROCESSING =====
 
-def generate_document_thumbnail(document_path: str, max_size: tuple = (800, 800)) -> Optional[str]:
+DOCUMENT_THUMBNAIL_TYPES = ('.pdf', '.txt', '.csv', '.log', '.md')
+
+
+@stage_metrics.timed("document_thumbnail")
+def generate_document_thumbnail(document_path: str) -> Optional[str]:
     """
-    Generate a thumbnail from a document file (PDF, text, etc.).
+    Generate thumbnails from a document file (PDF, text, etc.).
 
     Args:
         document_path: Path to the document file
-        max_size: Maximum dimensions for the thumbnail
 
     Returns:
-        Path to the generated thumbnail or None if generation fails
+        Path to the primary thumbnail or None if generation fails
     """
-    try:
-        # Parse the original path
-        original_path = Path(document_path)
-
-        # Create thumbnail directory
-        thumbnail_dir = original_path.parent / 'thumbnails'
-        thumbnail_dir.mkdir(parents=True, exist_ok=True)
+    mime_type = Path(document_path).suffix.lower()
+    if mime_type not in DOCUMENT_THUMBNAIL_TYPES:
+        logger.warning(f"Unsupported document type for thumbnail: {mime_type}")
+        return None
+    return thumbnail_service.generate(document_path, lambda: _render_document_preview(document_path))
 
-        # Generate thumbnail filename
-        thumbnail_filename = original_path.stem + '.jpg'
-        thumbnail_path = thumbnail_dir / thumbnail_filename
 
+def _render_document_preview(document_path: str) -> Optional[Image.Image]:
+    """First PDF page, or a text preview page, as a PIL image."""
+    try:
         # Check document type
-        mime_type = original_path.suffix.lower()
+        mime_type = Path(document_path).suffix.lower()
 
         if mime_type == '.pdf':
             # Try to use pdf2image if available
@@ -1501,12 +1910,8 @@ def generate_document_thumbnail(document_path: str, max_size: tuple = (800, 800)
                 from pdf2image import convert_from_path
                 images = convert_from_path(str(document_path), first_page=1, last_page=1)
                 if images:
-                    image = images[0]
-                    # Generate thumbnail
-                    image.thumbnail(max_size, Image.Resampling.LANCZOS)
-                    image.save(str(thumbnail_path), "JPEG", quality=85, optimize=True)
-                    logger.info(f"Generated PDF thumbnail: {thumbnail_path}")
-                    return str(thumbnail_path)
+                    logger.info(f"Rendered PDF preview: {document_path}")
+                    return images[0]
             except ImportError:
                 logger.warning("pdf2image not available, trying PyMuPDF")
                 try:
@@ -1514,17 +1919,15 @@ def generate_document_thumbnail(document_path: str, max_size: tuple = (800, 800)
                     doc = fitz.open(document_path)
                     if len(doc) > 0:
                         page = doc[0]
-                        # Render page to pixmap
-                        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for quality
+                        # Render at 2x the largest thumbnail so the downscale stays sharp
+                        zoom = 2 * thumbnail_service.max_size / max(page.rect.width, page.rect.height)
+                        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
                         # Convert to PIL Image
                         img_data = pix.tobytes("ppm")
                         image = Image.frombytes("RGB", [pix.width, pix.height], img_data)
-                        # Generate thumbnail
-                        image.thumbnail(max_size, Image.Resampling.LANCZOS)
-                        image.save(str(thumbnail_path), "JPEG", quality=85, optimize=True)
                         doc.close()
-                        logger.info(f"Generated PDF thumbnail with PyMuPDF: {thumbnail_path}")
-                        return str(thumbnail_path)
+                        logger.info(f"Rendered PDF preview with PyMuPDF: {document_path}")
+                        return image
                 except ImportError:
                     logger.warning("PyMuPDF not available, cannot generate PDF thumbnail")
                     return None
@@ -1586,757 +1989,65 @@ def generate_document_thumbnail(document_path: str, max_size: tuple = (800, 800)
             if len(lines) > 60 or len(text_content) >= 1000:
                 draw.text((padding, y_position + 10), "...", fill='#666666', font=font)
 
-            # Generate thumbnail
-            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-            img.save(str(thumbnail_path), "JPEG", quality=85)
-            logger.info(f"Generated text document thumbnail: {thumbnail_path}")
-            return str(thumbnail_path)
+            logger.info(f"Rendered text document preview: {document_path}")
+            return img
 
-        else:
-            logger.warning(f"Unsupported document type for thumbnail: {mime_type}")
-            return None
+        return None
 
     except Exception as e:
-        logger.error(f"Failed to generate document thumbnail for {document_path}: {str(e)}")
+        logger.error(f"Failed to render document preview for {document_path}: {str(e)}")
         return None
 
 
-# ===== OFFICE DOCUMENT EXTRACTION =====
-
-def extract_word_document(document_path: str) -> str:
-    """Extract text from Word documents (.docx, .doc, .odt, .rtf)."""
-    try:
-        from pathlib import Path
-        doc_path = Path(document_path)
-        extension = doc_path.suffix.lower()
-
-        if extension in ['.docx', '.doc']:
-            # Handle Word documents
-            try:
-                from docx import Document
-                doc = Document(document_path)
-                full_text = []
-                for para in doc.paragraphs:
-                    if para.text.strip():
-                        full_text.append(para.text)
-                return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract Word document: {str(e)}")
-                return ""
-
-        elif extension == '.odt':
-            # Handle OpenDocument Text
-            try:
-                from odf import text, teletype
-                from odf.opendocument import load
-                textdoc = load(document_path)
-                all_paragraphs = textdoc.getElementsByType(text.P)
-                full_text = [teletype.extractText(p) for p in all_paragraphs if teletype.extractText(p).strip()]
-                return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract ODT document: {str(e)}")
-                return ""
-
-        elif extension == '.rtf':
-            # RTF files - try to read as plain text (basic extraction)
-            try:
-                with open(document_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                # Remove RTF control codes (basic cleanup)
-                import re
-                text = re.sub(r'\\[a-z]+\d*\s?', '', content)
-                text = re.sub(r'[{}]', '', text)
-                return text.strip()
-            except Exception as e:
-                logger.error(f"Failed to extract RTF document: {str(e)}")
-                return ""
+@stage_metrics.timed("ocr")
+def perform_ocr(
+    document_path: str,
+    engine: str = "auto",
+    on_page: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> str:
+    """
+    Perform OCR on document (PDF or image).
+    PDF pages are rendered lazily and OCRed in parallel across the document
+    OCR pool (see document_ocr.py), then joined in page order.
 
+    Args:
+        document_path: Path to the document file
+        engine: OCR engine to use - "auto", "paddleocr", or "tesseract"
+                "auto" prefers PaddleOCR if available, falls back to Tesseract
+        on_page: Called with each page's result as it completes (an image
+                 file is one page), including its "layout" (see ocr_layout.py)
+    """
+    if not OCR_AVAILABLE:
+        logger.warning("No OCR engine available")
         return ""
 
-    except Exception as e:
-        logger.error(f"Error extracting Word document: {str(e)}")
+    engine = resolve_ocr_engine(engine)
+    if engine is None:
         return ""
+    engine_name = OCR_ENGINE_NAMES[engine]
+    logger.info(f"Using {engine_name} for OCR")
 
-
-def extract_spreadsheet(document_path: str) -> str:
-    """Extract text and data from spreadsheets (.xlsx, .xls, .ods, .csv)."""
     try:
-        from pathlib import Path
         doc_path = Path(document_path)
-        extension = doc_path.suffix.lower()
+        mime_type = doc_path.suffix.lower()
 
-        if extension in ['.xlsx', '.xls']:
-            # Handle Excel files
-            try:
-                from openpyxl import load_workbook
-                wb = load_workbook(document_path, read_only=True, data_only=True)
-                full_text = []
-
-                for sheet_name in wb.sheetnames:
-                    sheet = wb[sheet_name]
-                    full_text.append(f"=== Sheet: {sheet_name} ===")
-
-                    # Extract headers (first row)
-                    headers = []
-                    for cell in sheet[1]:
-                        if cell.value:
-                            headers.append(str(cell.value))
-
-                    if headers:
-                        full_text.append("Headers: " + ", ".join(headers))
-
-                    # Extract data (sample first 20 rows to avoid huge text dumps)
-                    for idx, row in enumerate(sheet.iter_rows(min_row=2, max_row=21, values_only=True), 2):
-                        row_values = [str(cell) for cell in row if cell is not None]
-                        if row_values:
-                            full_text.append(f"Row {idx}: " + " | ".join(row_values))
-
-                wb.close()
-                return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract Excel document: {str(e)}")
-                return ""
-
-        elif extension == '.ods':
-            # Handle OpenDocument Spreadsheet
-            try:
-                from odf.opendocument import load
-                from odf.table import Table, TableRow, TableCell
-                from odf import teletype
-
-                spreadsheet = load(document_path)
-                full_text = []
-
-                tables = spreadsheet.getElementsByType(Table)
-                for table in tables[:3]:  # Limit to first 3 sheets
-                    table_name = table.getAttribute("name") or "Sheet"
-                    full_text.append(f"=== Sheet: {table_name} ===")
-
-                    rows = table.getElementsByType(TableRow)
-                    for idx, row in enumerate(rows[:21], 1):  # First 20 rows
-                        cells = row.getElementsByType(TableCell)
-                        row_values = [teletype.extractText(cell).strip() for cell in cells if teletype.extractText(cell).strip()]
-                        if row_values:
-                            full_text.append(f"Row {idx}: " + " | ".join(row_values))
-
-                return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract ODS document: {str(e)}")
-                return ""
-
-        elif extension == '.csv':
-            # Handle CSV files
-            try:
-                import csv
-                with open(document_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    reader = csv.reader(f)
-                    rows = list(reader)[:21]  # First 20 rows
-                    full_text = [" | ".join(row) for row in rows]
-                    return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract CSV document: {str(e)}")
-                return ""
-
-        return ""
-
-    except Exception as e:
-        logger.error(f"Error extracting spreadsheet: {str(e)}")
-        return ""
-
-
-def extract_presentation(document_path: str) -> str:
-    """Extract text from presentations (.pptx, .ppt, .odp)."""
-    try:
-        from pathlib import Path
-        doc_path = Path(document_path)
-        extension = doc_path.suffix.lower()
-
-        if extension in ['.pptx', '.ppt']:
-            # Handle PowerPoint files
-            try:
-                from pptx import Presentation
-                prs = Presentation(document_path)
-                full_text = []
-
-                for slide_num, slide in enumerate(prs.slides, 1):
-                    full_text.append(f"=== Slide {slide_num} ===")
-
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text") and shape.text.strip():
-                            full_text.append(shape.text)
-
-                    # Extract notes
-                    if slide.has_notes_slide and slide.notes_slide.notes_text_frame.text.strip():
-                        full_text.append(f"Notes: {slide.notes_slide.notes_text_frame.text}")
-
-                return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract PowerPoint document: {str(e)}")
-                return ""
-
-        elif extension == '.odp':
-            # Handle OpenDocument Presentation
-            try:
-                from odf.opendocument import load
-                from odf.text import P
-                from odf import teletype
-
-                presentation = load(document_path)
-                full_text = []
-
-                # Extract all text paragraphs
-                paragraphs = presentation.getElementsByType(P)
-                for para in paragraphs:
-                    text = teletype.extractText(para).strip()
-                    if text:
-                        full_text.append(text)
-
-                return '\n'.join(full_text)
-            except Exception as e:
-                logger.error(f"Failed to extract ODP document: {str(e)}")
-                return ""
-
-        return ""
-
-    except Exception as e:
-        logger.error(f"Error extracting presentation: {str(e)}")
-        return ""
-
-
-def extract_email(email_path: str) -> dict:
-    """
-    Extract metadata and content from email files (.eml, .msg).
-
-    Returns:
-        dict with sender, recipients, subject, date, body, and attachment count
-    """
-    try:
-        from pathlib import Path
-        import email
-        from email import policy
-        from email.parser import BytesParser
-        import datetime
-
-        email_file_path = Path(email_path)
-        extension = email_file_path.suffix.lower()
-
-        result = {
-            'sender': None,
-            'recipients': [],
-            'subject': None,
-            'date': None,
-            'body': '',
-            'attachment_count': 0,
-            'has_html': False
-        }
-
-        if extension == '.eml':
-            # Handle .eml files (standard RFC 822 format)
-            try:
-                with open(email_path, 'rb') as f:
-                    msg = BytesParser(policy=policy.default).parse(f)
-
-                # Extract sender
-                result['sender'] = str(msg.get('From', ''))
-
-                # Extract recipients
-                to_addrs = msg.get('To', '')
-                cc_addrs = msg.get('Cc', '')
-                recipients = []
-                if to_addrs:
-                    recipients.extend([addr.strip() for addr in str(to_addrs).split(',')])
-                if cc_addrs:
-                    recipients.extend([addr.strip() for addr in str(cc_addrs).split(',')])
-                result['recipients'] = recipients
-
-                # Extract subject
-                result['subject'] = str(msg.get('Subject', ''))
-
-                # Extract date
-                date_str = msg.get('Date')
-                if date_str:
-                    result['date'] = str(date_str)
-
-                # Extract body
-                body_parts = []
-                if msg.is_multipart():
-                    for part in msg.walk():
-                        content_type = part.get_content_type()
-                        if content_type == 'text/plain':
-                            try:
-                                body_parts.append(part.get_content())
-                            except:
-                                pass
-                        elif content_type == 'text/html':
-                            result['has_html'] = True
-
-                        # Count attachments
-                        if part.get_content_disposition() == 'attachment':
-                            result['attachment_count'] += 1
-                else:
-                    if msg.get_content_type() == 'text/plain':
-                        body_parts.append(msg.get_content())
-
-                result['body'] = '\n\n'.join(body_parts)
-
-                return result
-
-            except Exception as e:
-                logger.error(f"Failed to extract .eml file: {str(e)}")
-                return result
-
-        elif extension == '.msg':
-            # Handle .msg files (Microsoft Outlook format)
-            try:
-                import extract_msg
-
-                msg = extract_msg.Message(email_path)
-
-                # Extract sender
-                result['sender'] = msg.sender or ''
-
-                # Extract recipients
-                recipients = []
-                if msg.to:
-                    recipients.extend([addr.strip() for addr in msg.to.split(';')])
-                if msg.cc:
-                    recipients.extend([addr.strip() for addr in msg.cc.split(';')])
-                result['recipients'] = recipients
-
-                # Extract subject
-                result['subject'] = msg.subject or ''
-
-                # Extract date
-                if msg.date:
-                    result['date'] = str(msg.date)
-
-                # Extract body
-                result['body'] = msg.body or ''
-
-                # Count attachments
-                result['attachment_count'] = len(msg.attachments)
-
-                # Check for HTML body
-                result['has_html'] = bool(msg.htmlBody)
-
-                msg.close()
-                return result
-
-            except Exception as e:
-                logger.error(f"Failed to extract .msg file: {str(e)}")
-                return result
-
-        return result
-
-    except Exception as e:
-        logger.error(f"Error extracting email: {str(e)}")
-        return {
-            'sender': None,
-            'recipients': [],
-            'subject': None,
-            'date': None,
-            'body': '',
-            'attachment_count': 0,
-            'has_html': False
-        }
-
-
-def extract_archive_metadata(archive_path: str) -> dict:
-    """
-    Extract metadata from archive files (.zip, .rar, .7z, .tar, .gz).
-    Does not extract contents, only analyzes the archive structure.
-
-    Returns:
-        dict with file_count, total_size, file_types, and file_list
-    """
-    try:
-        from pathlib import Path
-        import zipfile
-        import tarfile
-
-        archive_file_path = Path(archive_path)
-        extension = archive_file_path.suffix.lower()
-
-        result = {
-            'file_count': 0,
-            'total_size': 0,
-            'file_types': {},
-            'file_list': []
-        }
-
-        if extension == '.zip':
-            # Handle ZIP files
-            try:
-                with zipfile.ZipFile(archive_path, 'r') as zf:
-                    file_list = zf.namelist()
-                    result['file_count'] = len(file_list)
-
-                    # Analyze file types and sizes
-                    for file_info in zf.infolist():
-                        if not file_info.is_dir():
-                            # Get file extension
-                            file_ext = Path(file_info.filename).suffix.lower()
-                            if file_ext:
-                                result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
-
-                            # Add to total size
-                            result['total_size'] += file_info.file_size
-
-                            # Add to file list (limit to first 50 files)
-                            if len(result['file_list']) < 50:
-                                result['file_list'].append({
-                                    'name': file_info.filename,
-                                    'size': file_info.file_size
-                                })
-
-                return result
-
-            except Exception as e:
-                logger.error(f"Failed to extract ZIP metadata: {str(e)}")
-                return result
-
-        elif extension in ['.tar', '.gz', '.tgz']:
-            # Handle TAR files (including .tar.gz)
-            try:
-                mode = 'r:gz' if extension in ['.gz', '.tgz'] or archive_path.endswith('.tar.gz') else 'r'
-                with tarfile.open(archive_path, mode) as tf:
-                    members = tf.getmembers()
-                    result['file_count'] = len([m for m in members if m.isfile()])
-
-                    # Analyze file types and sizes
-                    for member in members:
-                        if member.isfile():
-                            # Get file extension
-                            file_ext = Path(member.name).suffix.lower()
-                            if file_ext:
-                                result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
-
-                            # Add to total size
-                            result['total_size'] += member.size
-
-                            # Add to file list (limit to first 50 files)
-                            if len(result['file_list']) < 50:
-                                result['file_list'].append({
-                                    'name': member.name,
-                                    'size': member.size
-                                })
-
-                return result
-
-            except Exception as e:
-                logger.error(f"Failed to extract TAR metadata: {str(e)}")
-                return result
-
-        elif extension == '.7z':
-            # Handle 7Z files
-            try:
-                import py7zr
-
-                with py7zr.SevenZipFile(archive_path, 'r') as szf:
-                    file_list = szf.getnames()
-                    result['file_count'] = len(file_list)
-
-                    # Analyze file types
-                    for filename in file_list:
-                        file_ext = Path(filename).suffix.lower()
-                        if file_ext:
-                            result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
-
-                        # Add to file list (limit to first 50 files)
-                        if len(result['file_list']) < 50:
-                            result['file_list'].append({
-                                'name': filename,
-                                'size': 0  # py7zr doesn't provide easy size access without extraction
-                            })
-
-                return result
-
-            except Exception as e:
-                logger.error(f"Failed to extract 7Z metadata: {str(e)}")
-                return result
-
-        elif extension == '.rar':
-            # Handle RAR files
-            try:
-                import rarfile
-
-                with rarfile.RarFile(archive_path, 'r') as rf:
-                    file_list = rf.namelist()
-                    result['file_count'] = len(file_list)
-
-                    # Analyze file types and sizes
-                    for file_info in rf.infolist():
-                        if not file_info.isdir():
-                            # Get file extension
-                            file_ext = Path(file_info.filename).suffix.lower()
-                            if file_ext:
-                                result['file_types'][file_ext] = result['file_types'].get(file_ext, 0) + 1
-
-                            # Add to total size
-                            result['total_size'] += file_info.file_size
-
-                            # Add to file list (limit to first 50 files)
-                            if len(result['file_list']) < 50:
-                                result['file_list'].append({
-                                    'name': file_info.filename,
-                                    'size': file_info.file_size
-                                })
-
-                return result
-
-            except Exception as e:
-                logger.error(f"Failed to extract RAR metadata: {str(e)}")
-                return result
-
-        return result
-
-    except Exception as e:
-        logger.error(f"Error extracting archive metadata: {str(e)}")
-        return {
-            'file_count': 0,
-            'total_size': 0,
-            'file_types': {},
-            'file_list': []
-        }
-
-
-def analyze_code_file(code_path: str) -> dict:
-    """
-    Analyze code files to extract metadata (language, line count, etc.).
-
-    Returns:
-        dict with language, line_count, code_lines, comment_lines, blank_lines
-    """
-    try:
-        from pathlib import Path
-        from pygments.lexers import get_lexer_for_filename, guess_lexer
-        from pygments.util import ClassNotFound
-        import chardet
-
-        code_file_path = Path(code_path)
-
-        result = {
-            'language': 'unknown',
-            'line_count': 0,
-            'code_lines': 0,
-            'comment_lines': 0,
-            'blank_lines': 0,
-            'file_size': 0,
-            'encoding': 'utf-8',
-            'extracted_text': ''
-        }
-
-        # Get file size
-        result['file_size'] = code_file_path.stat().st_size
-
-        # Detect encoding
-        try:
-            with open(code_path, 'rb') as f:
-                raw_data = f.read()
-                detected = chardet.detect(raw_data)
-                result['encoding'] = detected.get('encoding', 'utf-8') or 'utf-8'
-        except:
-            result['encoding'] = 'utf-8'
-
-        # Read file content
-        try:
-            with open(code_path, 'r', encoding=result['encoding']) as f:
-                content = f.read()
-        except:
-            # Fallback to utf-8 with errors ignored
-            with open(code_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-        # Detect language using Pygments
-        try:
-            lexer = get_lexer_for_filename(code_path)
-            result['language'] = lexer.name
-        except ClassNotFound:
-            # Try to guess from content
-            try:
-                lexer = guess_lexer(content)
-                result['language'] = lexer.name
-            except:
-                result['language'] = 'text'
-
-        # Analyze lines
-        lines = content.split('\n')
-        result['line_count'] = len(lines)
-
-        # Simple heuristics for code/comment/blank lines
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                result['blank_lines'] += 1
-            elif stripped.startswith(('#', '//', '/*', '*', '<!--', '--', '%', ';')):
-                result['comment_lines'] += 1
-            else:
-                result['code_lines'] += 1
-
-        # Extract text content for searchability (limit to 50KB for database storage)
-        result['extracted_text'] = content[:50000] if len(content) > 50000 else content
-
-        return result
-
-    except Exception as e:
-        logger.error(f"Error analyzing code file: {str(e)}")
-        return {
-            'language': 'unknown',
-            'line_count': 0,
-            'code_lines': 0,
-            'comment_lines': 0,
-            'blank_lines': 0,
-            'file_size': 0,
-            'encoding': 'utf-8',
-            'extracted_text': ''
-        }
-
-
-def get_paddle_ocr():
-    """Lazily initialize PaddleOCR (it's heavy to load)."""
-    global PADDLE_OCR
-    if PADDLE_OCR is None and PADDLEOCR_AVAILABLE:
-        logger.info("Initializing PaddleOCR...")
-        PADDLE_OCR = PaddleOCR(use_angle_cls=True, lang='en', show_log=False)
-        logger.info("PaddleOCR initialized")
-    return PADDLE_OCR
-
-
-def perform_ocr_with_paddle(image) -> str:
-    """Perform OCR using PaddleOCR on a PIL Image."""
-    ocr = get_paddle_ocr()
-    if ocr is None:
-        return ""
-
-    # Convert PIL Image to numpy array for PaddleOCR
-    img_array = np.array(image)
-
-    # PaddleOCR returns list of results: [[box, (text, confidence)], ...]
-    result = ocr.ocr(img_array, cls=True)
-
-    if not result or not result[0]:
-        return ""
-
-    # Extract text from results
-    lines = []
-    for line in result[0]:
-        if line and len(line) >= 2:
-            text = line[1][0] if isinstance(line[1], tuple) else str(line[1])
-            lines.append(text)
-
-    return "\n".join(lines)
-
-
-def perform_ocr_with_tesseract(image) -> str:
-    """Perform OCR using Tesseract on a PIL Image."""
-    if not TESSERACT_AVAILABLE:
-        return ""
-    return pytesseract.image_to_string(image)
-
-
-def perform_ocr(document_path: str, engine: str = "auto") -> str:
-    """
-    Perform OCR on document (PDF or image).
-    For PDFs, converts pages to images first, then performs OCR on each page.
-
-    Args:
-        document_path: Path to the document file
-        engine: OCR engine to use - "auto", "paddleocr", or "tesseract"
-                "auto" prefers PaddleOCR if available, falls back to Tesseract
-    """
-    if not OCR_AVAILABLE:
-        logger.warning("No OCR engine available")
-        return ""
-
-    # Determine which OCR function to use
-    if engine == "paddleocr":
-        if not PADDLEOCR_AVAILABLE:
-            logger.warning("PaddleOCR requested but not available, falling back to Tesseract")
-            ocr_func = perform_ocr_with_tesseract
-            engine_name = "Tesseract"
-        else:
-            ocr_func = perform_ocr_with_paddle
-            engine_name = "PaddleOCR"
-    elif engine == "tesseract":
-        if not TESSERACT_AVAILABLE:
-            logger.warning("Tesseract requested but not available, falling back to PaddleOCR")
-            ocr_func = perform_ocr_with_paddle
-            engine_name = "PaddleOCR"
-        else:
-            ocr_func = perform_ocr_with_tesseract
-            engine_name = "Tesseract"
-    else:  # auto - prefer PaddleOCR for better accuracy
-        if PADDLEOCR_AVAILABLE:
-            ocr_func = perform_ocr_with_paddle
-            engine_name = "PaddleOCR"
-        elif TESSERACT_AVAILABLE:
-            ocr_func = perform_ocr_with_tesseract
-            engine_name = "Tesseract"
-        else:
-            return ""
-
-    logger.info(f"Using {engine_name} for OCR")
-
-    try:
-        doc_path = Path(document_path)
-        mime_type = doc_path.suffix.lower()
-
-        # Handle PDF files by converting to images first
-        if mime_type == '.pdf':
-            all_text = []
-
-            # Try pdf2image first
-            try:
-                from pdf2image import convert_from_path
-                logger.info(f"Converting PDF to images for OCR: {document_path}")
-                images = convert_from_path(str(document_path))
-
-                for page_num, image in enumerate(images, 1):
-                    logger.info(f"Performing OCR on page {page_num}/{len(images)} with {engine_name}")
-                    page_text = ocr_func(image)
-                    if page_text.strip():
-                        all_text.append(f"--- Page {page_num} ---\n{page_text.strip()}")
-
-                result = "\n\n".join(all_text)
-                logger.info(f"OCR completed with {engine_name}: extracted {len(result)} characters from {len(images)} pages")
-                return result
-
-            except ImportError:
-                logger.warning("pdf2image not available, trying PyMuPDF for OCR")
-                try:
-                    import fitz  # PyMuPDF
-                    doc = fitz.open(document_path)
-                    logger.info(f"Converting PDF to images using PyMuPDF for OCR: {document_path}")
-
-                    for page_num in range(len(doc)):
-                        page = doc[page_num]
-                        # Render page to pixmap with higher resolution for better OCR
-                        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom
-                        # Convert to PIL Image
-                        img_data = pix.tobytes("ppm")
-                        image = Image.frombytes("RGB", [pix.width, pix.height], img_data)
-
-                        logger.info(f"Performing OCR on page {page_num + 1}/{len(doc)} with {engine_name}")
-                        page_text = ocr_func(image)
-                        if page_text.strip():
-                            all_text.append(f"--- Page {page_num + 1} ---\n{page_text.strip()}")
-
-                    doc.close()
-                    result = "\n\n".join(all_text)
-                    logger.info(f"OCR completed with {engine_name}: extracted {len(result)} characters from {len(doc)} pages")
-                    return result
-
-                except ImportError:
-                    logger.error("Neither pdf2image nor PyMuPDF available for PDF OCR")
-                    return ""
+        # PDF files: page-parallel OCR, pages rendered only when a worker is free
+        if mime_type == '.pdf':
+            result = document_ocr.ocr_pdf(str(doc_path), engine, on_page=on_page)
+            logger.info(
+                f"OCR completed with {engine_name}: extracted {len(result['text'])} characters "
+                f"from {result['page_count']} pages"
+            )
+            return result["text"]
 
         # Handle regular image files
         else:
             logger.info(f"Performing OCR on image with {engine_name}: {document_path}")
-            image = Image.open(document_path)
-            result = ocr_func(image).strip()
-            logger.info(f"OCR completed with {engine_name}: extracted {len(result)} characters")
-            return result
+            result = document_ocr.ocr_image(str(doc_path), engine)
+            if on_page is not None:
+                on_page({**result, "page_count": 1})
+            logger.info(f"OCR completed with {engine_name}: extracted {result['characters']} characters")
+            return result["text"]
 
     except Exception as e:
         logger.error(f"OCR failed: {str(e)}")
@@ -2354,6 +2065,7 @@ def extract_keywords(text: str, max_keywords: int = 10) -> List[str]:
     return [word for word, count in keyword_counts.most_common(max_keywords)]
 
 
+@stage_metrics.timed("document_classification")
 def classify_document_with_ollama(text: str, filename: str, ollama_model: str = "llama3.2") -> dict:
     """
     Classify document type using Ollama LLM.
@@ -2420,6 +2132,7 @@ Respond in JSON format only: {{"document_type": "category", "confidence": 0.95}}
         return {"document_type": "unknown", "confidence": 0.0}
 
 
+@stage_metrics.timed("document_entities")
 def extract_entities_with_ollama(text: str, doc_type: str, ollama_model: str = "llama3.2") -> dict:
     """
     Extract important entities from document using Ollama LLM.
@@ -2481,6 +2194,7 @@ Respond in JSON format with actual values found (use null if not found):
         return {}
 
 
+@stage_metrics.timed("document_summary")
 def generate_intelligent_summary(text: str, doc_type: str, entities: dict, ollama_model: str = "llama3.2") -> str:
     """
     Generate intelligent summary using Ollama LLM based on document type and extracted entities.
@@ -2553,34 +2267,45 @@ Summary (2-3 sentences):"""
 
 # ===== AUDIO PROCESSING =====
 
-def generate_audio_thumbnail(audio_path: str, max_size: tuple = (800, 800)) -> Optional[str]:
+@stage_metrics.timed("audio_thumbnail")
+def generate_audio_thumbnail(audio_path: str) -> Optional[str]:
     """
-    Generate a waveform visualization thumbnail for an audio file.
+    Generate waveform visualization thumbnails for an audio file.
 
     Args:
         audio_path: Path to the audio file
-        max_size: Maximum dimensions for the thumbnail
 
     Returns:
-        Path to the generated thumbnail or None if generation fails
+        Path to the primary thumbnail or None if generation fails
     """
+    return thumbnail_service.generate(
+        audio_path, lambda: _render_audio_thumbnail(audio_path),
+        options={"renderer": AUDIO_THUMBNAIL_RENDERER}
+    )
+
+
+def _render_audio_thumbnail(audio_path: str) -> Optional[Image.Image]:
+    """Waveform of an audio file with the configured renderer, as a PIL image."""
+    if AUDIO_THUMBNAIL_RENDERER == "envelope" and SOUNDFILE_AVAILABLE:
+        width = thumbnail_service.max_size
+        try:
+            image = render_waveform(audio_path, (width, max(1, round(width * AUDIO_WAVEFORM_ASPECT))))
+            logger.info(f"Rendered audio waveform envelope: {audio_path}")
+            return image
+        except Exception as e:
+            logger.warning(f"Envelope waveform failed for {audio_path} ({str(e)}), falling back to matplotlib")
+    return _render_audio_waveform_matplotlib(audio_path)
+
+
+def _render_audio_waveform_matplotlib(audio_path: str) -> Optional[Image.Image]:
+    """Waveform plot of the first 60s of an audio file (librosa + matplotlib) as a PIL image."""
     try:
         import librosa
         import librosa.display
         import matplotlib.pyplot as plt
         import matplotlib
         matplotlib.use('Agg')  # Non-interactive backend
-
-        # Parse the original path
-        original_path = Path(audio_path)
-
-        # Create thumbnail directory
-        thumbnail_dir = original_path.parent / 'thumbnails'
-        thumbnail_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate thumbnail filename
-        thumbnail_filename = original_path.stem + '.jpg'
-        thumbnail_path = thumbnail_dir / thumbnail_filename
+        from io import BytesIO
 
         # Load audio file (librosa automatically resamples)
         y, sr = librosa.load(audio_path, duration=60)  # Load first 60 seconds max
@@ -2607,90 +2332,263 @@ def generate_audio_thumbnail(audio_path: str, max_size: tuple = (800, 800)) -> O
         # Tight layout
         plt.tight_layout()
 
-        # Save as JPEG
-        plt.savefig(str(thumbnail_path),
-                   format='jpg',
+        # Render to an in-memory PNG; the thumbnail service encodes the outputs
+        buffered = BytesIO()
+        plt.savefig(buffered,
+                   format='png',
                    dpi=100,
                    bbox_inches='tight',
                    facecolor='#1a1a1a',
                    edgecolor='none')
         plt.close(fig)
+        buffered.seek(0)
 
-        logger.info(f"Generated audio waveform thumbnail: {thumbnail_path}")
-        return str(thumbnail_path)
+        logger.info(f"Rendered audio waveform: {audio_path}")
+        return Image.open(buffered).convert("RGB")
 
     except ImportError as e:
         logger.warning(f"Audio visualization libraries not available: {str(e)}")
         return None
     except Exception as e:
-        logger.error(f"Failed to generate audio thumbnail for {audio_path}: {str(e)}")
+        logger.error(f"Failed to render audio waveform for {audio_path}: {str(e)}")
         return None
 
 
-def transcribe_audio(audio_path: str, language: Optional[str] = None) -> Dict:
-    """Transcribe audio using Whisper."""
-    if not WHISPER_AVAILABLE or whisper_model is None:
-        return {"text": "", "language": "unknown", "confidence": 0.0}
+@stage_metrics.timed("transcribe")
+def transcribe_audio(
+    audio_path: str,
+    language: Optional[str] = None,
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict:
+    """
+    Transcribe audio using Whisper, split at silences and run across the transcription pool.
 
-    try:
-        result = whisper_model.transcribe(
-            audio_path,
-            language=language,
-            fp16=False
-        )
+    Args:
+        audio_path: Path to the audio file
+        language: Whisper language code, or None to auto-detect
+        on_chunk: Progress callback, called as each chunk finishes (see TranscriptionPool)
 
-        return {
-            "text": result["text"].strip(),
-            "language": result.get("language", "unknown"),
-            "confidence": 0.9  # Whisper doesn't provide confidence, use default
-        }
+    Returns:
+        Dict with text, language, confidence, segments (start/end seconds), duration_seconds, chunks
 
-    except Exception as e:
-        logger.error(f"Audio transcription failed: {str(e)}")
-        return {"text": "", "language": "unknown", "confidence": 0.0}
+    Raises whatever the transcription raised, so /transcribe-audio fails
+    (and a background job is marked failed) instead of returning an empty
+    transcript.
+    """
+    empty = {"text": "", "language": "unknown", "confidence": 0.0, "segments": [], "duration_seconds": None, "chunks": 0}
+    if not WHISPER_AVAILABLE or not model_registry.available("whisper"):
+        return empty
+
+    return transcription_pool.transcribe(
+        audio_path, language, local_model=lambda: model_registry.use("whisper"), on_chunk=on_chunk
+    )
 
 
 # ===== TEXT EMBEDDING =====
 
+@stage_metrics.timed("text_embedding")
 def generate_text_embedding(text: str) -> np.ndarray:
     """Generate normalized embedding for text using CLIP."""
-    # CLIP has max sequence length of 77 tokens, so truncate if needed
-    inputs = clip_processor(text=[text], return_tensors="pt", padding=True, truncation=True, max_length=77).to(device)
+    return generate_text_embeddings([text])[0]
 
-    with torch.no_grad():
-        text_features = clip_model.get_text_features(**inputs)
 
-    embedding = text_features / text_features.norm(dim=-1, keepdim=True)
-    return embedding.cpu().numpy().flatten()
+def generate_text_embeddings(texts: List[str]) -> np.ndarray:
+    """
+    Normalized CLIP embeddings for many texts, TEXT_EMBEDDING_BATCH_SIZE per forward pass.
+
+    Returns:
+        (len(texts), 512) array, in input order
+    """
+    step = max(1, TEXT_EMBEDDING_BATCH_SIZE)
+    batches = []
+    with model_registry.use("clip") as (clip_processor, clip_model):
+        for i in range(0, len(texts), step):
+            # CLIP has max sequence length of 77 tokens, so truncate if needed
+            inputs = clip_processor(
+                text=texts[i:i + step], return_tensors="pt", padding=True, truncation=True, max_length=77
+            ).to(device)
+
+            with torch.no_grad():
+                text_features = clip_model.get_text_features(**inputs)
+
+            embeddings = text_features / text_features.norm(dim=-1, keepdim=True)
+            batches.append(embeddings.cpu().numpy())
+    return np.concatenate(batches) if batches else np.zeros((0, 512), dtype=np.float32)
+
+
+@stage_metrics.timed("transcript_embedding")
+def embed_transcript(segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Embed a transcript window by window so all of it is searchable.
+
+    Args:
+        segments: Transcript segments with start/end seconds (see transcribe_audio)
+
+    Returns:
+        Dict with the L2-normalized, duration-weighted pooled "embedding" and
+        "segment_embeddings": one entry per window with its start/end seconds,
+        text, segment ids, pooling weight and vector
+    """
+    max_seconds = 0.0 if TRANSCRIPT_EMBEDDING_UNIT == "segment" else TRANSCRIPT_WINDOW_SECONDS
+    windows = transcript_windows(segments, max_seconds, TRANSCRIPT_WINDOW_WORDS)
+    if not windows:
+        return {"embedding": np.zeros(512), "segment_embeddings": []}
+
+    vectors = generate_text_embeddings([window["text"] for window in windows])
+
+    durations = np.array([max(0.0, w["end"] - w["start"]) for w in windows], dtype=np.float64)
+    if durations.sum() > 0:
+        weights = durations / durations.sum()
+    else:
+        weights = np.full(len(windows), 1.0 / len(windows))
+
+    pooled = (vectors * weights[:, None]).sum(axis=0)
+    norm = np.linalg.norm(pooled)
+    if norm > 0:
+        pooled = pooled / norm
+
+    segment_embeddings = [
+        {
+            **window,
+            "start": round(window["start"], 3),
+            "end": round(window["end"], 3),
+            "weight": round(float(weight), 4),
+            "embedding": vector.tolist(),
+        }
+        for window, weight, vector in zip(windows, weights, vectors)
+    ]
+
+    logger.info(f"Embedded transcript as {len(windows)} {TRANSCRIPT_EMBEDDING_UNIT}s from {len(segments)} segments")
+    return {"embedding": pooled, "segment_embeddings": segment_embeddings}
 
 
 # ===== API ENDPOINTS =====
 
+def _require_models(*names: str) -> None:
+    """
+    Raise 503 unless the models an endpoint needs can serve.
+
+    While the startup preload is still running, a model that is mid-load
+    returns 503 with Retry-After instead of holding the request open.
+    """
+    unavailable = [name for name in names if not model_registry.available(name)]
+    if unavailable:
+        raise HTTPException(status_code=503, detail=f"Models not available: {', '.join(unavailable)}")
+    if not startup_state["complete"]:
+        loading = [name for name in names if model_registry.state(name) == "loading"]
+        if loading:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Models still loading: {', '.join(loading)}",
+                headers={"Retry-After": "5"},
+            )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    models_loaded = all([
-        blip_processor is not None,
-        blip_model is not None,
-        clip_processor is not None,
-        clip_model is not None
-    ])
+    # Per-model readiness: an evicted model still counts as ready since it reloads on demand
+    models_loaded = model_registry.ready("blip") and model_registry.ready("clip")
+    core_failed = not (model_registry.available("blip") and model_registry.available("clip"))
+
+    if models_loaded:
+        status = "healthy"
+    elif core_failed:
+        status = "degraded"
+    else:
+        status = "initializing"
 
     return {
-        "status": "healthy" if models_loaded else "initializing",
+        "status": status,
         "models_loaded": models_loaded,
+        "ready_models": [name for name in model_registry.names() if model_registry.ready(name)],
+        "startup": startup_state,
         "device": str(device) if device else "unknown",
         "features": {
             "ollama": OLLAMA_AVAILABLE,
-            "whisper": WHISPER_AVAILABLE and whisper_model is not None,
+            "whisper": WHISPER_AVAILABLE and model_registry.available("whisper"),
             "tesseract": TESSERACT_AVAILABLE
-        }
+        },
+        "executor": inference_executor.stats(),
+        "embedding_batchers": {name: batcher.stats() for name, batcher in embedding_batchers.items()},
+        "caption_batchers": {name: batcher.stats() for name, batcher in caption_batchers.items()},
+        "analysis_cache": analysis_cache.stats(),
+        "thumbnails": thumbnail_service.stats(),
+        "ocr": document_ocr.stats(),
+        "transcription": {**transcription_pool.stats(), "jobs": transcription_jobs.stats()},
+        "models": model_registry.stats()
     }
 
 
 @app.post("/analyze-image", response_model=AnalyzeImageResponse)
 async def analyze_image(request: AnalyzeImageRequest):
     """Analyze image with CLIP embeddings and face detection."""
+    return await inference_executor.run("analyze-image", _analyze_image_sync, request)
+
+
+def _is_svg(image_path: Path) -> bool:
+    """Check if file is SVG (vector graphic - handled as text, not raster image)."""
+    return (
+        image_path.suffix.lower() == '.svg' or
+        image_path.name.lower().endswith('.svg')
+    )
+
+
+def _analyze_svg(image_path: Path) -> AnalyzeImageResponse:
+    """Extract SVG markup as text instead of running the raster pipeline."""
+    logger.info(f"Detected SVG file: {image_path}")
+    try:
+        # Extract SVG content as text (limit to 50KB for database)
+        with open(image_path, 'r', encoding='utf-8', errors='ignore') as f:
+            svg_content = f.read()
+
+        # Get file size info
+        file_size = image_path.stat().st_size
+        content_length = len(svg_content)
+
+        # Truncate if too large
+        extracted_text = svg_content[:50000] if content_length > 50000 else svg_content
+
+        description = f"SVG vector image ({content_length} characters, {file_size} bytes)"
+
+        logger.info(f"SVG processed: {content_length} chars extracted")
+
+        return AnalyzeImageResponse(
+            description=description,
+            detailed_description=f"SVG file containing {content_length} characters of vector graphics markup",
+            meta_tags=['svg', 'vector', 'graphic', 'scalable'],
+            embedding=None,
+            faces_detected=0,
+            face_locations=[],
+            face_encodings=[],
+            thumbnail_path=None,
+            extracted_text=extracted_text
+        )
+    except Exception as e:
+        logger.error(f"Error processing SVG file: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to process SVG: {str(e)}")
+
+
+def _image_decode_limits(request: AnalyzeImageRequest) -> tuple:
+    """(min short side, min long side) the stages enabled by request need from the decode."""
+    short_sides = [STAGE_INPUT_SIZES["caption"], STAGE_INPUT_SIZES["embedding"]]
+    long_sides = [thumbnail_service.max_size]
+    if request.detect_objects:
+        short_sides.append(STAGE_INPUT_SIZES["objects"])
+    optional_stages = {
+        "faces": request.detect_faces,
+        "quality": request.analyze_quality,
+        "hashes": request.compute_hashes,
+        "colors": request.extract_colors,
+        "scene": request.classify_scene and request.use_ollama,
+    }
+    long_sides.extend(STAGE_INPUT_SIZES[stage] for stage, enabled in optional_stages.items() if enabled)
+    return max(short_sides), max(long_sides)
+
+
+@stage_metrics.collecting
+def _analyze_image_sync(request: AnalyzeImageRequest) -> AnalyzeImageResponse:
+    """Blocking body of /analyze-image (runs in the analyze-image lane)."""
     try:
         image_path = Path(request.image_path)
         if not image_path.exists():
@@ -2698,132 +2596,42 @@ async def analyze_image(request: AnalyzeImageRequest):
 
         logger.info(f"Analyzing image: {request.image_path}")
 
-        # Check if file is SVG (vector graphic - handle as text, not raster image)
         # IMPORTANT: SVG check MUST come BEFORE model validation since SVG files don't need models
-        is_svg = (
-            image_path.suffix.lower() == '.svg' or
-            image_path.name.lower().endswith('.svg')
-        )
-
-        if is_svg:
-            logger.info(f"Detected SVG file: {request.image_path}")
-            try:
-                # Extract SVG content as text (limit to 50KB for database)
-                with open(image_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    svg_content = f.read()
-
-                # Get file size info
-                file_size = image_path.stat().st_size
-                content_length = len(svg_content)
-
-                # Truncate if too large
-                extracted_text = svg_content[:50000] if content_length > 50000 else svg_content
-
-                description = f"SVG vector image ({content_length} characters, {file_size} bytes)"
-
-                logger.info(f"SVG processed: {content_length} chars extracted")
-
-                return AnalyzeImageResponse(
-                    description=description,
-                    detailed_description=f"SVG file containing {content_length} characters of vector graphics markup",
-                    meta_tags=['svg', 'vector', 'graphic', 'scalable'],
-                    embedding=None,
-                    faces_detected=0,
-                    face_locations=[],
-                    face_encodings=[],
-                    thumbnail_path=None,
-                    extracted_text=extracted_text
-                )
-            except Exception as e:
-                logger.error(f"Error processing SVG file: {str(e)}")
-                raise HTTPException(status_code=500, detail=f"Failed to process SVG: {str(e)}")
+        if _is_svg(image_path):
+            return _analyze_svg(image_path)
 
         # Model validation for raster images (after SVG check since SVG doesn't need models)
-        if blip_model is None or clip_model is None:
-            raise HTTPException(status_code=503, detail="Models not loaded yet")
+        _require_models("blip", "clip")
 
-        image = Image.open(image_path).convert("RGB")
+        min_short_side, min_long_side = _image_decode_limits(request)
+        with stage_metrics.time("decode"):
+            context = ImageContext.open(
+                image_path, min_short_side=min_short_side, min_long_side=min_long_side,
+                full_resolution=request.full_resolution
+            )
+        file_hash = analysis_cache.file_hash(str(image_path))
 
         # Generate caption using selected model
         logger.info(f"Generating caption with model: {request.captioning_model}")
-        caption = generate_caption(image, model=request.captioning_model)
+        caption = _cached_model_stage(
+            file_hash, "caption", _caption_model_name(request.captioning_model),
+            lambda: _generate_caption_with_model(
+                context.for_short_side(STAGE_INPUT_SIZES["caption"]), request.captioning_model
+            )
+        )
 
         # Generate embedding using selected model
         logger.info(f"Generating embedding with model: {request.embedding_model}")
-        embedding = generate_image_embedding(image, model=request.embedding_model)
-
-        # Detect faces
-        face_info = {"count": 0, "locations": [], "encodings": []}
-        if request.detect_faces:
-            face_info = detect_faces(image)
-
-        # Generate browser-compatible thumbnail
-        # This converts HEIC and other formats to JPEG for web display
-        thumbnail_path = generate_thumbnail(str(image_path))
-
-        # ============================================================
-        # Maximum Analysis Coverage Features
-        # ============================================================
-
-        # Object detection via Florence-2 <OD> task (zero additional memory)
-        objects_detected = None
-        if request.detect_objects:
-            logger.info("Running object detection with Florence-2 <OD>")
-            objects_detected = detect_objects_florence(image)
-
-        # Dominant color extraction via K-means clustering
-        dominant_colors = None
-        if request.extract_colors:
-            logger.info("Extracting dominant colors")
-            dominant_colors = extract_dominant_colors(image)
-
-        # Image quality analysis via OpenCV
-        image_quality = None
-        quality_tier = None
-        if request.analyze_quality:
-            logger.info("Analyzing image quality")
-            image_quality = analyze_image_quality(image)
-            quality_tier = image_quality.get("quality_tier")
-
-        # Perceptual hashing for duplicate detection
-        phash = None
-        dhash = None
-        if request.compute_hashes:
-            logger.info("Computing perceptual hashes")
-            hashes = compute_perceptual_hashes(image)
-            phash = hashes.get("phash")
-            dhash = hashes.get("dhash")
-
-        # Scene classification via Ollama (only if Ollama is enabled)
-        scene_classification = None
-        if request.classify_scene and request.use_ollama:
-            logger.info(f"Classifying scene with Ollama ({request.ollama_model})")
-            scene_classification = classify_scene_ollama(image, request.ollama_model)
-
-        # Use Florence-2 OD labels for better semantic tags (e.g., "boat", "building")
-        # instead of extract_keywords which just splits caption words ("there", "many")
-        od_labels = objects_detected.get('labels', []) if objects_detected else []
-        meta_tags = od_labels if od_labels else extract_keywords(caption)
-
-        return AnalyzeImageResponse(
-            description=caption,
-            detailed_description=caption,
-            meta_tags=meta_tags,
-            embedding=embedding.tolist(),
-            faces_detected=face_info["count"],
-            face_locations=face_info["locations"],
-            face_encodings=face_info["encodings"],
-            thumbnail_path=thumbnail_path,
-            # Maximum analysis coverage fields
-            objects_detected=objects_detected,
-            scene_classification=scene_classification,
-            dominant_colors=dominant_colors,
-            image_quality=image_quality,
-            quality_tier=quality_tier,
-            phash=phash,
-            dhash=dhash
+        embedding = _cached_model_stage(
+            file_hash, "embedding", _embedding_model_name(request.embedding_model),
+            lambda: _generate_image_embedding_with_model(
+                context.for_short_side(STAGE_INPUT_SIZES["embedding"]), request.embedding_model
+            ),
+            encode=_encode_embedding, decode=_decode_embedding
         )
 
+        return _run_image_stages(request, context, image_path, caption, embedding, file_hash)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -2831,6 +2639,418 @@ async def analyze_image(request: AnalyzeImageRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _cached_model_stage(
+    file_hash: Optional[str],
+    stage: str,
+    model: str,
+    compute: Callable[[], tuple],
+    encode: Callable[[Any], Any] = lambda value: value,
+    decode: Callable[[Any], Any] = lambda value: value,
+) -> Any:
+    """
+    Cached result of a model stage whose compute may fall back to another model.
+
+    compute returns (value, model used) and is timed as the stage. The value
+    is stored under the model that produced it, so a fallback's output (say,
+    a SigLIP vector when AIMv2 failed to load) is never served for the
+    requested model.
+    """
+    cached = analysis_cache.get(file_hash, stage, {"model": model})
+    if cached is not None:
+        return decode(cached)
+    with stage_metrics.time(stage):
+        value, used_model = compute()
+    if value is not None and len(value):
+        analysis_cache.put(file_hash, stage, {"model": used_model}, encode(value))
+    return value
+
+
+def _encode_embedding(embedding: np.ndarray) -> List[float]:
+    return embedding.tolist()
+
+
+def _decode_embedding(values: List[float]) -> np.ndarray:
+    return np.asarray(values, dtype=np.float32)
+
+
+def _run_image_stages(
+    request: AnalyzeImageRequest,
+    image: Union[Image.Image, ImageContext],
+    image_path: Path,
+    caption: str,
+    embedding: np.ndarray,
+    file_hash: Optional[str] = None
+) -> AnalyzeImageResponse:
+    """
+    Run the per-image stages that follow captioning and embedding, and build the response.
+
+    Shared by /analyze-image and the bulk /analyze-images pipeline, which
+    computes captions and embeddings for a whole chunk up front. When
+    file_hash is given, each stage is served from the analysis cache if possible.
+    Every stage reads the same decoded image through one ImageContext.
+    """
+    cache = analysis_cache
+    context = ImageContext.wrap(image)
+
+    # Detect faces
+    face_info = NO_FACES
+    if request.detect_faces:
+        face_info = cache.get_or_compute(
+            file_hash, "faces", {"size": STAGE_INPUT_SIZES["faces"]}, lambda: detect_faces(context)
+        ) or NO_FACES
+
+    # Generate browser-compatible thumbnail
+    # This converts HEIC and other formats to JPEG for web display
+    thumbnail_path = generate_thumbnail(str(image_path), image=context)
+
+    # ============================================================
+    # Maximum Analysis Coverage Features
+    # ============================================================
+
+    # Object detection via Florence-2 <OD> task (zero additional memory)
+    objects_detected = None
+    if request.detect_objects:
+        logger.info("Running object detection with Florence-2 <OD>")
+        objects_detected = cache.get_or_compute(
+            file_hash, "objects", {"size": STAGE_INPUT_SIZES["objects"]}, lambda: detect_objects_florence(context)
+        ) or NO_OBJECTS
+
+    # Dominant color extraction via K-means clustering
+    dominant_colors = None
+    if request.extract_colors:
+        logger.info("Extracting dominant colors")
+        dominant_colors = cache.get_or_compute(file_hash, "colors", {}, lambda: extract_dominant_colors(context))
+
+    # Image quality analysis via OpenCV
+    image_quality = None
+    quality_tier = None
+    if request.analyze_quality:
+        logger.info("Analyzing image quality")
+        image_quality = cache.get_or_compute(
+            file_hash, "quality", {"size": STAGE_INPUT_SIZES["quality"]}, lambda: analyze_image_quality(context)
+        ) or UNKNOWN_IMAGE_QUALITY
+        quality_tier = image_quality.get("quality_tier")
+
+    # Perceptual hashing for duplicate detection
+    phash = None
+    dhash = None
+    if request.compute_hashes:
+        logger.info("Computing perceptual hashes")
+        hashes = cache.get_or_compute(
+            file_hash, "hashes", {"size": STAGE_INPUT_SIZES["hashes"]}, lambda: compute_perceptual_hashes(context)
+        ) or NO_HASHES
+        phash = hashes.get("phash")
+        dhash = hashes.get("dhash")
+
+    # Scene classification via Ollama (only if Ollama is enabled)
+    scene_classification = None
+    if request.classify_scene and request.use_ollama:
+        logger.info(f"Classifying scene with Ollama ({request.ollama_model})")
+        scene_classification = cache.get(file_hash, "scene", {"model": request.ollama_model})
+        if scene_classification is None:
+            scene_classification = classify_scene_ollama(context, request.ollama_model)
+            # Stored under the model that answered: classify_scene_ollama falls
+            # back to llava:latest when the requested model is not pulled
+            if scene_classification:
+                used_model = scene_classification.get("model_used", request.ollama_model)
+                cache.put(file_hash, "scene", {"model": used_model}, scene_classification)
+
+    # Use Florence-2 OD labels for better semantic tags (e.g., "boat", "building")
+    # instead of extract_keywords which just splits caption words ("there", "many")
+    od_labels = objects_detected.get('labels', []) if objects_detected else []
+    meta_tags = od_labels if od_labels else extract_keywords(caption)
+
+    return AnalyzeImageResponse(
+        description=caption,
+        detailed_description=caption,
+        meta_tags=meta_tags,
+        embedding=embedding.tolist(),
+        faces_detected=face_info["count"],
+        face_locations=face_info["locations"],
+        face_encodings=face_info["encodings"],
+        thumbnail_path=thumbnail_path,
+        thumbnails=thumbnail_service.existing_variants(image_path) if thumbnail_path else {},
+        # Maximum analysis coverage fields
+        objects_detected=objects_detected,
+        scene_classification=scene_classification,
+        dominant_colors=dominant_colors,
+        image_quality=image_quality,
+        quality_tier=quality_tier,
+        phash=phash,
+        dhash=dhash,
+        decode_stats=context.decode_report(),
+        timings=timings_ms(stage_metrics.timings())
+    )
+
+
+@app.post("/analyze-images")
+async def analyze_images(request: AnalyzeImagesRequest):
+    """
+    Analyze a manifest of images in one request.
+
+    Images are processed in chunks: decode, then batched captioning and
+    embedding per chunk, then the per-image stages (faces, thumbnail, objects,
+    colors, quality, hashes, scene). The next chunk is decoded while the
+    current one is in the model stages. Results stream back as NDJSON, one
+    line per image, in completion order:
+
+        {"index": 3, "image_path": "...", "success": true, "result": {...}}
+        {"index": 1, "image_path": "...", "success": false, "error": "..."}
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No images provided")
+    if len(request.items) > BULK_ANALYZE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many images: {len(request.items)} (max {BULK_ANALYZE_MAX_ITEMS})"
+        )
+    _require_models("blip", "clip")
+
+    logger.info(f"Bulk analysis of {len(request.items)} images")
+    return StreamingResponse(_stream_bulk_image_analysis(request), media_type="application/x-ndjson")
+
+
+async def _stream_bulk_image_analysis(request: AnalyzeImagesRequest):
+    """Drive the bulk pipeline and yield NDJSON lines as items finish."""
+    results: asyncio.Queue = asyncio.Queue()
+    producer = asyncio.ensure_future(_run_bulk_image_pipeline(request, results))
+    try:
+        while True:
+            line = await results.get()
+            if line is None:
+                break
+            yield json.dumps(line) + "\n"
+        await producer
+    finally:
+        # Client went away: stop scheduling more work
+        producer.cancel()
+
+
+async def _run_bulk_image_pipeline(request: AnalyzeImagesRequest, results: asyncio.Queue) -> None:
+    """
+    Schedule decode, model and per-item stages for every chunk, pushing finished lines to results.
+
+    Every decoded image holds one of 2 x chunk_size slots until its line is
+    published, so when the per-item stages fall behind (a slow Ollama scene
+    call, say) decoding waits instead of keeping the whole manifest in memory.
+    """
+    items = request.items
+    chunk_size = max(1, request.chunk_size or BULK_ANALYZE_CHUNK_SIZE)
+    chunks = [list(range(start, min(start + chunk_size, len(items)))) for start in range(0, len(items), chunk_size)]
+    lane = "analyze-images"
+    finishing = []
+    slots = asyncio.Semaphore(2 * chunk_size)
+    next_decode = None
+
+    async def _decode(chunk: List[int]) -> Dict[int, Dict[str, Any]]:
+        for _ in chunk:
+            await slots.acquire()
+        return await inference_executor.run(lane, _decode_bulk_chunk, items, chunk)
+
+    def _publish(task: asyncio.Future) -> None:
+        slots.release()
+        if not task.cancelled():
+            results.put_nowait(task.result())
+
+    try:
+        next_decode = asyncio.ensure_future(_decode(chunks[0]))
+        for position, chunk in enumerate(chunks):
+            decoded = await next_decode
+            next_decode = None
+            if position + 1 < len(chunks):
+                # Prefetch: decode the next chunk while this one is in the model stages
+                next_decode = asyncio.ensure_future(_decode(chunks[position + 1]))
+
+            for index, entry in decoded.items():
+                if "context" not in entry:
+                    slots.release()
+                    results.put_nowait(entry)
+
+            pending = {index: entry for index, entry in decoded.items() if "context" in entry}
+            model_outputs = await inference_executor.run(lane, _caption_and_embed_bulk_chunk, items, pending)
+
+            for index, output in model_outputs.items():
+                if "error" in output:
+                    slots.release()
+                    results.put_nowait(_bulk_error_line(index, items[index], output["error"]))
+                    continue
+                task = asyncio.ensure_future(inference_executor.run(
+                    lane, _finish_bulk_item, index, items[index], pending[index]["context"],
+                    output["caption"], output["embedding"], pending[index].get("file_hash"),
+                    {**pending[index].get("timings", {}), **output.get("timings", {})}
+                ))
+                task.add_done_callback(_publish)
+                finishing.append(task)
+
+        await asyncio.gather(*finishing)
+    except Exception as e:
+        logger.error(f"Bulk image pipeline failed: {str(e)}")
+        results.put_nowait({"success": False, "error": str(e)})
+    finally:
+        if next_decode is not None:
+            next_decode.cancel()
+        for task in finishing:
+            task.cancel()
+        results.put_nowait(None)
+
+
+def _bulk_error_line(index: int, item: AnalyzeImageRequest, error: str) -> Dict[str, Any]:
+    return {"index": index, "image_path": item.image_path, "success": False, "error": error}
+
+
+def _decode_bulk_chunk(items: List[AnalyzeImageRequest], indices: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Decode stage: open each image of a chunk.
+
+    Returns index -> {"context": ImageContext, "timings": ...} for raster images,
+    or a finished NDJSON line for missing files, SVGs and decode failures.
+    """
+    decoded = {}
+    for index in indices:
+        item = items[index]
+        image_path = Path(item.image_path)
+        try:
+            if not image_path.exists():
+                decoded[index] = _bulk_error_line(index, item, f"Image not found: {item.image_path}")
+            elif _is_svg(image_path):
+                response = _analyze_svg(image_path)
+                decoded[index] = {"index": index, "image_path": item.image_path, "success": True,
+                                  "result": jsonable_encoder(response)}
+            else:
+                min_short_side, min_long_side = _image_decode_limits(item)
+                with stage_metrics.collect() as timings:
+                    with stage_metrics.time("decode"):
+                        context = ImageContext.open(
+                            image_path, min_short_side=min_short_side, min_long_side=min_long_side,
+                            full_resolution=item.full_resolution
+                        )
+                decoded[index] = {
+                    "context": context,
+                    "file_hash": analysis_cache.file_hash(str(image_path)),
+                    "timings": dict(timings),
+                }
+        except HTTPException as e:
+            decoded[index] = _bulk_error_line(index, item, str(e.detail))
+        except Exception as e:
+            logger.error(f"Failed to decode {item.image_path}: {str(e)}")
+            decoded[index] = _bulk_error_line(index, item, str(e))
+    return decoded
+
+
+def _caption_and_embed_bulk_chunk(
+    items: List[AnalyzeImageRequest],
+    decoded: Dict[int, Dict[str, Any]]
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Model stage: batched captioning and embedding for one chunk.
+
+    Items are grouped by captioning_model and embedding_model so each group
+    runs as batched forward passes. Cached results are reused and only the
+    misses go to the models. A failed group marks only its items as failed.
+    Each item's "timings" gets an even share of its group's batch time.
+    """
+    outputs = {index: {} for index in decoded}
+
+    caption_groups: Dict[str, List[int]] = {}
+    embedding_groups: Dict[str, List[int]] = {}
+    for index, entry in decoded.items():
+        item = items[index]
+        file_hash = entry.get("file_hash")
+
+        caption_model = _caption_model_name(item.captioning_model)
+        caption = analysis_cache.get(file_hash, "caption", {"model": caption_model})
+        if caption is not None:
+            outputs[index]["caption"] = caption
+        else:
+            caption_groups.setdefault(caption_model, []).append(index)
+
+        embedding_model = _embedding_model_name(item.embedding_model)
+        embedding = analysis_cache.get(file_hash, "embedding", {"model": embedding_model})
+        if embedding is not None:
+            outputs[index]["embedding"] = _decode_embedding(embedding)
+        else:
+            embedding_groups.setdefault(embedding_model, []).append(index)
+
+    # Results are cached under the model that produced them, which after a
+    # fallback is not the requested one
+    for model, indices in caption_groups.items():
+        started = time.perf_counter()
+        try:
+            captions, used_models = _generate_captions_with_models(
+                [decoded[i]["context"].for_short_side(STAGE_INPUT_SIZES["caption"]) for i in indices], model
+            )
+            _observe_batch("caption", outputs, indices, time.perf_counter() - started)
+            for index, caption, used_model in zip(indices, captions, used_models):
+                outputs[index]["caption"] = caption
+                if caption:
+                    analysis_cache.put(decoded[index].get("file_hash"), "caption", {"model": used_model}, caption)
+        except Exception as e:
+            _observe_batch("caption", outputs, indices, time.perf_counter() - started, failed=True)
+            logger.error(f"Bulk captioning with {model} failed: {str(e)}")
+            for index in indices:
+                outputs[index]["error"] = f"Captioning failed: {str(e)}"
+
+    for model, indices in embedding_groups.items():
+        started = time.perf_counter()
+        try:
+            embeddings, used_model = _generate_image_embeddings_with_model(
+                [decoded[i]["context"].for_short_side(STAGE_INPUT_SIZES["embedding"]) for i in indices], model
+            )
+            _observe_batch("embedding", outputs, indices, time.perf_counter() - started)
+            for index, embedding in zip(indices, embeddings):
+                outputs[index]["embedding"] = embedding
+                analysis_cache.put(
+                    decoded[index].get("file_hash"), "embedding", {"model": used_model}, _encode_embedding(embedding)
+                )
+        except Exception as e:
+            _observe_batch("embedding", outputs, indices, time.perf_counter() - started, failed=True)
+            logger.error(f"Bulk embedding with {model} failed: {str(e)}")
+            for index in indices:
+                outputs[index]["error"] = f"Embedding failed: {str(e)}"
+
+    return outputs
+
+
+def _observe_batch(
+    stage: str,
+    outputs: Dict[int, Dict[str, Any]],
+    indices: List[int],
+    seconds: float,
+    failed: bool = False
+) -> None:
+    """Record a batched forward pass as one run per item, each taking an even share."""
+    share = seconds / len(indices)
+    for index in indices:
+        stage_metrics.observe(stage, share, failed=failed)
+        outputs[index].setdefault("timings", {})[stage] = share
+
+
+def _finish_bulk_item(
+    index: int,
+    item: AnalyzeImageRequest,
+    context: ImageContext,
+    caption: str,
+    embedding: np.ndarray,
+    file_hash: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Per-item stage: faces, thumbnail, objects, colors, quality, hashes and scene.
+
+    timings carries the seconds already spent on this item in the decode and
+    batched model stages, so the result reports them alongside its own.
+    """
+    try:
+        with stage_metrics.collect() as collected:
+            collected.update(timings or {})
+            response = _run_image_stages(item, context, Path(item.image_path), caption, embedding, file_hash)
+        return {"index": index, "image_path": item.image_path, "success": True,
+                "result": jsonable_encoder(response)}
+    except Exception as e:
+        logger.error(f"Bulk analysis failed for {item.image_path}: {str(e)}")
+        return _bulk_error_line(index, item, str(e))
+
+
 @app.post("/analyze-comprehensive", response_model=AnalyzeImageComprehensiveResponse)
 async def analyze_image_comprehensive(request: AnalyzeImageComprehensiveRequest):
     """
@@ -2845,6 +3065,11 @@ async def analyze_image_comprehensive(request: AnalyzeImageComprehensiveRequest)
     - comprehensive: 4-pass analysis (~40-60 seconds per image)
     - quick: Single-pass analysis (~8 seconds per image)
     """
+    return await inference_executor.run("analyze-comprehensive", _analyze_image_comprehensive_sync, request)
+
+
+def _analyze_image_comprehensive_sync(request: AnalyzeImageComprehensiveRequest) -> AnalyzeImageComprehensiveResponse:
+    """Blocking body of /analyze-comprehensive (runs in the analyze-comprehensive lane)."""
     try:
         # Check prerequisites
         if not OLLAMA_AVAILABLE:
@@ -2859,13 +3084,20 @@ async def analyze_image_comprehensive(request: AnalyzeImageComprehensiveRequest)
 
         logger.info(f"Comprehensive analysis starting: {request.image_path} (mode={request.analysis_mode})")
 
-        # Load image
-        image = Image.open(image_path).convert("RGB")
+        # Decode once at the largest size the vision passes, faces or thumbnail need
+        min_long_side = max(STAGE_INPUT_SIZES["scene"], thumbnail_service.max_size)
+        if request.detect_faces:
+            min_long_side = max(min_long_side, STAGE_INPUT_SIZES["faces"])
+        context = ImageContext.open(
+            image_path, min_short_side=STAGE_INPUT_SIZES["embedding"], min_long_side=min_long_side,
+            full_resolution=request.full_resolution
+        )
+        width, height = context.original_size
 
         # Build image metadata for context
         image_metadata = {
-            "width": image.width,
-            "height": image.height,
+            "width": width,
+            "height": height,
             "path": str(image_path),
             "filename": image_path.name,
         }
@@ -2876,25 +3108,28 @@ async def analyze_image_comprehensive(request: AnalyzeImageComprehensiveRequest)
             ollama_client=ollama_client,
             ollama_model=request.ollama_model,
             quick_mode=quick_mode,
+            max_image_side=STAGE_INPUT_SIZES["scene"],
         )
 
         # Run comprehensive analysis
-        result = analyzer.analyze(image, image_metadata)
+        result = analyzer.analyze(context.level(STAGE_INPUT_SIZES["scene"]), image_metadata)
 
         # Generate embedding if requested
         embedding = None
         if request.generate_embedding:
             logger.info(f"Generating embedding with model: {request.embedding_model}")
-            embedding_array = generate_image_embedding(image, model=request.embedding_model)
+            embedding_array = generate_image_embedding(
+                context.for_short_side(STAGE_INPUT_SIZES["embedding"]), model=request.embedding_model
+            )
             embedding = embedding_array.tolist() if embedding_array is not None else None
 
         # Detect faces if requested
-        face_info = {"count": 0, "locations": [], "encodings": []}
+        face_info = NO_FACES
         if request.detect_faces:
-            face_info = detect_faces(image)
+            face_info = detect_faces(context) or NO_FACES
 
         # Generate thumbnail
-        thumbnail_path = generate_thumbnail(str(image_path))
+        thumbnail_path = generate_thumbnail(str(image_path), image=context)
 
         logger.info(
             f"Comprehensive analysis completed: {result.passes_completed}/{result.passes_completed + result.passes_failed} passes "
@@ -2918,6 +3153,8 @@ async def analyze_image_comprehensive(request: AnalyzeImageComprehensiveRequest)
             face_locations=face_info["locations"],
             face_encodings=face_info["encodings"],
             thumbnail_path=thumbnail_path,
+            thumbnails=thumbnail_service.existing_variants(image_path) if thumbnail_path else {},
+            decode_stats=context.decode_report(),
         )
 
     except HTTPException:
@@ -2930,70 +3167,96 @@ async def analyze_image_comprehensive(request: AnalyzeImageComprehensiveRequest)
 @app.post("/analyze-video", response_model=AnalyzeVideoResponse)
 async def analyze_video(request: AnalyzeVideoRequest):
     """Analyze video with scene detection and embeddings."""
+    return await inference_executor.run("analyze-video", _analyze_video_sync, request)
+
+
+@stage_metrics.collecting
+def _analyze_video_sync(request: AnalyzeVideoRequest) -> AnalyzeVideoResponse:
+    """Blocking body of /analyze-video (runs in the analyze-video lane)."""
     try:
         video_path = Path(request.video_path)
         if not video_path.exists():
             raise HTTPException(status_code=404, detail=f"Video not found: {request.video_path}")
 
-        logger.info(f"Analyzing video: {request.video_path}")
-
-        # Get video metadata
-        metadata = get_video_metadata(str(video_path))
-
-        # Generate browser-compatible thumbnail
-        # This extracts a frame from the video and converts to JPEG for web display
-        thumbnail_path = generate_video_thumbnail(str(video_path))
+        if request.pooling not in ("duration", "mean"):
+            raise HTTPException(status_code=400, detail=f"Invalid pooling: {request.pooling} (expected duration or mean)")
+        if request.sampling_mode not in SAMPLING_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sampling_mode: {request.sampling_mode} (expected one of {', '.join(SAMPLING_MODES)})"
+            )
 
-        # Extract and analyze frames
-        scene_descriptions = []
-        embeddings = []
+        logger.info(f"Analyzing video: {request.video_path} (sampling mode: {request.sampling_mode})")
 
-        if request.extract_frames:
-            # Use smart scene detection for better performance
-            # Falls back to interval-based extraction if scene detection fails
-            try:
-                logger.info(f"Using smart scene detection (threshold={SCENE_THRESHOLD}, min_duration={MIN_SCENE_DURATION})")
-                frames = extract_video_frames_with_scene_detection(
+        # One decode pass yields metadata, the thumbnail frame and keyframes
+        # (scene cuts, or sampled positions for long videos); without
+        # extract_frames only the thumbnail frame is decoded
+        decoded = None
+        try:
+            with stage_metrics.time("video_decode"):
+                decoded = decode_video(
                     str(video_path),
+                    detect_scenes=request.extract_frames,
                     scene_threshold=SCENE_THRESHOLD,
-                    min_scene_duration_frames=MIN_SCENE_DURATION
+                    min_scene_duration_frames=MIN_SCENE_DURATION,
+                    keyframe_max_side=VIDEO_KEYFRAME_MAX_SIDE,
+                    max_keyframes=VIDEO_MAX_KEYFRAMES,
+                    analysis_width=SCENE_ANALYSIS_WIDTH,
+                    frame_stride=SCENE_FRAME_STRIDE,
+                    sampling_mode=request.sampling_mode,
+                    frame_interval=max(1, request.frame_interval),
+                    max_sampled_frames=request.max_sampled_frames or VIDEO_MAX_SAMPLED_FRAMES,
+                    min_sample_spacing_seconds=VIDEO_MIN_SAMPLE_SPACING,
+                    seek_min_duration=VIDEO_SEEK_MIN_DURATION,
                 )
+        except Exception as e:
+            logger.error(f"Video decode failed: {str(e)}")
 
-                # Fallback to interval-based extraction if no frames were extracted
-                if not frames:
-                    logger.warning("Scene detection returned no frames, falling back to interval-based extraction")
-                    frames = extract_video_frames(str(video_path), request.frame_interval)
+        metadata = decoded.metadata if decoded and decoded.metadata else get_video_metadata(str(video_path))
 
-            except Exception as e:
-                logger.error(f"Scene detection failed: {str(e)}, falling back to interval-based extraction")
-                frames = extract_video_frames(str(video_path), request.frame_interval)
+        # Generate browser-compatible thumbnail from the decoded frame, seeking
+        # separately only if the pass never produced one
+        with stage_metrics.time("video_thumbnail"):
+            if decoded is not None and decoded.thumbnail is not None:
+                thumbnail_path = save_video_thumbnail(str(video_path), decoded.thumbnail)
+            else:
+                thumbnail_path = generate_video_thumbnail(str(video_path))
 
-            scene_descriptions = analyze_video_scenes(frames)
+        # Extract and analyze frames
+        scene_descriptions = []
+        video_embedding = None
 
-            # Generate embeddings for key frames using parallel processing
-            key_frames = frames[:5]  # Use first 5 frames
-            if key_frames:
-                logger.info(f"Generating embeddings for {len(key_frames)} key frames with {MAX_VIDEO_WORKERS} workers")
+        if request.extract_frames:
+            frames = [keyframe.image for keyframe in decoded.keyframes] if decoded else []
+            timestamps = [keyframe.timestamp for keyframe in decoded.keyframes] if decoded else None
 
-                def _generate_frame_embedding(frame: np.ndarray) -> np.ndarray:
-                    """Helper function for parallel embedding generation."""
-                    pil_image = Image.fromarray(frame)
-                    return generate_image_embedding(pil_image)
+            # Fallback to interval-based extraction if no frames were extracted
+            if not frames:
+                logger.warning("Frame sampling returned no frames, falling back to interval-based extraction")
+                frames = extract_video_frames(str(video_path), request.frame_interval)
+                timestamps = None
 
-                with ThreadPoolExecutor(max_workers=MAX_VIDEO_WORKERS) as executor:
-                    # Submit all frames for embedding generation
-                    futures = [executor.submit(_generate_frame_embedding, frame) for frame in key_frames]
+            scene_descriptions = analyze_video_scenes(frames, timestamps)
 
-                    # Collect results as they complete
-                    for future in as_completed(futures):
-                        try:
-                            emb = future.result()
-                            embeddings.append(emb)
-                        except Exception as e:
-                            logger.error(f"Failed to generate embedding: {str(e)}")
+            if frames:
+                if timestamps is not None:
+                    spans = keyframe_spans(
+                        timestamps,
+                        metadata.get("duration_seconds", 0),
+                        centered=decoded.sampling_mode != "scene",
+                    )
+                else:
+                    spans = [(0.0, 0.0)] * len(frames)  # Unknown timing: pool with equal weights
+                try:
+                    video_embedding = embed_video_scenes(frames, spans, request.embedding_model, request.pooling)
+                except Exception as e:
+                    logger.error(f"Failed to generate video embedding: {str(e)}")
 
-        # Average embeddings
-        avg_embedding = np.mean(embeddings, axis=0) if embeddings else np.zeros(512)
+        if video_embedding is None:
+            # Zero vector of the requested model's size keeps the column shape valid
+            model_name = request.embedding_model.lower()
+            dimension = EMBEDDING_DIMENSIONS.get(model_name, EMBEDDING_DIMENSIONS["clip"])
+            video_embedding = {"embedding": np.zeros(dimension), "scene_embeddings": [], "model": None}
 
         return AnalyzeVideoResponse(
             duration_seconds=metadata.get("duration_seconds", 0),
@@ -3001,9 +3264,14 @@ async def analyze_video(request: AnalyzeVideoRequest):
             fps=metadata.get("fps", 0),
             resolution=metadata.get("resolution", "unknown"),
             scene_descriptions=scene_descriptions,
-            embedding=avg_embedding.tolist(),
+            embedding=video_embedding["embedding"].tolist(),
+            embedding_model=video_embedding["model"],
+            scene_embeddings=video_embedding["scene_embeddings"],
             objects_detected=[],
-            thumbnail_path=thumbnail_path
+            thumbnail_path=thumbnail_path,
+            thumbnails=thumbnail_service.existing_variants(video_path) if thumbnail_path else {},
+            decode_stats=decoded.stats() if decoded is not None else None,
+            timings=timings_ms(stage_metrics.timings())
         )
 
     except HTTPException:
@@ -3061,6 +3329,12 @@ def extract_text_document(doc_path: str) -> str:
 @app.post("/analyze-document", response_model=AnalyzeDocumentResponse)
 async def analyze_document(request: AnalyzeDocumentRequest):
     """Analyze document with OCR and text extraction."""
+    return await inference_executor.run("analyze-document", _analyze_document_sync, request)
+
+
+@stage_metrics.collecting
+def _analyze_document_sync(request: AnalyzeDocumentRequest) -> AnalyzeDocumentResponse:
+    """Blocking body of /analyze-document (runs in the analyze-document lane)."""
     try:
         doc_path = Path(request.document_path)
         if not doc_path.exists():
@@ -3074,12 +3348,18 @@ async def analyze_document(request: AnalyzeDocumentRequest):
 
         # Extract text based on file type
         extracted_text = ""
+        page_count = None
+        ocr_pages = []
+        ocr_failed_pages = []
+        ocr_results = []  # Per-page OCR results, with their layouts
         file_extension = doc_path.suffix.lower()
 
         # Word documents (.docx, .doc, .rtf, .odt)
         if file_extension in ['.docx', '.doc', '.rtf', '.odt']:
             logger.info(f"Extracting text from Word document: {file_extension}")
-            extracted_text = extract_word_document(str(doc_path))
+            # Pure-Python parsing holds the GIL, so run it in the process pool
+            with stage_metrics.time("document_extract"):
+                extracted_text = inference_executor.call_cpu(extract_word_document, str(doc_path))
 
         # Plain text documents
         elif file_extension in ['.txt', '.md', '.log', '.csv', '.json', '.xml']:
@@ -3089,18 +3369,24 @@ async def analyze_document(request: AnalyzeDocumentRequest):
         # PDF documents
         elif file_extension == '.pdf':
             logger.info("Extracting text from PDF document")
-            # Try native text extraction first
-            extracted_text = extract_pdf_text(str(doc_path))
-
-            # If no text extracted and OCR is requested, perform OCR
-            if not extracted_text.strip() and request.perform_ocr and OCR_AVAILABLE:
-                logger.info(f"No native text found in PDF, performing OCR with engine: {request.ocr_engine}")
-                extracted_text = perform_ocr(str(doc_path), engine=request.ocr_engine)
+            # Native text page by page; pages without a usable text layer are OCRed
+            engine = resolve_ocr_engine(request.ocr_engine) if request.perform_ocr and OCR_AVAILABLE else None
+            with stage_metrics.time("pdf_extract"):
+                pdf = document_ocr.extract_pdf(str(doc_path), engine)
+            extracted_text = pdf["text"]
+            page_count = pdf["page_count"]
+            ocr_pages = pdf["ocr_pages"]
+            ocr_results = [page for page in pdf["pages"] if page["source"] == "ocr" and "error" not in page]
+            ocr_failed_pages = [page["page"] for page in pdf["pages"] if "error" in page]
+            logger.info(
+                f"Extracted {len(extracted_text)} characters from {page_count} PDF pages "
+                f"({len(ocr_pages)} OCRed with {engine or 'no engine'})"
+            )
 
         # Image documents - perform OCR if requested
         elif request.perform_ocr and OCR_AVAILABLE:
             logger.info(f"Performing OCR on image document: {file_extension} with engine: {request.ocr_engine}")
-            extracted_text = perform_ocr(str(doc_path), engine=request.ocr_engine)
+            extracted_text = perform_ocr(str(doc_path), engine=request.ocr_engine, on_page=ocr_results.append)
 
         else:
             logger.warning(f"Unsupported document type for text extraction: {file_extension}")
@@ -3148,14 +3434,29 @@ async def analyze_document(request: AnalyzeDocumentRequest):
 
         return AnalyzeDocumentResponse(
             extracted_text=extracted_text,
-            page_count=None,
+            page_count=page_count,
+            ocr_pages=ocr_pages,
+            ocr_failed_pages=ocr_failed_pages,
+            ocr_confidence=(
+                round(sum(page["confidence"] for page in ocr_results) / len(ocr_results), 3) if ocr_results else None
+            ),
+            ocr_layout=[
+                {"page": page["page"], "confidence": page["confidence"], "layout": page["layout"]}
+                for page in ocr_results
+            ] if request.include_layout else None,
+            ocr_page_stats=[
+                {key: page[key] for key in OCR_PAGE_STAT_KEYS if key in page}
+                for page in ocr_results if "dpi" in page
+            ],
             summary=summary,
             keywords=keywords,
             embedding=embedding.tolist(),
             thumbnail_path=thumbnail_path,
+            thumbnails=thumbnail_service.existing_variants(doc_path) if thumbnail_path else {},
             document_type=document_type,
             classification_confidence=classification_confidence,
-            entities=entities
+            entities=entities,
+            timings=timings_ms(stage_metrics.timings())
         )
 
     except HTTPException:
@@ -3165,9 +3466,112 @@ async def analyze_document(request: AnalyzeDocumentRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/analyze-document/ocr-stream")
+async def stream_document_ocr(request: OCRDocumentRequest):
+    """
+    OCR a PDF (or image) and stream the pages as NDJSON as they finish.
+
+    Pages with a usable text layer are sent first with "source": "native"
+    (unless native_text is false); the rest are OCRed in parallel and arrive
+    in completion order:
+
+        {"event": "started", "page_count": 12}
+        {"event": "page", "page": 2, "page_count": 12, "text": "...", "characters": 812, ...}
+        {"event": "completed", "page_count": 12, "characters": 9650, "seconds": 14.2}
+    """
+    doc_path = Path(request.document_path)
+    if not doc_path.exists():
+        raise HTTPException(status_code=404, detail=f"Document not found: {request.document_path}")
+    if not OCR_AVAILABLE:
+        raise HTTPException(status_code=503, detail="No OCR engine available")
+
+    return StreamingResponse(_stream_document_ocr(request), media_type="application/x-ndjson")
+
+
+async def _stream_document_ocr(request: OCRDocumentRequest):
+    """Run the OCR in the analyze-document lane and yield its events as NDJSON lines."""
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def _emit(event: Optional[Dict[str, Any]]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    producer = asyncio.ensure_future(
+        inference_executor.run("analyze-document", _stream_document_ocr_sync, request, _emit, cancelled)
+    )
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield json.dumps(event) + "\n"
+        await producer
+    finally:
+        # Client went away: stop submitting pages
+        cancelled.set()
+
+
+def _stream_document_ocr_sync(
+    request: OCRDocumentRequest,
+    emit: Callable[[Optional[Dict[str, Any]]], None],
+    cancelled: threading.Event
+) -> None:
+    """Blocking body of /analyze-document/ocr-stream; always ends by emitting None."""
+    started = time.perf_counter()
+    try:
+        engine = resolve_ocr_engine(request.ocr_engine)
+        characters = 0
+        if Path(request.document_path).suffix.lower() == '.pdf':
+            page_count = pdf_page_count(request.document_path)
+            emit({"event": "started", "page_count": page_count})
+            if request.native_text:
+                pages = document_ocr.iter_hybrid(request.document_path, engine)
+            else:
+                pages = document_ocr.iter_pdf(request.document_path, engine)
+            try:
+                for page in pages:
+                    characters += page["characters"]
+                    if not request.include_layout:
+                        page = {key: value for key, value in page.items() if key != "layout"}
+                    emit({"event": "page", **page})
+                    if cancelled.is_set():
+                        break
+            finally:
+                pages.close()
+        else:
+            page_count = 1
+            emit({"event": "started", "page_count": page_count})
+            result = document_ocr.ocr_image(request.document_path, engine)
+            characters = result["characters"]
+            if not request.include_layout:
+                result.pop("layout")
+            emit({"event": "page", **result, "page_count": 1})
+        emit({
+            "event": "completed",
+            "page_count": page_count,
+            "characters": characters,
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+    except Exception as e:
+        logger.error(f"Streaming OCR failed: {str(e)}")
+        emit({"event": "failed", "error": str(e)})
+    finally:
+        emit(None)
+
+
 @app.post("/transcribe-audio", response_model=TranscribeAudioResponse)
 async def transcribe_audio_endpoint(request: TranscribeAudioRequest):
     """Transcribe audio to text using Whisper."""
+    return await inference_executor.run("transcribe-audio", _transcribe_audio_sync, request)
+
+
+@stage_metrics.collecting
+def _transcribe_audio_sync(
+    request: TranscribeAudioRequest,
+    on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> TranscribeAudioResponse:
+    """Blocking body of /transcribe-audio (runs in the transcribe-audio lane)."""
     try:
         if not WHISPER_AVAILABLE:
             raise HTTPException(status_code=503, detail="Whisper not available")
@@ -3182,18 +3586,30 @@ async def transcribe_audio_endpoint(request: TranscribeAudioRequest):
         # This creates a visual representation of the audio waveform
         thumbnail_path = generate_audio_thumbnail(str(audio_path))
 
-        # Transcribe audio
-        result = transcribe_audio(str(audio_path), request.language)
+        # Transcribe audio (silence-split chunks across the transcription pool)
+        result = transcribe_audio(str(audio_path), request.language, on_chunk=on_chunk)
 
-        # Generate embedding from transcribed text
-        embedding = generate_text_embedding(result["text"]) if result["text"] else np.zeros(512)
+        # Embed the transcript per timestamped window; the pooled vector covers all of it
+        if not result["text"]:
+            transcript_embedding = {"embedding": np.zeros(512), "segment_embeddings": []}
+        elif request.embed_segments and result["segments"]:
+            transcript_embedding = embed_transcript(result["segments"])
+        else:
+            transcript_embedding = {"embedding": generate_text_embedding(result["text"]), "segment_embeddings": []}
+        embedding = transcript_embedding["embedding"]
 
         return TranscribeAudioResponse(
             text=result["text"],
             language=result["language"],
             confidence=result["confidence"],
             embedding=embedding.tolist(),
-            thumbnail_path=thumbnail_path
+            segments=result["segments"],
+            segment_embeddings=transcript_embedding["segment_embeddings"],
+            duration_seconds=result["duration_seconds"],
+            chunks=result["chunks"],
+            thumbnail_path=thumbnail_path,
+            thumbnails=thumbnail_service.existing_variants(audio_path) if thumbnail_path else {},
+            timings=timings_ms(stage_metrics.timings())
         )
 
     except HTTPException:
@@ -3203,12 +3619,85 @@ async def transcribe_audio_endpoint(request: TranscribeAudioRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Background transcription tasks, kept referenced until they finish
+_transcription_tasks: set = set()
+
+
+@app.post("/transcribe-audio/jobs", response_model=TranscriptionJobResponse, status_code=202)
+async def create_transcription_job(request: TranscribeAudioRequest):
+    """
+    Start transcribing in the background and return a job to poll or stream.
+
+    GET /transcribe-audio/jobs/{job_id} returns the status with the segments
+    transcribed so far; GET /transcribe-audio/jobs/{job_id}/events streams
+    progress as NDJSON until the job finishes.
+    """
+    if not WHISPER_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Whisper not available")
+    if not Path(request.audio_path).exists():
+        raise HTTPException(status_code=404, detail=f"Audio not found: {request.audio_path}")
+
+    job = transcription_jobs.create(request.audio_path, request.language)
+    task = asyncio.ensure_future(inference_executor.run("transcribe-audio", _run_transcription_job, job, request))
+    _transcription_tasks.add(task)
+    task.add_done_callback(_transcription_tasks.discard)
+    return job.snapshot()
+
+
+def _run_transcription_job(job, request: TranscribeAudioRequest) -> None:
+    """Blocking body of a background transcription (runs in the transcribe-audio lane)."""
+    job.mark_running()
+    try:
+        response = _transcribe_audio_sync(request, on_chunk=job.add_chunk)
+        job.complete(jsonable_encoder(response))
+    except HTTPException as e:
+        job.fail(str(e.detail))
+    except Exception as e:
+        logger.error(f"Transcription job {job.id} failed: {str(e)}")
+        job.fail(str(e))
+
+
+@app.get("/transcribe-audio/jobs/{job_id}", response_model=TranscriptionJobResponse)
+async def get_transcription_job(job_id: str):
+    """Status, progress and partial segments of a background transcription."""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown transcription job: {job_id}")
+    return job.snapshot()
+
+
+@app.get("/transcribe-audio/jobs/{job_id}/events")
+async def stream_transcription_job(job_id: str):
+    """Stream a job's progress events (started, chunk, completed/failed) as NDJSON."""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown transcription job: {job_id}")
+    return StreamingResponse(_stream_transcription_events(job), media_type="application/x-ndjson")
+
+
+async def _stream_transcription_events(job):
+    """Yield every event of job as an NDJSON line, from the first, until it finishes."""
+    sent = 0
+    while True:
+        events = job.events_since(sent)
+        for event in events:
+            yield json.dumps(event) + "\n"
+        sent += len(events)
+        if job.finished and not job.events_since(sent):
+            break
+        await asyncio.sleep(TRANSCRIBE_EVENT_POLL_SECONDS)
+
+
 @app.post("/embed-text", response_model=EmbedTextResponse)
 async def embed_text(request: EmbedTextRequest):
     """Generate embedding for text query."""
+    return await inference_executor.run("embed-text", _embed_text_sync, request)
+
+
+def _embed_text_sync(request: EmbedTextRequest) -> EmbedTextResponse:
+    """Blocking body of /embed-text (runs in the embed-text lane)."""
     try:
-        if clip_model is None:
-            raise HTTPException(status_code=503, detail="Models not loaded yet")
+        _require_models("clip")
 
         logger.info(f"Embedding text query: {request.query}")
         embedding = generate_text_embedding(request.query)
@@ -3232,7 +3721,7 @@ async def extract_email_endpoint(request: ExtractEmailRequest):
 
         logger.info(f"Extracting email: {request.file_path}")
 
-        result = extract_email(str(email_path))
+        result = await inference_executor.run_cpu("extract", extract_email, str(email_path))
 
         return ExtractEmailResponse(**result)
 
@@ -3253,7 +3742,7 @@ async def extract_archive_metadata_endpoint(request: ExtractArchiveMetadataReque
 
         logger.info(f"Extracting archive metadata: {request.file_path}")
 
-        result = extract_archive_metadata(str(archive_path))
+        result = await inference_executor.run_cpu("extract", extract_archive_metadata, str(archive_path))
 
         return ExtractArchiveMetadataResponse(**result)
 
@@ -3274,7 +3763,7 @@ async def analyze_code_file_endpoint(request: AnalyzeCodeFileRequest):
 
         logger.info(f"Analyzing code file: {request.file_path}")
 
-        result = analyze_code_file(str(code_path))
+        result = await inference_executor.run_cpu("extract", analyze_code_file, str(code_path))
 
         return AnalyzeCodeFileResponse(**result)
 
@@ -3285,6 +3774,96 @@ async def analyze_code_file_endpoint(request: AnalyzeCodeFileRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ===== MODEL ADMINISTRATION =====
+
+# Laravel settings use these names; map them to registry entries
+MODEL_NAME_ALIASES = {
+    "salesforce/blip-image-captioning-large": "blip",
+    "openai/clip-vit-base-patch32": "clip",
+    "microsoft/florence-2-base": "florence",
+    "google/siglip-base-patch16-224": "siglip",
+    "apple/aimv2-large-patch14-224": "aimv2",
+}
+
+
+def _resolve_model_name(name: str) -> str:
+    """Map a Laravel/Hugging Face model name to its registry name."""
+    lowered = name.strip().lower()
+    return MODEL_NAME_ALIASES.get(lowered, lowered)
+
+
+def _require_registered_model(name: str) -> str:
+    registry_name = _resolve_model_name(name)
+    if registry_name not in model_registry.names():
+        raise HTTPException(status_code=404, detail=f"Unknown model: {name}")
+    return registry_name
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage and request duration histograms in the Prometheus text format."""
+    return PlainTextResponse(stage_metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admin/models")
+async def list_models():
+    """Registry state: loaded/pinned models, sizes and the memory budget."""
+    return model_registry.stats()
+
+
+@app.post("/admin/models/{name}/pin")
+async def pin_model(name: str):
+    """Load a model if needed and exempt it from eviction."""
+    registry_name = _require_registered_model(name)
+    try:
+        await inference_executor.run("admin", model_registry.pin, registry_name)
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"success": True, "model": registry_name, **model_registry.stats()["models"][registry_name]}
+
+
+@app.post("/admin/models/{name}/unpin")
+async def unpin_model(name: str):
+    """Make a pinned model evictable again."""
+    registry_name = _require_registered_model(name)
+    model_registry.unpin(registry_name)
+    return {"success": True, "model": registry_name, **model_registry.stats()["models"][registry_name]}
+
+
+@app.post("/api/preload-models")
+async def preload_models(request: dict):
+    """
+    Load the configured captioning and embedding models ahead of first use.
+
+    Args:
+        request: Dict with captioning_model and embedding_model (Laravel setting values)
+
+    Returns:
+        Success status and per-model errors
+    """
+    requested = [
+        request.get('captioning_model', 'florence'),
+        request.get('embedding_model', 'aimv2'),
+    ]
+    names = [_resolve_model_name(name) for name in requested if name]
+    unknown = [name for name in names if name not in model_registry.names()]
+    names = [name for name in names if name in model_registry.names()]
+
+    logger.info(f"Preloading models: {names}")
+    errors = await inference_executor.run("admin", model_registry.preload, names)
+    failed = {name: error for name, error in errors.items() if error}
+
+    return {
+        "success": not failed,
+        "message": "Models loaded" if not failed else "Some models failed to load",
+        "loaded": [name for name, error in errors.items() if not error],
+        "errors": failed,
+        "unknown": unknown,
+        "captioning_model": requested[0],
+        "embedding_model": requested[1],
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -3302,12 +3881,18 @@ async def root():
         "endpoints": [
             "/health",
             "/analyze-image",
+            "/analyze-images",
             "/analyze-video",
             "/analyze-document",
+            "/analyze-document/ocr-stream",
             "/transcribe-audio",
+            "/transcribe-audio/jobs",
             "/embed-text",
             "/extract-email",
             "/extract-archive-metadata",
-            "/analyze-code-file"
+            "/analyze-code-file",
+            "/metrics",
+            "/admin/models",
+            "/api/preload-models"
         ]
     }
@@ -0,0 +1,367 @@
+"""
+Model Registry - lazy, memory-budgeted loading of the service's models.
+
+Every model the service uses (BLIP, CLIP, Florence-2, SigLIP, AIMv2, Whisper)
+is registered with a loader. The registry:
+
+- Loads each model on first use, once, under a per-model lock
+- Measures each model's resident size (parameter + buffer bytes, falling back
+  to the process RSS delta during the load)
+- Evicts least-recently-used models when the total exceeds a RAM budget
+- Never evicts pinned models or models that are currently in use
+- Exposes per-model state for /health and the admin endpoints
+
+Usage:
+    registry.register("clip", load_clip)
+    with registry.use("clip") as (processor, model):
+        ...
+
+Configuration (environment variables):
+- MODEL_MEMORY_BUDGET_MB: total budget for resident models, 0 = unlimited (default: 6144)
+- MODEL_PINNED: comma-separated models that are never evicted (default: none)
+"""
+
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a model is unknown or its loader failed."""
+
+
+def estimate_model_bytes(value: Any) -> int:
+    """
+    Sum parameter and buffer bytes of every torch module in a loaded value.
+
+    Loaders return a model or a (processor, model) tuple; anything without
+    ``parameters()`` (processors, tokenizers) counts as zero.
+    """
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_model_bytes(item) for item in value)
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(value, attr, None)
+        if not callable(tensors):
+            continue
+        try:
+            total += sum(t.numel() * t.element_size() for t in tensors())
+        except Exception:
+            pass
+    return total
+
+
+def _process_rss() -> int:
+    if not PSUTIL_AVAILABLE:
+        return 0
+    try:
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def _release_memory() -> None:
+    """Return freed model memory to the allocator (and the GPU, if torch has one)."""
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        try:
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except Exception:
+            pass
+
+
+class _ModelEntry:
+    """Bookkeeping for one registered model."""
+
+    def __init__(self, name: str, loader: Callable[[], Any], pinned: bool):
+        self.name = name
+        self.loader = loader
+        self.pinned = pinned
+        self.value: Any = None
+        self.state = "unloaded"  # unloaded | loading | loaded | failed
+        self.error: Optional[str] = None
+        self.size_bytes = 0
+        self.in_use = 0
+        self.last_used = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.last_load_seconds = 0.0
+        self.load_lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry of lazily loaded models with LRU eviction.
+
+    A failed load is remembered so every request doesn't retry a multi-GB
+    download; preload() or pin() retries it explicitly.
+    """
+
+    def __init__(self, budget_bytes: int = 0, pinned: Iterable[str] = ()):
+        self.budget_bytes = max(0, budget_bytes)
+        self._pinned_by_config = set(pinned)
+        self._models: Dict[str, _ModelEntry] = {}
+        self._lock = threading.RLock()
+        self._evictions = 0
+
+    def register(self, name: str, loader: Callable[[], Any], pinned: bool = False) -> None:
+        """Register a loader. It is not called until the model is first used."""
+        with self._lock:
+            self._models[name] = _ModelEntry(name, loader, pinned or name in self._pinned_by_config)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._models)
+
+    def _entry(self, name: str) -> _ModelEntry:
+        entry = self._models.get(name)
+        if entry is None:
+            raise ModelUnavailableError(f"Unknown model: {name}")
+        return entry
+
+    def get(self, name: str, retry_failed: bool = False) -> Any:
+        """
+        Return a loaded model, loading it first if needed.
+
+        Prefer use() for inference so the model cannot be evicted mid-call.
+        """
+        with self._lock:
+            entry = self._entry(name)
+            if entry.state == "loaded":
+                entry.last_used = time.monotonic()
+                return entry.value
+            if entry.state == "failed" and not retry_failed:
+                raise ModelUnavailableError(f"Model '{name}' failed to load: {entry.error}")
+
+        with entry.load_lock:
+            # Another thread may have finished the load while we waited
+            with self._lock:
+                if entry.state == "loaded":
+                    entry.last_used = time.monotonic()
+                    return entry.value
+                if entry.state == "failed" and not retry_failed:
+                    raise ModelUnavailableError(f"Model '{name}' failed to load: {entry.error}")
+                entry.state = "loading"
+                # Make room up front when we know how big this model was last time
+                if entry.size_bytes:
+                    self._evict_locked(self.budget_bytes - entry.size_bytes, exclude=name)
+
+            logger.info(f"Loading model '{name}'...")
+            rss_before = _process_rss()
+            started = time.perf_counter()
+            try:
+                value = entry.loader()
+            except Exception as e:
+                with self._lock:
+                    entry.state = "failed"
+                    entry.error = str(e)
+                logger.error(f"Failed to load model '{name}': {str(e)}")
+                raise ModelUnavailableError(f"Model '{name}' failed to load: {str(e)}") from e
+            elapsed = time.perf_counter() - started
+
+            size = estimate_model_bytes(value) or max(0, _process_rss() - rss_before)
+            with self._lock:
+                entry.value = value
+                entry.state = "loaded"
+                entry.error = None
+                entry.size_bytes = size
+                entry.loads += 1
+                entry.last_load_seconds = elapsed
+                entry.last_used = time.monotonic()
+                self._evict_locked(self.budget_bytes, exclude=name)
+            logger.info(f"Model '{name}' loaded in {elapsed:.1f}s ({size / 1024 / 1024:.0f}MB)")
+            return value
+
+    def get_or_none(self, name: str) -> Any:
+        """get() that returns None instead of raising when the model is unavailable."""
+        try:
+            return self.get(name)
+        except ModelUnavailableError:
+            return None
+
+    @contextmanager
+    def use(self, name: str):
+        """Hold a model for the duration of a call; it will not be evicted meanwhile."""
+        while True:
+            value = self.get(name)
+            with self._lock:
+                entry = self._models[name]
+                # It may have been evicted between get() and here
+                if entry.state == "loaded" and entry.value is value:
+                    entry.in_use += 1
+                    break
+        try:
+            yield value
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def available(self, name: str) -> bool:
+        """False only if the model is unknown or its last load failed."""
+        with self._lock:
+            entry = self._models.get(name)
+            return entry is not None and entry.state != "failed"
+
+    def ready(self, name: str) -> bool:
+        """
+        True once a model has loaded successfully at least once.
+
+        An evicted model stays ready: the next use() reloads it.
+        """
+        with self._lock:
+            entry = self._models.get(name)
+            return entry is not None and entry.state != "failed" and entry.loads > 0
+
+    def state(self, name: str) -> Optional[str]:
+        """unloaded | loading | loaded | failed, or None for an unknown model."""
+        with self._lock:
+            entry = self._models.get(name)
+            return entry.state if entry is not None else None
+
+    def is_loaded(self, name: str) -> bool:
+        with self._lock:
+            entry = self._models.get(name)
+            return entry is not None and entry.state == "loaded"
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size_bytes for e in self._models.values() if e.state == "loaded")
+
+    def _evict_locked(self, target_bytes: int, exclude: Optional[str] = None) -> None:
+        """Unload LRU models that are not pinned or in use until resident size <= target."""
+        if not self.budget_bytes:
+            return
+        resident = sum(e.size_bytes for e in self._models.values() if e.state == "loaded")
+        candidates = sorted(
+            (e for e in self._models.values()
+             if e.state == "loaded" and not e.pinned and e.in_use == 0 and e.name != exclude),
+            key=lambda e: e.last_used,
+        )
+        evicted = []
+        for entry in candidates:
+            if resident <= target_bytes:
+                break
+            resident -= entry.size_bytes
+            self._unload_locked(entry)
+            entry.evictions += 1
+            self._evictions += 1
+            evicted.append(entry.name)
+        if evicted:
+            logger.info(
+                f"Evicted models {evicted} to stay within {self.budget_bytes / 1024 / 1024:.0f}MB budget "
+                f"({resident / 1024 / 1024:.0f}MB resident)"
+            )
+            _release_memory()
+        elif resident > target_bytes:
+            logger.warning(
+                f"Model memory {resident / 1024 / 1024:.0f}MB exceeds budget but nothing is evictable"
+            )
+
+    def _unload_locked(self, entry: _ModelEntry) -> None:
+        entry.value = None
+        entry.state = "unloaded"
+
+    def unload(self, name: str) -> bool:
+        """Unload a model now. Returns False if it is pinned or in use."""
+        with self._lock:
+            entry = self._entry(name)
+            if entry.pinned or entry.in_use:
+                return False
+            if entry.state == "loaded":
+                self._unload_locked(entry)
+                logger.info(f"Unloaded model '{name}'")
+        _release_memory()
+        return True
+
+    def pin(self, name: str) -> None:
+        """Load a model (retrying a failed load) and exempt it from eviction."""
+        with self._lock:
+            entry = self._entry(name)
+            was_pinned = entry.pinned
+            entry.pinned = True
+        try:
+            self.get(name, retry_failed=True)
+        except ModelUnavailableError:
+            with self._lock:
+                entry.pinned = was_pinned
+            raise
+        logger.info(f"Pinned model '{name}'")
+
+    def unpin(self, name: str) -> None:
+        """Make a model evictable again, evicting right away if over budget."""
+        with self._lock:
+            self._entry(name).pinned = False
+            self._evict_locked(self.budget_bytes)
+        logger.info(f"Unpinned model '{name}'")
+
+    def _preload_one(self, name: str) -> Optional[str]:
+        try:
+            self.get(name, retry_failed=True)
+            return None
+        except ModelUnavailableError as e:
+            return str(e)
+
+    def preload(self, names: Iterable[str], max_workers: int = 1) -> Dict[str, Optional[str]]:
+        """
+        Load several models, retrying failed ones. Returns {name: error or None}.
+
+        With max_workers > 1 the models load in parallel threads; loading is
+        dominated by file I/O and tensor copies that release the GIL.
+        """
+        names = list(names)
+        if max_workers <= 1 or len(names) <= 1:
+            return {name: self._preload_one(name) for name in names}
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-preload") as pool:
+            return dict(zip(names, pool.map(self._preload_one, names)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model state plus budget usage, for /health and /admin/models."""
+        now = time.monotonic()
+        with self._lock:
+            resident = sum(e.size_bytes for e in self._models.values() if e.state == "loaded")
+            return {
+                "budget_mb": round(self.budget_bytes / 1024 / 1024, 1) if self.budget_bytes else None,
+                "resident_mb": round(resident / 1024 / 1024, 1),
+                "evictions": self._evictions,
+                "models": {
+                    e.name: {
+                        "state": e.state,
+                        "ready": e.state != "failed" and e.loads > 0,
+                        "pinned": e.pinned,
+                        "in_use": e.in_use,
+                        "size_mb": round(e.size_bytes / 1024 / 1024, 1),
+                        "loads": e.loads,
+                        "evictions": e.evictions,
+                        "last_load_seconds": round(e.last_load_seconds, 2),
+                        "idle_seconds": round(now - e.last_used, 1) if e.last_used else None,
+                        "error": e.error,
+                    }
+                    for e in self._models.values()
+                },
+            }
+
+
+def create_model_registry() -> ModelRegistry:
+    """Build a ModelRegistry from environment configuration."""
+    pinned = [name.strip() for name in os.getenv('MODEL_PINNED', '').split(',') if name.strip()]
+    return ModelRegistry(
+        budget_bytes=int(float(os.getenv('MODEL_MEMORY_BUDGET_MB', '6144')) * 1024 * 1024),
+        pinned=pinned,
+    )
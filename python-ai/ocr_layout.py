@@ -0,0 +1,243 @@
+"""
+OCR Layout - word and line boxes with confidences, stored as arrays.
+
+An OCRLayout keeps what the OCR engines report, not just the text, in a
+compact form:
+
+- Lines and words as parallel arrays: an (n, 4) float32 array of
+  x0, y0, x1, y1 pixel boxes, an (n,) float32 array of confidences (0-1),
+  and the texts in a list; each word carries the index of its line
+- Built from PaddleOCR results (line boxes; word boxes are split from the
+  line box by character count) or Tesseract ``image_to_data`` (word boxes,
+  grouped into lines)
+- ``low_confidence_lines`` picks regions worth re-OCRing at a higher
+  resolution, ``replace_line`` merges the re-OCR result back in
+- ``to_dict`` serializes it for JSON: boxes flattened and normalized to the
+  page size (0-1), so a client can draw search-hit highlights at any scale
+  without running OCR again
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tesseract image_to_data level of a word
+TESSERACT_WORD_LEVEL = 5
+
+
+def _empty_boxes() -> np.ndarray:
+    return np.zeros((0, 4), dtype=np.float32)
+
+
+def _empty_values(dtype=np.float32) -> np.ndarray:
+    return np.zeros(0, dtype=dtype)
+
+
+@dataclass
+class OCRLayout:
+    """Lines and words of one OCRed image, boxes in that image's pixels."""
+
+    size: Tuple[int, int]
+    line_text: List[str] = field(default_factory=list)
+    line_boxes: np.ndarray = field(default_factory=_empty_boxes)
+    line_conf: np.ndarray = field(default_factory=_empty_values)
+    line_block: np.ndarray = field(default_factory=lambda: _empty_values(np.int32))
+    word_text: List[str] = field(default_factory=list)
+    word_boxes: np.ndarray = field(default_factory=_empty_boxes)
+    word_conf: np.ndarray = field(default_factory=_empty_values)
+    word_line: np.ndarray = field(default_factory=lambda: _empty_values(np.int32))
+
+    @classmethod
+    def from_paddle(cls, result, size: Tuple[int, int]) -> "OCRLayout":
+        """
+        Layout from ``PaddleOCR.ocr()`` output: [[quad, (text, confidence)], ...].
+
+        PaddleOCR only boxes lines, so each line's box is split into word
+        boxes in proportion to the words' character counts.
+        """
+        line_text, line_boxes, line_conf = [], [], []
+        word_text, word_boxes, word_conf, word_line = [], [], [], []
+        for entry in (result[0] if result and result[0] else []):
+            if not entry or len(entry) < 2:
+                continue
+            quad, recognized = entry[0], entry[1]
+            text, confidence = (recognized[0], recognized[1]) if isinstance(recognized, (tuple, list)) else (str(recognized), 1.0)
+            text = text.strip()
+            if not text:
+                continue
+            points = np.asarray(quad, dtype=np.float32).reshape(-1, 2)
+            x0, y0 = points.min(axis=0)
+            x1, y1 = points.max(axis=0)
+            index = len(line_text)
+            line_text.append(text)
+            line_boxes.append((x0, y0, x1, y1))
+            line_conf.append(float(confidence))
+
+            words = text.split()
+            # Character offsets (counting one space between words) along the line
+            lengths = np.array([len(w) for w in words], dtype=np.float32)
+            starts = np.concatenate(([0.0], np.cumsum(lengths + 1)[:-1]))
+            total = max(1.0, float(lengths.sum() + len(words) - 1))
+            for word, start, length in zip(words, starts, lengths):
+                word_text.append(word)
+                word_boxes.append((x0 + (x1 - x0) * start / total, y0, x0 + (x1 - x0) * (start + length) / total, y1))
+                word_conf.append(float(confidence))
+                word_line.append(index)
+
+        return cls(
+            size=size,
+            line_text=line_text,
+            line_boxes=np.array(line_boxes, dtype=np.float32).reshape(-1, 4),
+            line_conf=np.array(line_conf, dtype=np.float32),
+            line_block=np.zeros(len(line_text), dtype=np.int32),
+            word_text=word_text,
+            word_boxes=np.array(word_boxes, dtype=np.float32).reshape(-1, 4),
+            word_conf=np.array(word_conf, dtype=np.float32),
+            word_line=np.array(word_line, dtype=np.int32),
+        )
+
+    @classmethod
+    def from_tesseract(cls, data: Dict[str, Sequence], size: Tuple[int, int]) -> "OCRLayout":
+        """
+        Layout from ``pytesseract.image_to_data(..., output_type=Output.DICT)``.
+
+        Words are grouped into lines by (block, paragraph, line); a line's box
+        is the union of its words and its confidence their mean.
+        """
+        keys: Dict[Tuple[int, int, int], int] = {}
+        word_text, word_boxes, word_conf, word_line = [], [], [], []
+        line_block = []
+        for i, text in enumerate(data["text"]):
+            text = str(text).strip()
+            if int(data["level"][i]) != TESSERACT_WORD_LEVEL or not text:
+                continue
+            key = (int(data["block_num"][i]), int(data["par_num"][i]), int(data["line_num"][i]))
+            if key not in keys:
+                keys[key] = len(keys)
+                line_block.append(key[0])
+            left, top = float(data["left"][i]), float(data["top"][i])
+            word_text.append(text)
+            word_boxes.append((left, top, left + float(data["width"][i]), top + float(data["height"][i])))
+            word_conf.append(max(0.0, float(data["conf"][i])) / 100.0)
+            word_line.append(keys[key])
+
+        word_boxes = np.array(word_boxes, dtype=np.float32).reshape(-1, 4)
+        word_conf = np.array(word_conf, dtype=np.float32)
+        word_line = np.array(word_line, dtype=np.int32)
+        lines = len(keys)
+        line_boxes = np.zeros((lines, 4), dtype=np.float32)
+        line_conf = np.zeros(lines, dtype=np.float32)
+        if lines:
+            # Union of word boxes and mean word confidence per line
+            line_boxes[:, :2] = np.inf
+            line_boxes[:, 2:] = -np.inf
+            np.minimum.at(line_boxes[:, 0], word_line, word_boxes[:, 0])
+            np.minimum.at(line_boxes[:, 1], word_line, word_boxes[:, 1])
+            np.maximum.at(line_boxes[:, 2], word_line, word_boxes[:, 2])
+            np.maximum.at(line_boxes[:, 3], word_line, word_boxes[:, 3])
+            line_conf = (np.bincount(word_line, weights=word_conf, minlength=lines)
+                         / np.bincount(word_line, minlength=lines)).astype(np.float32)
+        line_words: List[List[str]] = [[] for _ in range(lines)]
+        for word, line in zip(word_text, word_line):
+            line_words[line].append(word)
+        line_text = [" ".join(words) for words in line_words]
+
+        return cls(
+            size=size,
+            line_text=line_text,
+            line_boxes=line_boxes,
+            line_conf=line_conf,
+            line_block=np.array(line_block, dtype=np.int32),
+            word_text=word_text,
+            word_boxes=word_boxes,
+            word_conf=word_conf,
+            word_line=word_line,
+        )
+
+    @property
+    def text(self) -> str:
+        """Lines joined by newlines, with a blank line between blocks."""
+        parts = []
+        for index, line in enumerate(self.line_text):
+            if index and self.line_block[index] != self.line_block[index - 1]:
+                parts.append("")
+            parts.append(line)
+        return "\n".join(parts)
+
+    @property
+    def confidence(self) -> float:
+        """Mean line confidence weighted by line length (0.0 when empty)."""
+        if not self.line_text:
+            return 0.0
+        weights = np.array([len(t) for t in self.line_text], dtype=np.float32)
+        return float((self.line_conf * weights).sum() / weights.sum())
+
+    def low_confidence_lines(self, threshold: float, limit: int) -> List[int]:
+        """Indices of up to limit lines below threshold, least confident first."""
+        candidates = np.flatnonzero(self.line_conf < threshold)
+        return candidates[np.argsort(self.line_conf[candidates], kind="stable")][:limit].tolist()
+
+    def replace_line(self, index: int, region: "OCRLayout", origin: Tuple[float, float], scale: float) -> None:
+        """
+        Replace line index with the OCR of a re-rendered crop of it.
+
+        Args:
+            index: Line to replace
+            region: Layout of the crop, boxes in the crop's pixels
+            origin: Crop's top-left corner in this layout's pixels
+            scale: Crop pixels per pixel of this layout
+        """
+        offset = np.array([origin[0], origin[1], origin[0], origin[1]], dtype=np.float32)
+        region_words = region.word_boxes / scale + offset
+
+        self.line_text[index] = " ".join(region.line_text)
+        self.line_conf[index] = region.confidence
+        keep = self.word_line != index
+        words = [w for w, kept in zip(self.word_text, keep) if kept] + list(region.word_text)
+        boxes = np.concatenate([self.word_boxes[keep], region_words])
+        conf = np.concatenate([self.word_conf[keep], region.word_conf])
+        lines = np.concatenate([self.word_line[keep], np.full(len(region.word_text), index, dtype=np.int32)])
+        # Back to reading order: by line, then left to right
+        order = np.lexsort((boxes[:, 0], lines))
+        self.word_text = [words[i] for i in order]
+        self.word_boxes = boxes[order]
+        self.word_conf = conf[order]
+        self.word_line = lines[order]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        JSON form: {"size": [w, h], "lines": {...}, "words": {...}}.
+
+        Each of lines/words holds "text", "conf" (0-1) and "boxes", a flat
+        x0, y0, x1, y1, ... list normalized to the image size; lines also
+        carry "block", words the index of their "line".
+        """
+        width, height = self.size
+        scale = np.array([width, height, width, height], dtype=np.float32)
+
+        # float64 before rounding so the JSON has no float32 noise digits
+        def flat(boxes: np.ndarray) -> List[float]:
+            return np.round(np.clip(boxes / scale, 0.0, 1.0).astype(np.float64), 4).reshape(-1).tolist()
+
+        def confidences(values: np.ndarray) -> List[float]:
+            return np.round(values.astype(np.float64), 3).tolist()
+
+        return {
+            "size": [width, height],
+            "lines": {
+                "text": list(self.line_text),
+                "boxes": flat(self.line_boxes),
+                "conf": confidences(self.line_conf),
+                "block": self.line_block.tolist(),
+            },
+            "words": {
+                "text": list(self.word_text),
+                "boxes": flat(self.word_boxes),
+                "conf": confidences(self.word_conf),
+                "line": self.word_line.tolist(),
+            },
+        }
@@ -0,0 +1,117 @@
+"""
+Process Pool - a lazily started spawn ProcessPoolExecutor that survives worker deaths.
+
+Shared by the OCR pool (document_ocr.py), the Whisper pool (transcription.py)
+and the inference executor's CPU pool. The pool starts on first use with the
+spawn start method, and is replaced when a worker dies (OOM kill, a native
+crash in PaddleOCR or torch): a broken ProcessPoolExecutor fails every later
+submission, so it is dropped and the next call starts a fresh one.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SpawnProcessPool:
+    """
+    Lazily created spawn ProcessPoolExecutor, replaced after BrokenProcessPool.
+
+    Usage:
+        pool = SpawnProcessPool("OCR", workers=2, initializer=_init_worker, initargs=(engines,))
+        future = pool.submit(func, *args)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = (),
+        description: str = "",
+        on_replaced: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Args:
+            name: Used in log messages
+            workers: Worker processes
+            initializer, initargs: Run once in each worker when it starts
+            description: Extra detail for the start log line
+            on_replaced: Called after a broken pool has been dropped
+        """
+        self.name = name
+        self.workers = max(1, workers)
+        self.initializer = initializer
+        self.initargs = initargs
+        self.description = description
+        self.on_replaced = on_replaced
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.started_at: Optional[float] = None
+        self.restarts = 0
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def get(self) -> ProcessPoolExecutor:
+        """The current pool, started if there is none."""
+        with self._lock:
+            if self._pool is None:
+                # spawn avoids forking a parent that already has torch/OpenMP threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                    initargs=self.initargs,
+                )
+                self.started_at = time.time()
+                detail = f", {self.description}" if self.description else ""
+                logger.info(f"Started {self.name} pool: {self.workers} worker(s){detail}")
+            return self._pool
+
+    def discard(self, pool: ProcessPoolExecutor) -> bool:
+        """
+        Drop a pool a worker died in, so the next get() starts a fresh one.
+
+        Returns False if pool was already replaced (each death is handled once).
+        """
+        with self._lock:
+            if self._pool is not pool:
+                return False
+            self._pool = None
+            self.started_at = None
+            self.restarts += 1
+            restarts = self.restarts
+        logger.error(f"A worker of the {self.name} pool died, replacing the pool (restart #{restarts})")
+        pool.shutdown(wait=False, cancel_futures=True)
+        if self.on_replaced is not None:
+            self.on_replaced()
+        return True
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Submit to the current pool, discarding it if it turns out to be broken."""
+        pool = self.get()
+        try:
+            future = pool.submit(func, *args)
+        except BrokenProcessPool:
+            self.discard(pool)
+            raise
+        future.add_done_callback(lambda f: self._check_broken(f, pool))
+        return future
+
+    def _check_broken(self, future: Future, pool: ProcessPoolExecutor) -> None:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self.discard(pool)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,224 @@
+"""
+Stage Metrics - per-request timings and Prometheus histograms for analysis stages.
+
+A stage is one step of an analysis (BLIP, Florence-2 OD, K-means colors, the
+Ollama scene classifier, thumbnail encoding, ...), so a slow request can be
+broken down by where its time went:
+
+- Times each stage function through the ``timed(stage)`` decorator or the
+  ``time(stage)`` context manager
+- Collects the stage timings of the current request (``collect()`` or the
+  ``collecting`` decorator) so an endpoint can return them in a ``timings`` block
+- Keeps a process-wide histogram per stage and per endpoint, rendered in the
+  Prometheus text exposition format for ``/metrics``
+
+Timings are collected per thread of execution through a ContextVar, so
+concurrent requests in the same lane never see each other's stages.
+
+Configuration (environment variables):
+- STAGE_METRICS_BUCKETS: comma-separated histogram bucket bounds in seconds
+  (default: 0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60)
+"""
+
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Timings (stage -> seconds) of the request running in the current context
+_current_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations for one label value."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs including +Inf."""
+        pairs = []
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            pairs.append((_format_bound(bound), running))
+        pairs.append(("+Inf", self.count))
+        return pairs
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+class StageMetrics:
+    """
+    Thread-safe stage and request timers.
+
+    Usage:
+        @stage_metrics.timed("caption")
+        def generate_caption(image): ...
+
+        with stage_metrics.collect() as timings:
+            generate_caption(image)
+        timings  # {"caption": 0.412}
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._stage_errors: Dict[str, int] = {}
+        self._requests: Dict[Tuple[str, str], Histogram] = {}
+
+    def observe(self, stage: str, seconds: float, failed: bool = False) -> None:
+        """Record one stage run in the histograms and the current request's timings."""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if failed:
+                self._stage_errors[stage] = self._stage_errors.get(stage, 0) + 1
+
+        timings = _current_timings.get()
+        if timings is not None:
+            # A stage that runs several times in one request (e.g. per keyframe) accumulates
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+    def observe_request(self, endpoint: str, method: str, seconds: float) -> None:
+        """Record one HTTP request duration."""
+        with self._lock:
+            key = (endpoint, method)
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time a block of code as one run of ``stage``."""
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, failed=failed)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """Decorator form of time()."""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def collect(self) -> Iterator[Dict[str, float]]:
+        """
+        Collect the stage timings recorded in this context.
+
+        Nested collect() calls share the outer request's dict, so helpers that
+        collect on their own still report into the endpoint that called them.
+        """
+        timings = _current_timings.get()
+        if timings is not None:
+            yield timings
+            return
+        timings = {}
+        token = _current_timings.set(timings)
+        try:
+            yield timings
+        finally:
+            _current_timings.reset(token)
+
+    def collecting(self, func: Callable) -> Callable:
+        """Decorator form of collect(), for the blocking body of an endpoint."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.collect():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def timings(self) -> Dict[str, float]:
+        """Copy of the stage timings collected so far in this context ({} outside collect())."""
+        return dict(_current_timings.get() or {})
+
+    def render_prometheus(self) -> str:
+        """All histograms in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            stages = {stage: (h.cumulative(), h.sum, h.count) for stage, h in sorted(self._stages.items())}
+            errors = dict(sorted(self._stage_errors.items()))
+            requests = {key: (h.cumulative(), h.sum, h.count) for key, h in sorted(self._requests.items())}
+
+        lines = [
+            "# HELP eye_stage_duration_seconds Time spent in each analysis stage.",
+            "# TYPE eye_stage_duration_seconds histogram",
+        ]
+        for stage, (buckets, total, count) in stages.items():
+            labels = f'stage="{_escape(stage)}"'
+            lines.extend(_histogram_lines("eye_stage_duration_seconds", labels, buckets, total, count))
+
+        lines.append("# HELP eye_stage_errors_total Analysis stage runs that raised an exception.")
+        lines.append("# TYPE eye_stage_errors_total counter")
+        for stage, count in errors.items():
+            lines.append(f'eye_stage_errors_total{{stage="{_escape(stage)}"}} {count}')
+
+        lines.append("# HELP eye_request_duration_seconds HTTP request duration by endpoint.")
+        lines.append("# TYPE eye_request_duration_seconds histogram")
+        for (endpoint, method), (buckets, total, count) in requests.items():
+            labels = f'endpoint="{_escape(endpoint)}",method="{_escape(method)}"'
+            lines.extend(_histogram_lines("eye_request_duration_seconds", labels, buckets, total, count))
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name: str, labels: str, buckets: List[Tuple[str, int]], total: float, count: int) -> List[str]:
+    lines = [f'{name}_bucket{{{labels},le="{le}"}} {value}' for le, value in buckets]
+    lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+    lines.append(f"{name}_count{{{labels}}} {count}")
+    return lines
+
+
+def timings_ms(timings: Dict[str, float]) -> Dict[str, float]:
+    """Seconds -> milliseconds, rounded, for response bodies."""
+    return {stage: round(seconds * 1000, 2) for stage, seconds in timings.items()}
+
+
+def create_stage_metrics() -> StageMetrics:
+    """Build StageMetrics from environment configuration."""
+    raw = os.getenv('STAGE_METRICS_BUCKETS', '')
+    buckets = DEFAULT_BUCKETS
+    if raw.strip():
+        try:
+            buckets = tuple(float(value) for value in raw.split(',') if value.strip())
+        except ValueError:
+            logger.warning(f"Invalid STAGE_METRICS_BUCKETS '{raw}', using defaults")
+    return StageMetrics(buckets)
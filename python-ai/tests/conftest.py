@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The service modules are top-level files in python-ai/, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,124 @@
+import time
+
+import numpy as np
+import pytest
+
+from analysis_cache import AnalysisCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnalysisCache(str(tmp_path), max_bytes=1024 * 1024)
+
+
+def test_round_trip_keyed_by_stage_and_options(cache):
+    cache.put("f1", "caption", {"model": "blip"}, "a cat")
+
+    assert cache.get("f1", "caption", {"model": "blip"}) == "a cat"
+    assert cache.get("f1", "caption", {"model": "florence"}) is None
+    assert cache.get("f1", "objects", {"model": "blip"}) is None
+    assert cache.get("f2", "caption", {"model": "blip"}) is None
+
+
+def test_missing_file_hash_is_never_cached(cache):
+    cache.put(None, "caption", None, "a cat")
+    assert cache.get(None, "caption") is None
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("empty", [None, [], {}, "", np.zeros(0)])
+def test_empty_results_are_not_cached(cache, empty):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return empty
+
+    cache.get_or_compute("f1", "faces", None, compute)
+    cache.get_or_compute("f1", "faces", None, compute)
+
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_get_or_compute_encodes_and_decodes(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(3, dtype=np.float32)
+
+    for _ in range(2):
+        value = cache.get_or_compute(
+            "f1", "embedding", {"model": "clip"}, compute,
+            encode=lambda v: v.tolist(), decode=lambda v: np.asarray(v, dtype=np.float32),
+        )
+        assert value.tolist() == [0.0, 1.0, 2.0]
+    assert len(calls) == 1
+
+
+def test_evicts_least_recently_used(tmp_path):
+    value = "x" * 100  # 102 bytes as JSON
+    cache = AnalysisCache(str(tmp_path), max_bytes=350)
+    cache.put("a", "caption", None, value)
+    time.sleep(0.01)
+    cache.put("b", "caption", None, value)
+    time.sleep(0.01)
+    cache.get("a", "caption")  # b is now least recently used
+    time.sleep(0.01)
+    cache.put("c", "caption", None, value)
+    time.sleep(0.01)
+    cache.put("d", "caption", None, value)
+
+    assert cache.get("b", "caption") is None
+    assert cache.get("a", "caption") == value
+    assert cache.get("d", "caption") == value
+    stats = cache.stats()
+    assert stats["evictions"] >= 1
+    assert stats["entries"] == 4 - stats["evictions"]
+
+
+def test_replacing_an_entry_does_not_grow_the_count(cache):
+    cache.put("f1", "caption", None, "first")
+    cache.put("f1", "caption", None, "second")
+
+    assert cache.get("f1", "caption") == "second"
+    assert cache.stats()["entries"] == 1
+
+
+def test_entries_survive_reopening(tmp_path):
+    AnalysisCache(str(tmp_path), max_bytes=1024 * 1024).put("f1", "caption", None, "a cat")
+
+    reopened = AnalysisCache(str(tmp_path), max_bytes=1024 * 1024)
+
+    assert reopened.stats()["entries"] == 1
+    assert reopened.get("f1", "caption") == "a cat"
+
+
+def test_hit_and_miss_counters(cache):
+    cache.put("f1", "caption", None, "a cat")
+    cache.get("f1", "caption")
+    cache.get("f2", "caption")
+
+    stats = cache.stats()
+    assert stats["stages"] == {"caption": {"hits": 1, "misses": 1}}
+    assert stats["hit_rate"] == 0.5
+
+
+def test_file_hash_follows_contents(cache, tmp_path):
+    path = tmp_path / "image.bin"
+    path.write_bytes(b"one")
+    first = cache.file_hash(str(path))
+    assert cache.file_hash(str(path)) == first
+
+    path.write_bytes(b"two!")
+    assert cache.file_hash(str(path)) != first
+    assert cache.file_hash(str(tmp_path / "missing.bin")) is None
+
+
+def test_disabled_cache_always_misses(tmp_path):
+    cache = AnalysisCache(str(tmp_path), max_bytes=1024, enabled=False)
+    cache.put("f1", "caption", None, "a cat")
+
+    assert cache.get("f1", "caption") is None
+    assert cache.stats()["enabled"] is False
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from batching import MicroBatcher
+
+
+def recording_batcher(max_batch_size=16, max_wait_ms=200.0):
+    batches = []
+
+    def double(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    return MicroBatcher("test", double, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms), batches
+
+
+def test_coalesces_concurrent_items_in_order():
+    batcher, batches = recording_batcher()
+    futures = [batcher.submit(i) for i in range(5)]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["batch_size_histogram"] == {5: 1}
+    batcher.close()
+
+
+def test_splits_at_max_batch_size():
+    batcher, batches = recording_batcher(max_batch_size=2)
+    futures = [batcher.submit(i) for i in range(5)]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6, 8]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    batcher.close()
+
+
+def test_failure_reaches_every_caller_in_the_batch():
+    def broken(items):
+        raise ValueError("model crashed")
+
+    batcher = MicroBatcher("test", broken, max_wait_ms=200.0)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(ValueError, match="model crashed"):
+            future.result(timeout=5)
+    assert batcher.stats()["failed_batches"] == 1
+    batcher.close()
+
+
+def test_wrong_result_count_is_an_error():
+    batcher = MicroBatcher("test", lambda items: items[:-1], max_wait_ms=200.0)
+    futures = [batcher.submit(i) for i in range(2)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="returned 1 results for 2 items"):
+            future.result(timeout=5)
+    batcher.close()
+
+
+def test_cancelled_items_are_skipped():
+    release = threading.Event()
+    batches = []
+
+    def blocking(items):
+        batches.append(list(items))
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher("test", blocking, max_batch_size=1, max_wait_ms=0.0)
+    first = batcher.submit("first")
+    while not batches:
+        time.sleep(0.01)
+    cancelled = batcher.submit("cancelled")
+    assert cancelled.cancel()
+    last = batcher.submit("last")
+    release.set()
+
+    assert first.result(timeout=5) == "first"
+    assert last.result(timeout=5) == "last"
+    assert batches == [["first"], ["last"]]
+    batcher.close()
+
+
+def test_close_drains_queued_items_then_rejects_new_ones():
+    batcher, _ = recording_batcher(max_wait_ms=0.0)
+    futures = [batcher.submit(i) for i in range(3)]
+    batcher.close()
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(4)
@@ -0,0 +1,187 @@
+import threading
+import time
+
+import pytest
+
+from model_registry import ModelRegistry, ModelUnavailableError
+
+MB = 1024 * 1024
+
+
+class FakeTensor:
+    def __init__(self, size: int):
+        self.size = size
+
+    def numel(self) -> int:
+        return self.size
+
+    def element_size(self) -> int:
+        return 1
+
+
+class FakeModel:
+    """Looks like a torch module to estimate_model_bytes."""
+
+    def __init__(self, size: int):
+        self.tensors = [FakeTensor(size)]
+
+    def parameters(self):
+        return iter(self.tensors)
+
+
+def counting_loader(calls, name, size=MB, delay=0.0):
+    def load():
+        calls.append(name)
+        if delay:
+            time.sleep(delay)
+        return FakeModel(size)
+    return load
+
+
+def test_loads_lazily_and_once():
+    calls = []
+    registry = ModelRegistry()
+    registry.register("a", counting_loader(calls, "a"))
+    assert registry.state("a") == "unloaded"
+    assert calls == []
+
+    first = registry.get("a")
+    assert registry.get("a") is first
+    assert calls == ["a"]
+    assert registry.ready("a")
+
+
+def test_concurrent_first_use_loads_once():
+    calls = []
+    registry = ModelRegistry()
+    registry.register("a", counting_loader(calls, "a", delay=0.05))
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("a"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["a"]
+    assert all(result is results[0] for result in results)
+
+
+def test_failed_load_is_remembered_until_retried():
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise OSError("download failed")
+
+    registry = ModelRegistry()
+    registry.register("a", broken)
+    for _ in range(3):
+        with pytest.raises(ModelUnavailableError):
+            registry.get("a")
+    assert len(attempts) == 1
+    assert registry.get_or_none("a") is None
+    assert not registry.available("a")
+
+    with pytest.raises(ModelUnavailableError):
+        registry.pin("a")
+    assert len(attempts) == 2
+    assert registry.stats()["models"]["a"]["pinned"] is False
+
+
+def test_unknown_model_raises():
+    with pytest.raises(ModelUnavailableError):
+        ModelRegistry().get("missing")
+
+
+def test_evicts_least_recently_used_over_budget():
+    calls = []
+    registry = ModelRegistry(budget_bytes=2 * MB)
+    for name in "abc":
+        registry.register(name, counting_loader(calls, name))
+
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")  # b is now least recently used
+    registry.get("c")
+
+    assert registry.is_loaded("a")
+    assert not registry.is_loaded("b")
+    assert registry.is_loaded("c")
+    assert registry.resident_bytes() == 2 * MB
+    # An evicted model stays ready and reloads on the next use
+    assert registry.ready("b")
+    registry.get("b")
+    assert calls.count("b") == 2
+
+
+def test_pinned_models_are_not_evicted():
+    registry = ModelRegistry(budget_bytes=MB, pinned=["a"])
+    for name in "ab":
+        registry.register(name, counting_loader([], name))
+
+    registry.get("a")
+    registry.get("b")
+    assert registry.is_loaded("a")
+    assert registry.unload("a") is False
+
+    registry.unpin("a")
+    assert not registry.is_loaded("a")
+
+
+def test_model_in_use_is_not_evicted():
+    registry = ModelRegistry(budget_bytes=MB)
+    for name in "abc":
+        registry.register(name, counting_loader([], name))
+
+    with registry.use("a") as held:
+        registry.get("b")
+        assert registry.is_loaded("a")
+        assert registry.unload("a") is False
+        assert registry.stats()["models"]["a"]["in_use"] == 1
+    assert registry.stats()["models"]["a"]["in_use"] == 0
+
+    registry.get("c")
+    assert not registry.is_loaded("a")
+    assert held is not None
+
+
+def test_use_never_yields_an_evicted_model():
+    # Budget for one model while threads alternate between two: every use()
+    # must hold a model that stays loaded until the block exits
+    registry = ModelRegistry(budget_bytes=MB)
+    for name in "ab":
+        registry.register(name, counting_loader([], name))
+    errors = []
+
+    def worker(name):
+        try:
+            for _ in range(200):
+                with registry.use(name) as value:
+                    assert value is not None
+                    assert registry.is_loaded(name)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=("ab"[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert all(model["in_use"] == 0 for model in registry.stats()["models"].values())
+
+
+def test_preload_reports_errors_per_model():
+    def missing_weights():
+        raise OSError("no weights")
+
+    registry = ModelRegistry()
+    registry.register("a", counting_loader([], "a"))
+    registry.register("b", missing_weights)
+
+    results = registry.preload(["a", "b"], max_workers=2)
+
+    assert results["a"] is None
+    assert "no weights" in results["b"]
@@ -0,0 +1,86 @@
+import numpy as np
+
+from ocr_layout import TESSERACT_WORD_LEVEL, OCRLayout
+
+
+def tesseract_data(words):
+    """image_to_data-style dict from (block, par, line, text, left, top, width, height, conf) rows."""
+    data = {key: [] for key in (
+        "level", "block_num", "par_num", "line_num", "text", "left", "top", "width", "height", "conf"
+    )}
+    # A block-level row, which from_tesseract must skip
+    for key, value in zip(data, (2, 1, 0, 0, "", 0, 0, 100, 100, -1)):
+        data[key].append(value)
+    for block, par, line, text, left, top, width, height, conf in words:
+        for key, value in zip(data, (TESSERACT_WORD_LEVEL, block, par, line, text, left, top, width, height, conf)):
+            data[key].append(value)
+    return data
+
+
+def sample_layout():
+    return OCRLayout.from_tesseract(tesseract_data([
+        (1, 1, 1, "Hello", 10, 10, 50, 20, 90),
+        (1, 1, 1, "world", 70, 12, 60, 20, 70),
+        (1, 1, 1, "  ", 140, 10, 5, 20, 95),
+        (1, 1, 2, "again", 10, 40, 55, 20, -1),
+        (2, 1, 1, "Footer", 10, 200, 80, 15, 100),
+    ]), size=(400, 300))
+
+
+def test_words_are_grouped_into_lines():
+    layout = sample_layout()
+
+    assert layout.line_text == ["Hello world", "again", "Footer"]
+    assert layout.line_block.tolist() == [1, 1, 2]
+    assert layout.word_line.tolist() == [0, 0, 1, 2]
+    assert layout.text == "Hello world\nagain\n\nFooter"
+
+
+def test_line_boxes_are_word_unions_and_confidence_their_mean():
+    layout = sample_layout()
+
+    np.testing.assert_allclose(layout.line_boxes[0], [10, 10, 130, 32])
+    np.testing.assert_allclose(layout.line_boxes[2], [10, 200, 90, 215])
+    # Tesseract's -1 (no confidence) counts as 0
+    np.testing.assert_allclose(layout.line_conf, [0.8, 0.0, 1.0], atol=1e-6)
+    assert layout.low_confidence_lines(0.9, limit=5) == [1, 0]
+
+
+def test_empty_page():
+    layout = OCRLayout.from_tesseract(tesseract_data([]), size=(10, 10))
+
+    assert layout.line_text == []
+    assert layout.text == ""
+    assert layout.confidence == 0.0
+    assert layout.to_dict()["words"]["boxes"] == []
+
+
+def test_replace_line_maps_the_crop_back_into_page_pixels():
+    layout = sample_layout()
+    # The crop of line 1 was rendered at 2x with its top-left at (5, 35)
+    region = OCRLayout.from_tesseract(tesseract_data([
+        (1, 1, 1, "a", 10, 10, 30, 40, 92),
+        (1, 1, 1, "gain", 60, 10, 60, 40, 96),
+    ]), size=(200, 60))
+
+    layout.replace_line(1, region, origin=(5, 35), scale=2.0)
+
+    assert layout.line_text[1] == "a gain"
+    assert layout.line_conf[1] == region.confidence
+    # Words stay in reading order: by line, then left to right
+    assert layout.word_text == ["Hello", "world", "a", "gain", "Footer"]
+    assert layout.word_line.tolist() == [0, 0, 1, 1, 2]
+    np.testing.assert_allclose(layout.word_boxes[2], [10, 40, 25, 60])
+    np.testing.assert_allclose(layout.word_boxes[3], [35, 40, 65, 60])
+    np.testing.assert_allclose(layout.word_conf[2:4], [0.92, 0.96], atol=1e-6)
+    # Other lines are untouched
+    assert layout.line_text[0] == "Hello world"
+    np.testing.assert_allclose(layout.word_boxes[4], [10, 200, 90, 215])
+
+
+def test_to_dict_normalizes_boxes_to_the_page():
+    data = sample_layout().to_dict()
+
+    assert data["size"] == [400, 300]
+    assert data["lines"]["boxes"][:4] == [0.025, 0.0333, 0.325, 0.1067]
+    assert data["words"]["line"] == [0, 0, 1, 2]
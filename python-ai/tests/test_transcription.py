@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from transcription import (
+    SAMPLE_RATE,
+    VAD_FRAME_SAMPLES,
+    merge_chunk_results,
+    plan_chunks,
+    transcribe_samples,
+)
+
+
+def tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    return np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+
+
+def test_chunks_cut_inside_silences_and_respect_the_maximum():
+    # 1.5s of speech then 0.6s of silence, seven times
+    samples = np.concatenate([np.concatenate([tone(1.5), silence(0.6)]) for _ in range(7)])
+
+    chunks = plan_chunks(samples, max_chunk_seconds=5.0, min_chunk_seconds=1.0)
+
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[0].start == 0
+    assert chunks[-1].end == len(samples)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start == previous.end
+    for chunk in chunks:
+        assert chunk.end - chunk.start <= 5.0 * SAMPLE_RATE
+        assert chunk.start % VAD_FRAME_SAMPLES == 0
+    # Every cut but the last lands in a silence, never mid-word
+    for chunk in chunks[:-1]:
+        assert not np.any(samples[chunk.end - VAD_FRAME_SAMPLES:chunk.end + VAD_FRAME_SAMPLES])
+
+
+def test_speech_without_pauses_is_cut_at_the_maximum():
+    chunks = plan_chunks(tone(12.0), max_chunk_seconds=5.0, min_chunk_seconds=1.0)
+
+    assert [(chunk.start_seconds, chunk.end_seconds) for chunk in chunks] == [(0.0, 4.98), (4.98, 9.96), (9.96, 12.0)]
+
+
+def test_silent_stretches_are_dropped():
+    samples = np.concatenate([silence(12.0), tone(2.0)])
+
+    chunks = plan_chunks(samples, max_chunk_seconds=5.0, min_chunk_seconds=1.0)
+
+    assert len(chunks) == 1
+    assert chunks[0].index == 0
+    assert chunks[0].end == len(samples)
+    assert chunks[0].start_seconds >= 9.0
+
+
+class FakeWhisper:
+    def __init__(self, segments, language="en"):
+        self.segments = segments
+        self.language = language
+
+    def transcribe(self, samples, **kwargs):
+        return {"language": self.language, "segments": self.segments}
+
+
+def test_segment_times_are_shifted_by_the_chunk_offset():
+    model = FakeWhisper([
+        {"start": 0.0, "end": 1.25, "text": " Hello ", "avg_logprob": -0.1},
+        {"start": 1.25, "end": 2.0, "text": "   "},
+        {"start": 2.0, "end": 3.5, "text": "world"},
+    ])
+
+    result = transcribe_samples(model, silence(4.0), offset_seconds=30.0, language=None)
+
+    assert result["language"] == "en"
+    assert [(s["start"], s["end"], s["text"]) for s in result["segments"]] == [
+        (30.0, 31.25, "Hello"),
+        (32.0, 33.5, "world"),
+    ]
+
+
+def test_merge_orders_segments_across_chunks():
+    second = {"language": "de", "segments": [
+        {"start": 30.0, "end": 31.0, "text": "zwei", "avg_logprob": 0.0},
+    ]}
+    first = {"language": "en", "segments": [
+        {"start": 0.5, "end": 4.5, "text": "one", "avg_logprob": 0.0},
+        {"start": 5.0, "end": 9.0, "text": "two", "avg_logprob": np.log(0.5)},
+    ]}
+
+    merged = merge_chunk_results([second, first], duration_seconds=31.0004)
+
+    assert merged["text"] == "one two zwei"
+    assert [(s["id"], s["start"], s["end"]) for s in merged["segments"]] == [
+        (0, 0.5, 4.5), (1, 5.0, 9.0), (2, 30.0, 31.0),
+    ]
+    # English covers 8s of speech, German 1s
+    assert merged["language"] == "en"
+    assert merged["confidence"] == pytest.approx((4 * 1.0 + 4 * 0.5 + 1 * 1.0) / 9, abs=1e-4)
+    assert merged["duration_seconds"] == 31.0
+
+
+def test_merge_of_nothing():
+    merged = merge_chunk_results([], duration_seconds=0.0)
+
+    assert merged["text"] == ""
+    assert merged["language"] == "unknown"
+    assert merged["confidence"] == 0.0
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+sf = pytest.importorskip("soundfile")
+
+from waveform import compute_envelope, render_envelope
+
+
+def write_wav(path, samples, rate=8000):
+    sf.write(str(path), samples, rate, subtype="FLOAT")
+    return str(path)
+
+
+def reference_envelope(samples, columns):
+    """Direct per-column reduction: frame i belongs to column (i * columns) // len(samples)."""
+    owner = (np.arange(len(samples)) * columns) // len(samples)
+    groups = [samples[owner == column] for column in range(columns)]
+    return (
+        np.array([g.min() for g in groups]),
+        np.array([g.max() for g in groups]),
+        np.array([np.sqrt(np.mean(g.astype(np.float64) ** 2)) for g in groups]),
+    )
+
+
+@pytest.mark.parametrize("frames,columns,block_frames", [
+    (1000, 7, 64),     # columns do not divide the frames
+    (1000, 7, 1000),   # one block
+    (999, 100, 10),    # blocks smaller than a column
+    (12345, 640, 333),
+])
+def test_columns_match_a_direct_reduction(tmp_path, frames, columns, block_frames):
+    samples = np.random.default_rng(frames).uniform(-1, 1, frames).astype(np.float32)
+    path = write_wav(tmp_path / "audio.wav", samples)
+
+    envelope = compute_envelope(path, columns, block_frames=block_frames)
+
+    mins, maxs, rms = reference_envelope(samples, columns)
+    np.testing.assert_array_equal(envelope["min"], mins)
+    np.testing.assert_array_equal(envelope["max"], maxs)
+    np.testing.assert_allclose(envelope["rms"], rms, rtol=1e-5)
+    assert envelope["duration_seconds"] == pytest.approx(frames / 8000)
+
+
+def test_a_column_boundary_inside_a_block(tmp_path):
+    # Each column holds a constant value, so any frame counted in the wrong
+    # column shows up as a min/max mismatch
+    frames, columns = 1000, 7
+    samples = (((np.arange(frames) * columns) // frames) / 10).astype(np.float32)
+    path = write_wav(tmp_path / "steps.wav", samples)
+
+    envelope = compute_envelope(path, columns, block_frames=50)
+
+    expected = np.arange(columns, dtype=np.float32) / 10
+    np.testing.assert_allclose(envelope["min"], expected, atol=1e-7)
+    np.testing.assert_allclose(envelope["max"], expected, atol=1e-7)
+
+
+def test_stereo_is_mixed_down(tmp_path):
+    left = np.full(800, 0.5, dtype=np.float32)
+    path = write_wav(tmp_path / "stereo.wav", np.stack([left, -left], axis=1))
+
+    envelope = compute_envelope(path, 4)
+
+    np.testing.assert_allclose(envelope["max"], 0.0)
+    np.testing.assert_allclose(envelope["rms"], 0.0)
+
+
+def test_more_columns_than_frames(tmp_path):
+    path = write_wav(tmp_path / "short.wav", np.ones(5, dtype=np.float32))
+
+    envelope = compute_envelope(path, 100)
+
+    assert len(envelope["min"]) == 5
+
+
+def test_render_fills_the_requested_size(tmp_path):
+    samples = np.sin(np.linspace(0, 40, 4000)).astype(np.float32)
+    envelope = compute_envelope(write_wav(tmp_path / "sine.wav", samples), 120)
+
+    image = render_envelope(envelope, (120, 40))
+
+    assert image.size == (120, 40)
+    assert image.mode == "RGB"
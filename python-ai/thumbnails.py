@@ -0,0 +1,309 @@
+"""
+Thumbnail Service - multi-size, multi-format thumbnails with skip-if-fresh.
+
+The ThumbnailService writes the thumbnails of images, videos, documents and
+audio files:
+
+- Produces every configured size from one render of the source, largest
+  first, each downscaled progressively (2x box reductions, then one LANCZOS
+  pass) from the previous size instead of from the original
+- Writes each configured format (JPEG, WebP, AVIF where Pillow supports it)
+- Skips the render entirely when the thumbnails on disk are up to date with
+  the source, judged by size + mtime or by a content hash
+- Writes every file to a temporary name in the same directory and renames it
+  into place, so readers only ever see a complete thumbnail
+
+Layout, next to the source file:
+
+    thumbnails/<stem>.jpg             largest size, first format (returned as thumbnail_path)
+    thumbnails/<stem>_<size>.<ext>    every other size/format
+    thumbnails/<stem>.thumbs.json     manifest: source signature and settings
+
+Configuration (environment variables):
+- THUMBNAIL_SIZES: comma-separated long-side sizes in pixels (default: 800)
+- THUMBNAIL_FORMATS: comma-separated formats: jpeg, webp, avif (default: jpeg)
+- THUMBNAIL_QUALITY: encoder quality 1-100 (default: 85)
+- THUMBNAIL_FRESHNESS: "mtime" (size + mtime), "hash" (SHA-256 of the
+  source) or "off" (always regenerate) (default: mtime)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from PIL import Image, features
+
+from image_context import ImageContext
+
+logger = logging.getLogger(__name__)
+
+# Bump when the rendering changes so existing thumbnails are regenerated
+THUMBNAIL_VERSION = 1
+
+# format -> (file extension, Pillow format name, Pillow feature that must be present)
+FORMATS = {
+    "jpeg": ("jpg", "JPEG", None),
+    "webp": ("webp", "WEBP", "webp"),
+    "avif": ("avif", "AVIF", "avif"),
+}
+
+FRESHNESS_MODES = ("mtime", "hash", "off")
+
+
+def progressive_downscale(image: Image.Image, max_side: int) -> Image.Image:
+    """
+    Scale image so its longer side is at most max_side.
+
+    Halves with box filtering (Image.reduce) while the image is at least twice
+    the target, then finishes with one LANCZOS resize. Returns image itself
+    when it is already small enough.
+    """
+    width, height = image.size
+    if max(width, height) <= max_side:
+        return image
+    while max(image.size) >= 2 * max_side:
+        image = image.reduce(2)
+    scale = max_side / max(width, height)
+    target = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(target, Image.Resampling.LANCZOS)
+
+
+def _atomic_save(image: Image.Image, path: Path, pillow_format: str, quality: int) -> None:
+    """Encode to a temporary file in path's directory, then rename it over path."""
+    options = {"quality": quality}
+    if pillow_format == "JPEG":
+        options["optimize"] = True
+    elif pillow_format == "WEBP":
+        options["method"] = 4
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            image.save(f, pillow_format, **options)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _atomic_write_json(data: Dict[str, Any], path: Path) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+class ThumbnailService:
+    """
+    Generates the configured thumbnail set for a source file.
+
+    Usage:
+        path = thumbnail_service.generate(video_path, lambda: first_frame_image)
+
+    The render callable is only invoked when the thumbnails are stale. It
+    returns a PIL image or ImageContext at any resolution (or None on failure).
+    """
+
+    def __init__(
+        self,
+        sizes: Sequence[int] = (800,),
+        formats: Sequence[str] = ("jpeg",),
+        quality: int = 85,
+        freshness: str = "mtime",
+    ):
+        self.sizes = sorted({int(size) for size in sizes if int(size) > 0}, reverse=True) or [800]
+        self.formats = self._supported_formats(formats)
+        self.quality = max(1, min(100, quality))
+        self.freshness = freshness if freshness in FRESHNESS_MODES else "mtime"
+        self._lock = threading.Lock()
+        self._generated = 0
+        self._skipped = 0
+        self._failed = 0
+
+    @staticmethod
+    def _supported_formats(formats: Sequence[str]) -> List[str]:
+        supported = []
+        for name in formats:
+            name = name.strip().lower()
+            if name == "jpg":
+                name = "jpeg"
+            if name not in FORMATS:
+                logger.warning(f"Unknown thumbnail format '{name}', ignoring")
+                continue
+            feature = FORMATS[name][2]
+            if feature and not features.check(feature):
+                logger.warning(f"Pillow was built without {name} support, skipping {name} thumbnails")
+                continue
+            if name not in supported:
+                supported.append(name)
+        return supported or ["jpeg"]
+
+    @property
+    def max_size(self) -> int:
+        """Largest configured size (long side, pixels)."""
+        return self.sizes[0]
+
+    def thumbnail_dir(self, source_path: Union[str, Path]) -> Path:
+        return Path(source_path).parent / "thumbnails"
+
+    def variant_paths(self, source_path: Union[str, Path]) -> Dict[str, Path]:
+        """"<size>.<ext>" -> path for every configured size and format, largest size first."""
+        source = Path(source_path)
+        directory = self.thumbnail_dir(source)
+        paths = {}
+        for size in self.sizes:
+            for name in self.formats:
+                extension = FORMATS[name][0]
+                filename = f"{source.stem}.{extension}" if size == self.max_size else f"{source.stem}_{size}.{extension}"
+                paths[f"{size}.{extension}"] = directory / filename
+        return paths
+
+    def primary_path(self, source_path: Union[str, Path]) -> Path:
+        """Largest size in the first format; the path reported as thumbnail_path."""
+        return next(iter(self.variant_paths(source_path).values()))
+
+    def _manifest_path(self, source_path: Path) -> Path:
+        return self.thumbnail_dir(source_path) / f"{source_path.stem}.thumbs.json"
+
+    def _signature(self, source_path: Path, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """What the thumbnails were rendered from; a mismatch means they are stale."""
+        stat = source_path.stat()
+        signature: Dict[str, Any] = {
+            "v": THUMBNAIL_VERSION,
+            "source": source_path.name,
+            "sizes": self.sizes,
+            "formats": self.formats,
+            "quality": self.quality,
+            "options": options or {},
+        }
+        if self.freshness == "hash":
+            digest = hashlib.sha256()
+            with open(source_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            signature["sha256"] = digest.hexdigest()
+        else:
+            signature["size"] = stat.st_size
+            signature["mtime_ns"] = stat.st_mtime_ns
+        return signature
+
+    def is_fresh(self, source_path: Union[str, Path], signature: Optional[Dict[str, Any]] = None) -> bool:
+        """True when every variant exists and was rendered from the current source and settings."""
+        if self.freshness == "off":
+            return False
+        source = Path(source_path)
+        try:
+            with open(self._manifest_path(source)) as f:
+                manifest = json.load(f)
+            if manifest != (signature or self._signature(source)):
+                return False
+        except (OSError, ValueError):
+            return False
+        return all(path.exists() for path in self.variant_paths(source).values())
+
+    def generate(
+        self,
+        source_path: Union[str, Path],
+        render: Callable[[], Optional[Union[Image.Image, ImageContext]]],
+        force: bool = False,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        """
+        Make sure the thumbnail set for source_path is up to date.
+
+        Args:
+            source_path: Original media file (names the thumbnails and drives freshness)
+            render: Returns the full picture to thumbnail; only called when stale
+            force: Regenerate even if the thumbnails are fresh
+            options: Rendering settings that should invalidate the thumbnails when changed
+
+        Returns:
+            Path of the primary thumbnail, or None if rendering failed
+        """
+        source = Path(source_path)
+        try:
+            signature = self._signature(source, options) if self.freshness != "off" else None
+            if not force and signature is not None and self.is_fresh(source, signature):
+                with self._lock:
+                    self._skipped += 1
+                logger.debug(f"Thumbnails for {source.name} are up to date")
+                return str(self.primary_path(source))
+
+            rendered = render()
+            if rendered is None:
+                with self._lock:
+                    self._failed += 1
+                return None
+
+            self.thumbnail_dir(source).mkdir(parents=True, exist_ok=True)
+            self._write_variants(source, rendered)
+            if signature is not None:
+                _atomic_write_json(signature, self._manifest_path(source))
+
+            with self._lock:
+                self._generated += 1
+            return str(self.primary_path(source))
+
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            logger.error(f"Failed to generate thumbnails for {source_path}: {str(e)}")
+            return None
+
+    def _write_variants(self, source: Path, rendered: Union[Image.Image, ImageContext]) -> None:
+        paths = self.variant_paths(source)
+        context = rendered if isinstance(rendered, ImageContext) else None
+        current = None if context else (rendered if rendered.mode == "RGB" else rendered.convert("RGB"))
+        for size in self.sizes:
+            if context is not None:
+                # The context's pyramid already holds reduced levels of the decode
+                scaled = context.level(size)
+            else:
+                # Each size is downscaled from the previous, smaller-than-original one
+                current = progressive_downscale(current, size)
+                scaled = current
+            for name in self.formats:
+                extension, pillow_format, _ = FORMATS[name]
+                _atomic_save(scaled, paths[f"{size}.{extension}"], pillow_format, self.quality)
+
+    def existing_variants(self, source_path: Union[str, Path]) -> Dict[str, str]:
+        """Variants present on disk, "<size>.<ext>" -> path."""
+        return {key: str(path) for key, path in self.variant_paths(source_path).items() if path.exists()}
+
+    def stats(self) -> Dict[str, Any]:
+        """Settings and generated/skipped/failed counters, for /health."""
+        with self._lock:
+            return {
+                "sizes": self.sizes,
+                "formats": self.formats,
+                "freshness": self.freshness,
+                "generated": self._generated,
+                "skipped_fresh": self._skipped,
+                "failed": self._failed,
+            }
+
+
+def create_thumbnail_service() -> ThumbnailService:
+    """Build a ThumbnailService from environment configuration."""
+    sizes = [int(v) for v in os.getenv('THUMBNAIL_SIZES', '800').split(',') if v.strip().isdigit()]
+    formats = [v for v in os.getenv('THUMBNAIL_FORMATS', 'jpeg').split(',') if v.strip()]
+    return ThumbnailService(
+        sizes=sizes or [800],
+        formats=formats or ["jpeg"],
+        quality=int(os.getenv('THUMBNAIL_QUALITY', '85')),
+        freshness=os.getenv('THUMBNAIL_FRESHNESS', 'mtime').strip().lower(),
+    )
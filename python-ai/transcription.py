@@ -0,0 +1,594 @@
+"""
+Transcription - VAD-chunked, parallel Whisper transcription with job progress.
+
+Long recordings are split so they transcribe in parallel and report
+progress as they go:
+
+- Loads the audio once at Whisper's 16kHz mono, decoding and resampling it
+  block by block
+- Finds speech with an energy VAD (30ms frames, threshold relative to the
+  noise floor) and cuts the audio into chunks of at most
+  TRANSCRIBE_CHUNK_SECONDS at the latest silence, so no word is split;
+  chunks with no speech at all are never sent to Whisper
+- Transcribes the chunks concurrently in a pool of worker processes, each
+  holding its own Whisper model (spawn context, loaded once per worker),
+  with at most two chunks per worker in flight so memory stays bounded
+- Shifts each chunk's segment timestamps by the chunk's offset and merges
+  them in time order into one transcript with segment-level results
+- Tracks background jobs (TranscriptionJobs) whose progress events can be
+  polled or streamed while chunks complete
+- Groups consecutive segments into short, timestamped windows
+  (``transcript_windows``) that fit a text encoder's context, so the whole
+  transcript can be embedded and a search hit maps back to a time
+
+Short files (a single chunk) and TRANSCRIBE_WORKERS=0 transcribe in-process
+with the caller's model instead of starting the pool.
+
+Configuration (environment variables):
+- TRANSCRIBE_WORKERS: worker processes (default: 2; 0 = in-process only)
+- TRANSCRIBE_THREADS_PER_WORKER: torch threads per worker (default: CPUs / workers)
+- TRANSCRIBE_CHUNK_SECONDS: longest chunk sent to Whisper (default: 30)
+- TRANSCRIBE_MIN_CHUNK_SECONDS: shortest chunk a silence may end (default: 5)
+- VAD_MIN_SILENCE_SECONDS: silence long enough to cut at (default: 0.3)
+- VAD_MARGIN_DB: speech threshold above the noise floor (default: 12)
+- TRANSCRIBE_JOB_TTL_SECONDS: how long finished jobs stay queryable (default: 3600)
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from process_pool import SpawnProcessPool
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000           # Whisper's input rate
+VAD_FRAME_SAMPLES = 480       # 30ms at 16kHz
+VAD_MIN_DB = -50.0            # never treat anything quieter than this as speech
+LOAD_BLOCK_SECONDS = 30       # native-rate audio decoded per read in load_audio
+RESAMPLE_CONTEXT = 1024       # neighbouring input samples resampled with each block
+
+# Whisper model held by this worker process (set by _init_worker)
+_worker_model = None
+
+
+@dataclass
+class AudioChunk:
+    """A span of the 16kHz signal sent to Whisper as one call."""
+    index: int
+    start: int  # sample offsets
+    end: int
+    speech_ratio: float
+
+    @property
+    def start_seconds(self) -> float:
+        return self.start / SAMPLE_RATE
+
+    @property
+    def end_seconds(self) -> float:
+        return self.end / SAMPLE_RATE
+
+
+def load_audio(path: str) -> np.ndarray:
+    """
+    Decode a file to 16kHz mono float32.
+
+    soundfile + polyphase resampling handles WAV/FLAC/OGG/MP3 without
+    ffmpeg; anything else goes through whisper.load_audio (ffmpeg).
+    """
+    if SOUNDFILE_AVAILABLE:
+        try:
+            with sf.SoundFile(path) as f:
+                return _read_mono_16k(f)
+        except Exception as e:
+            logger.debug(f"soundfile could not decode {path} ({str(e)}), using ffmpeg")
+    import whisper
+    return whisper.load_audio(path)
+
+
+def _read_mono_16k(f: "sf.SoundFile") -> np.ndarray:
+    """
+    Read an open file in LOAD_BLOCK_SECONDS blocks, mixing down and resampling each.
+
+    Only one block is held at the native rate and channel count, so an hour
+    of 48kHz stereo never exists in memory at once. Each block is resampled
+    together with RESAMPLE_CONTEXT samples on either side, which are then
+    trimmed, so block edges match resampling the whole signal in one call.
+    """
+    divisor = math.gcd(SAMPLE_RATE, f.samplerate)
+    up, down = SAMPLE_RATE // divisor, f.samplerate // divisor
+    # Multiples of `down` input samples map to a whole number of output samples
+    block = max(1, LOAD_BLOCK_SECONDS * f.samplerate // down) * down
+    context = 0 if up == down else -(-RESAMPLE_CONTEXT // down) * down
+
+    parts = []
+    for start in range(0, f.frames, block):
+        read_from = max(0, start - context)
+        read_to = min(f.frames, start + block + context)
+        f.seek(read_from)
+        samples = f.read(read_to - read_from, dtype='float32', always_2d=True)
+        samples = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+        if up != down:
+            from scipy.signal import resample_poly
+            lead = (start - read_from) * up // down
+            length = -(-min(block, f.frames - start) * up // down)
+            samples = resample_poly(samples, up, down)[lead:lead + length]
+        parts.append(samples.astype(np.float32, copy=False))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def speech_frames(samples: np.ndarray, margin_db: float) -> np.ndarray:
+    """
+    Energy VAD: True for each 30ms frame louder than the noise floor + margin_db.
+
+    The noise floor is the 10th percentile of frame energy; the threshold is
+    kept between VAD_MIN_DB and 6dB under the loudest frame so a file that
+    is all speech, or all quiet, still splits sensibly.
+    """
+    frame_count = len(samples) // VAD_FRAME_SAMPLES
+    if frame_count == 0:
+        return np.ones(1 if len(samples) else 0, dtype=bool)
+    frames = samples[:frame_count * VAD_FRAME_SAMPLES].reshape(frame_count, VAD_FRAME_SAMPLES)
+    energy_db = 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-10)
+    noise_floor = float(np.percentile(energy_db, 10))
+    threshold = max(VAD_MIN_DB, min(noise_floor + margin_db, float(energy_db.max()) - 6.0))
+    return energy_db > threshold
+
+
+def plan_chunks(
+    samples: np.ndarray,
+    max_chunk_seconds: float = 30.0,
+    min_chunk_seconds: float = 5.0,
+    min_silence_seconds: float = 0.3,
+    margin_db: float = 12.0,
+) -> List[AudioChunk]:
+    """
+    Split the signal at silences into chunks of at most max_chunk_seconds.
+
+    Each chunk ends in the middle of the latest silence (at least
+    min_silence_seconds long) between min_chunk_seconds and
+    max_chunk_seconds after its start, or at max_chunk_seconds if the speaker
+    never pauses. Chunks without a single speech frame are dropped.
+    """
+    speech = speech_frames(samples, margin_db)
+    frame_seconds = VAD_FRAME_SAMPLES / SAMPLE_RATE
+    min_silence_frames = max(1, round(min_silence_seconds / frame_seconds))
+
+    # Cut candidates: midpoints of silence runs, in frames
+    cuts = []
+    padded = np.concatenate(([True], speech, [True]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    for silence_start, silence_end in zip(edges[::2], edges[1::2]):
+        if silence_end - silence_start >= min_silence_frames:
+            cuts.append((silence_start + silence_end) // 2)
+    cuts = np.asarray(cuts, dtype=np.int64)
+
+    total_frames = len(speech)
+    # Rounded down: a chunk must never be longer than Whisper's window
+    max_frames = max(1, int(max_chunk_seconds * SAMPLE_RATE) // VAD_FRAME_SAMPLES)
+    min_frames = min(max_frames, round(min_chunk_seconds / frame_seconds))
+    chunks: List[AudioChunk] = []
+    start = 0
+    while start < total_frames:
+        limit = start + max_frames
+        if limit >= total_frames:
+            end = total_frames
+        else:
+            window = cuts[(cuts >= start + min_frames) & (cuts <= limit)]
+            end = int(window[-1]) if len(window) else limit
+        ratio = float(speech[start:end].mean()) if end > start else 0.0
+        if ratio > 0:
+            end_sample = len(samples) if end == total_frames else end * VAD_FRAME_SAMPLES
+            chunks.append(AudioChunk(len(chunks), start * VAD_FRAME_SAMPLES, end_sample, ratio))
+        start = end
+    return chunks
+
+
+def transcribe_samples(model, samples: np.ndarray, offset_seconds: float, language: Optional[str]) -> Dict[str, Any]:
+    """Run Whisper on one chunk and shift its segment times by offset_seconds."""
+    result = model.transcribe(samples, language=language, fp16=False, condition_on_previous_text=False)
+    segments = []
+    for segment in result.get("segments", []):
+        text = segment.get("text", "").strip()
+        if not text:
+            continue
+        segments.append({
+            "start": round(offset_seconds + float(segment["start"]), 3),
+            "end": round(offset_seconds + float(segment["end"]), 3),
+            "text": text,
+            "avg_logprob": float(segment.get("avg_logprob", 0.0)),
+            "no_speech_prob": float(segment.get("no_speech_prob", 0.0)),
+        })
+    return {"language": result.get("language", language or "unknown"), "segments": segments}
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    """Process pool initializer: load Whisper once per worker."""
+    global _worker_model
+    import torch
+    import whisper
+    torch.set_num_threads(max(1, threads))
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_chunk_in_worker(samples: np.ndarray, offset_seconds: float, language: Optional[str]) -> Dict[str, Any]:
+    return transcribe_samples(_worker_model, samples, offset_seconds, language)
+
+
+def merge_chunk_results(chunk_results: List[Dict[str, Any]], duration_seconds: float) -> Dict[str, Any]:
+    """
+    Combine per-chunk results into one transcript.
+
+    Segments are ordered by start time. The language is the one detected for
+    the most speech; confidence is the duration-weighted mean of
+    exp(avg_logprob) over the segments.
+    """
+    segments = sorted((s for result in chunk_results for s in result["segments"]), key=lambda s: s["start"])
+    language_seconds: Dict[str, float] = {}
+    weighted_confidence = 0.0
+    total_seconds = 0.0
+    for segment in segments:
+        length = max(0.0, segment["end"] - segment["start"])
+        weighted_confidence += length * math.exp(min(0.0, segment["avg_logprob"]))
+        total_seconds += length
+    for result in chunk_results:
+        speech_seconds = sum(max(0.0, s["end"] - s["start"]) for s in result["segments"])
+        language_seconds[result["language"]] = language_seconds.get(result["language"], 0.0) + speech_seconds
+
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "language": max(language_seconds, key=language_seconds.get) if language_seconds else "unknown",
+        "confidence": round(weighted_confidence / total_seconds, 4) if total_seconds > 0 else 0.0,
+        "segments": [
+            {"id": i, "start": s["start"], "end": s["end"], "text": s["text"]} for i, s in enumerate(segments)
+        ],
+        "duration_seconds": round(duration_seconds, 3),
+    }
+
+
+class TranscriptionPool:
+    """
+    Chunked transcription over a pool of Whisper worker processes.
+
+    Usage:
+        result = pool.transcribe(path, language, local_model=lambda: model_registry.use("whisper"))
+    """
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        workers: int = 2,
+        threads_per_worker: Optional[int] = None,
+        max_chunk_seconds: float = 30.0,
+        min_chunk_seconds: float = 5.0,
+        min_silence_seconds: float = 0.3,
+        margin_db: float = 12.0,
+    ):
+        self.model_name = model_name
+        self.workers = max(0, workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // max(1, self.workers))
+        self.max_chunk_seconds = max_chunk_seconds
+        self.min_chunk_seconds = min_chunk_seconds
+        self.min_silence_seconds = min_silence_seconds
+        self.margin_db = margin_db
+        self._lock = threading.Lock()
+        self._pool = SpawnProcessPool(
+            "transcription", self.workers,
+            initializer=_init_worker,
+            initargs=(self.model_name, self.threads_per_worker),
+            description=f"{self.threads_per_worker} thread(s) each, model={self.model_name}",
+        )
+        self._chunks_done = 0
+        self._busy_seconds = 0.0
+
+    def transcribe(
+        self,
+        path: str,
+        language: Optional[str] = None,
+        local_model: Optional[Callable[[], AbstractContextManager]] = None,
+        on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Transcribe a file chunk by chunk.
+
+        Args:
+            path: Audio file
+            language: Whisper language code, or None to auto-detect per chunk
+            local_model: Context manager factory yielding a Whisper model, used
+                in-process for single-chunk files or when workers is 0
+            on_chunk: Called after each chunk with {"chunk", "chunks_total",
+                "chunks_done", "start", "end", "segments"}
+
+        Returns:
+            Dict with text, language, confidence, segments, duration_seconds, chunks
+        """
+        started = time.perf_counter()
+        samples = load_audio(path)
+        duration = len(samples) / SAMPLE_RATE
+        chunks = plan_chunks(
+            samples, self.max_chunk_seconds, self.min_chunk_seconds, self.min_silence_seconds, self.margin_db
+        )
+        skipped_seconds = duration - sum(c.end_seconds - c.start_seconds for c in chunks)
+        logger.info(
+            f"Transcribing {path}: {duration:.1f}s in {len(chunks)} chunk(s), "
+            f"{skipped_seconds:.1f}s of silence skipped"
+        )
+
+        results: List[Dict[str, Any]] = []
+
+        def _record(chunk: AudioChunk, result: Dict[str, Any]) -> None:
+            results.append(result)
+            if on_chunk is not None:
+                on_chunk({
+                    "chunk": chunk.index,
+                    "chunks_total": len(chunks),
+                    "chunks_done": len(results),
+                    "start": round(chunk.start_seconds, 3),
+                    "end": round(chunk.end_seconds, 3),
+                    "segments": result["segments"],
+                })
+
+        use_pool = self.workers > 0 and (len(chunks) > 1 or local_model is None)
+        if not chunks:
+            pass
+        elif not use_pool:
+            if local_model is None:
+                raise RuntimeError("No transcription workers and no local Whisper model")
+            with local_model() as model:
+                for chunk in chunks:
+                    _record(chunk, transcribe_samples(
+                        model, samples[chunk.start:chunk.end], chunk.start_seconds, language
+                    ))
+        else:
+            self._run_in_pool(samples, chunks, language, _record)
+
+        merged = merge_chunk_results(results, duration)
+        merged["chunks"] = len(chunks)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._chunks_done += len(chunks)
+            self._busy_seconds += elapsed
+        logger.info(f"Transcribed {path} in {elapsed:.1f}s ({duration / max(elapsed, 1e-6):.1f}x realtime)")
+        return merged
+
+    def _run_in_pool(self, samples: np.ndarray, chunks: List[AudioChunk], language: Optional[str], record) -> None:
+        """
+        Submit chunks with at most two per worker in flight; record results as they finish.
+
+        If a worker dies the pool is replaced and the unfinished chunks are
+        retried once on the new one; a second death raises BrokenProcessPool.
+        """
+        max_in_flight = 2 * self.workers
+        queue = list(chunks)
+        for attempt in range(2):
+            # One pool per attempt, so every chunk of an attempt shares its fate
+            pool = self._pool.get()
+            pending: Dict[Future, AudioChunk] = {}
+            try:
+                while queue or pending:
+                    while queue and len(pending) < max_in_flight:
+                        chunk = queue[0]
+                        # Copy so only this chunk's samples are pickled to the worker
+                        future = pool.submit(
+                            _transcribe_chunk_in_worker, samples[chunk.start:chunk.end].copy(), chunk.start_seconds,
+                            language
+                        )
+                        pending[future] = queue.pop(0)
+                    done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        record(pending.pop(future), result)
+                return
+            except BrokenProcessPool:
+                self._pool.discard(pool)
+                queue = sorted(list(pending.values()) + queue, key=lambda c: c.index)
+                if attempt:
+                    raise
+                logger.warning(f"Retrying {len(queue)} chunk(s) on a new transcription pool")
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool settings and counters, for /health."""
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "workers": self.workers,
+                "threads_per_worker": self.threads_per_worker,
+                "started": self._pool.started,
+                "pool_restarts": self._pool.restarts,
+                "chunks_transcribed": self._chunks_done,
+                "busy_seconds": round(self._busy_seconds, 2),
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown()
+
+
+class TranscriptionJob:
+    """State and append-only progress events of one background transcription."""
+
+    def __init__(self, audio_path: str, language: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.audio_path = audio_path
+        self.language = language
+        self.status = "queued"  # queued, running, completed, failed
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.segments: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    def _emit(self, event: Dict[str, Any]) -> None:
+        self.updated_at = time.time()
+        self.events.append({"job_id": self.id, "status": self.status, **event})
+
+    def mark_running(self) -> None:
+        with self._lock:
+            self.status = "running"
+            self._emit({"event": "started"})
+
+    def add_chunk(self, progress: Dict[str, Any]) -> None:
+        with self._lock:
+            self.chunks_total = progress["chunks_total"]
+            self.chunks_done = progress["chunks_done"]
+            self.segments = sorted(self.segments + progress["segments"], key=lambda s: s["start"])
+            self._emit({"event": "chunk", "progress": self._progress(), **progress})
+
+    def complete(self, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self.status = "completed"
+            self.result = result
+            self._emit({"event": "completed", "progress": 1.0, "result": result})
+
+    def fail(self, error: str) -> None:
+        with self._lock:
+            self.status = "failed"
+            self.error = error
+            self._emit({"event": "failed", "error": error})
+
+    def _progress(self) -> float:
+        return round(self.chunks_done / self.chunks_total, 4) if self.chunks_total else 0.0
+
+    def events_since(self, index: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.events[index:])
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current status, progress and the segments transcribed so far."""
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "audio_path": self.audio_path,
+                "status": self.status,
+                "progress": 1.0 if self.status == "completed" else self._progress(),
+                "chunks_done": self.chunks_done,
+                "chunks_total": self.chunks_total,
+                "segments": list(self.segments),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "updated_at": self.updated_at,
+            }
+
+
+class TranscriptionJobs:
+    """In-memory registry of background transcriptions; finished jobs expire after ttl_seconds."""
+
+    def __init__(self, ttl_seconds: float = 3600.0):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, TranscriptionJob] = {}
+
+    def create(self, audio_path: str, language: Optional[str]) -> TranscriptionJob:
+        job = TranscriptionJob(audio_path, language)
+        with self._lock:
+            self._expire_locked()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        with self._lock:
+            self._expire_locked()
+            return self._jobs.get(job_id)
+
+    def _expire_locked(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.updated_at < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+
+def transcript_windows(
+    segments: List[Dict[str, Any]],
+    max_seconds: float,
+    max_words: int,
+) -> List[Dict[str, Any]]:
+    """
+    Group consecutive segments into windows for embedding.
+
+    A window is closed before a segment that would take it past max_seconds
+    or max_words; max_seconds <= 0 gives one window per segment. A single
+    segment longer than max_words forms its own window (the encoder
+    truncates it).
+
+    Returns:
+        List of {"index", "start", "end", "text", "segment_ids"}, in time order
+    """
+    windows: List[Dict[str, Any]] = []
+    current: List[Dict[str, Any]] = []
+    words = 0
+
+    def close():
+        windows.append({
+            "index": len(windows),
+            "start": current[0]["start"],
+            "end": current[-1]["end"],
+            "text": " ".join(s["text"] for s in current),
+            "segment_ids": [s["id"] for s in current],
+        })
+
+    for segment in segments:
+        text = segment["text"].strip()
+        if not text:
+            continue
+        segment_words = len(text.split())
+        if current and (
+            max_seconds <= 0
+            or segment["end"] - current[0]["start"] > max_seconds
+            or words + segment_words > max_words
+        ):
+            close()
+            current, words = [], 0
+        current.append({**segment, "text": text})
+        words += segment_words
+    if current:
+        close()
+    return windows
+
+
+def create_transcription_pool(model_name: str) -> TranscriptionPool:
+    """Build a TranscriptionPool from environment configuration."""
+    threads = os.getenv('TRANSCRIBE_THREADS_PER_WORKER', '')
+    return TranscriptionPool(
+        model_name=model_name,
+        workers=int(os.getenv('TRANSCRIBE_WORKERS', '2')),
+        threads_per_worker=int(threads) if threads.strip().isdigit() else None,
+        max_chunk_seconds=float(os.getenv('TRANSCRIBE_CHUNK_SECONDS', '30')),
+        min_chunk_seconds=float(os.getenv('TRANSCRIBE_MIN_CHUNK_SECONDS', '5')),
+        min_silence_seconds=float(os.getenv('VAD_MIN_SILENCE_SECONDS', '0.3')),
+        margin_db=float(os.getenv('VAD_MARGIN_DB', '12')),
+    )
+
+
+def create_transcription_jobs() -> TranscriptionJobs:
+    """Build a TranscriptionJobs registry from environment configuration."""
+    return TranscriptionJobs(ttl_seconds=float(os.getenv('TRANSCRIBE_JOB_TTL_SECONDS', '3600')))
@@ -0,0 +1,487 @@
+"""
+Single-pass streaming video decoder.
+
+decode_video() opens the file once and, in one sequential pass:
+
+- Reads container metadata (fps, frame count, resolution, duration)
+- Captures the thumbnail frame as the decoder passes its timestamp
+- Detects scene cuts and keeps one keyframe per scene
+
+Sampling modes:
+
+- scene: sequential pass with scene-cut detection (above)
+- interval: one frame every ``frame_interval`` frames
+- seek: at most ``max_sampled_frames`` frames spread evenly over
+  CAP_PROP_FRAME_COUNT, so cost scales with the number of samples rather
+  than the length of the video
+- auto: seek for videos of at least ``seek_min_duration`` seconds, scene
+  otherwise
+
+interval and seek jump straight to each sampled frame (the decoder resumes at
+the preceding keyframe) and use grab() when the next sample is close enough
+that decoding forward is cheaper than a seek.
+
+Memory stays bounded regardless of video length: only the previous frame's
+histogram is kept for comparison, keyframes are stored downscaled, and once
+``max_keyframes`` is reached the keyframe list is thinned to every other
+entry and the minimum scene spacing doubles, so keyframes still cover the
+whole video.
+
+Scene detection (SceneDetector) is built for 4K input:
+
+- Frames are downscaled to ``analysis_width`` before the HSV conversion
+- Each frame's histogram is computed once and reused as the "previous"
+  histogram for the next comparison
+- Frames that cannot start a scene (inside the minimum scene spacing, or
+  off the ``frame_stride`` grid) are grabbed without being retrieved, which
+  skips the colour conversion and copy
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Candidate thumbnail times in seconds, in order of preference (the first one
+# inside the video wins), matching the old seek-based thumbnail fallbacks
+THUMBNAIL_POSITIONS = (1.0, 0.5, 2.0, 5.0, 0.0)
+
+SAMPLING_MODES = ("auto", "scene", "interval", "seek")
+
+# Below this many frames to the next sample, grab() forward instead of seeking
+# (a seek restarts decoding at the previous keyframe, typically 1-2s back)
+DEFAULT_SEEK_THRESHOLD_SECONDS = 2.0
+
+
+@dataclass
+class Keyframe:
+    """One scene keyframe, stored as a downscaled RGB array."""
+    frame_index: int
+    timestamp: float
+    image: np.ndarray
+    difference: float  # Histogram difference that triggered the cut (1.0 for the first frame)
+
+
+@dataclass
+class VideoDecodeResult:
+    """Everything /analyze-video needs from one decode pass."""
+    metadata: Dict
+    sampling_mode: str = "scene"
+    keyframes: List[Keyframe] = field(default_factory=list)
+    thumbnail: Optional[np.ndarray] = None  # RGB, at most thumbnail_max_side on the long edge
+    frames_decoded: int = 0
+    frames_analyzed: int = 0  # Frames whose histogram was computed
+    frames_grabbed: int = 0   # Frames skipped with grab() (decoded but never retrieved)
+    seeks: int = 0
+    analysis_seconds: float = 0.0
+    decode_seconds: float = 0.0
+
+    @property
+    def throughput_fps(self) -> float:
+        """Frames decoded per second of wall time for the whole pass."""
+        return self.frames_decoded / self.decode_seconds if self.decode_seconds > 0 else 0.0
+
+    def stats(self) -> Dict:
+        """Decode counters and throughput for responses and logs."""
+        return {
+            "sampling_mode": self.sampling_mode,
+            "frames_decoded": self.frames_decoded,
+            "frames_analyzed": self.frames_analyzed,
+            "frames_grabbed": self.frames_grabbed,
+            "keyframes": len(self.keyframes),
+            "seeks": self.seeks,
+            "decode_seconds": round(self.decode_seconds, 3),
+            "analysis_seconds": round(self.analysis_seconds, 3),
+            "throughput_fps": round(self.throughput_fps, 1),
+        }
+
+
+class SceneDetector:
+    """
+    HSV histogram scene-cut detector that works on downscaled frames.
+
+    update() converts each frame once, at ``analysis_width`` pixels wide, and
+    keeps its histogram for the next comparison. The difference is
+    1 - correlation of the normalized hue/saturation histograms, so 0 means
+    identical and 1 completely different.
+    """
+
+    def __init__(self, analysis_width: int = 256, bins: Sequence[int] = (50, 60)):
+        self.analysis_width = analysis_width
+        self.bins = list(bins)
+        self._prev_hist: Optional[np.ndarray] = None
+        self.frames_analyzed = 0
+        self.analysis_seconds = 0.0
+
+    def histogram(self, frame: np.ndarray) -> np.ndarray:
+        """Normalized hue/saturation histogram of a BGR frame."""
+        height, width = frame.shape[:2]
+        if self.analysis_width > 0 and width > self.analysis_width:
+            # Linear sampling is ~40x cheaper than INTER_AREA on 4K and
+            # histograms don't need the anti-aliasing
+            size = (self.analysis_width, max(1, int(height * self.analysis_width / width)))
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, self.bins, [0, 180, 0, 256])
+        cv2.normalize(hist, hist, alpha=0, beta=1, norm_type=cv2.NORM_MINMAX)
+        return hist
+
+    def update(self, frame: np.ndarray) -> Optional[float]:
+        """
+        Histogram a frame and compare it with the previous analyzed frame.
+
+        Returns:
+            Difference in [0, 1], or None for the first frame
+        """
+        started = time.perf_counter()
+        try:
+            hist = self.histogram(frame)
+        except Exception as e:
+            logger.error(f"Failed to calculate frame histogram: {str(e)}")
+            return 0.0
+        difference = None
+        if self._prev_hist is not None:
+            difference = 1.0 - cv2.compareHist(self._prev_hist, hist, cv2.HISTCMP_CORREL)
+        self._prev_hist = hist
+        self.frames_analyzed += 1
+        self.analysis_seconds += time.perf_counter() - started
+        return difference
+
+
+def read_video_metadata(cap: "cv2.VideoCapture") -> Dict:
+    """Container metadata from an open capture (no frames are decoded)."""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    return {
+        "duration_seconds": frame_count / fps if fps > 0 else 0,
+        "frame_count": frame_count,
+        "fps": fps,
+        "resolution": f"{width}x{height}",
+    }
+
+
+def resize_to_max_side(frame: np.ndarray, max_side: int) -> np.ndarray:
+    """Downscale a frame so its longer side is at most max_side (never upscales)."""
+    height, width = frame.shape[:2]
+    longest = max(height, width)
+    if max_side <= 0 or longest <= max_side:
+        return frame
+    scale = max_side / longest
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def keyframe_spans(timestamps: Sequence[float], duration: float, centered: bool) -> List[Tuple[float, float]]:
+    """
+    Time span (start, end) in seconds that each keyframe stands for.
+
+    Scene keyframes (centered=False) open their scene, which runs until the
+    next keyframe. Sampled frames (centered=True) cover the time halfway to
+    their neighbours. The last span runs to the end of the video.
+    """
+    count = len(timestamps)
+    end_of_video = max(duration, timestamps[-1]) if count else duration
+    spans = []
+    for i, timestamp in enumerate(timestamps):
+        if centered:
+            start = 0.0 if i == 0 else (timestamps[i - 1] + timestamp) / 2
+            end = end_of_video if i == count - 1 else (timestamp + timestamps[i + 1]) / 2
+        else:
+            start = 0.0 if i == 0 else timestamp
+            end = end_of_video if i == count - 1 else timestamps[i + 1]
+        spans.append((start, end))
+    return spans
+
+
+def _thumbnail_frame_index(metadata: Dict, positions: Sequence[float]) -> int:
+    """Frame number of the first candidate thumbnail time that lies inside the video."""
+    fps = metadata["fps"]
+    total_frames = metadata["frame_count"]
+    duration = metadata["duration_seconds"]
+    for pos in positions:
+        if pos > duration:
+            continue
+        if fps <= 0:
+            return 30
+        return max(0, min(int(fps * pos), total_frames - 1))
+    return 0
+
+
+def resolve_sampling_mode(mode: str, metadata: Dict, seek_min_duration: float) -> str:
+    """Pick the concrete mode for "auto" and fall back to scene when positions can't be computed."""
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {mode} (expected one of {', '.join(SAMPLING_MODES)})")
+    if mode == "auto":
+        long_video = metadata["duration_seconds"] >= seek_min_duration
+        mode = "seek" if long_video and metadata["frame_count"] > 0 else "scene"
+    elif mode in ("interval", "seek") and metadata["frame_count"] <= 0:
+        logger.warning(f"Video reports no frame count, using scene mode instead of {mode}")
+        mode = "scene"
+    return mode
+
+
+def sample_frame_indices(
+    frame_count: int,
+    fps: float,
+    max_frames: int,
+    frame_interval: Optional[int] = None,
+    min_spacing_seconds: float = 1.0,
+) -> List[int]:
+    """
+    Frame numbers to sample, evenly spaced and capped at max_frames.
+
+    With frame_interval the spacing is that interval, widened if needed to
+    stay under the cap. Otherwise the video is split into max_frames equal
+    spans (each at least min_spacing_seconds long) and the middle frame of
+    each span is sampled.
+    """
+    if frame_count <= 0 or max_frames <= 0:
+        return []
+    cap_spacing = frame_count / max_frames
+    if frame_interval:
+        step = max(frame_interval, int(np.ceil(cap_spacing)))
+        return list(range(0, frame_count, step))[:max_frames]
+    spacing = max(cap_spacing, fps * min_spacing_seconds if fps > 0 else 1.0, 1.0)
+    count = max(1, min(max_frames, int(frame_count / spacing)))
+    return sorted({min(frame_count - 1, int((i + 0.5) * spacing)) for i in range(count)})
+
+
+def _scan_scenes(
+    cap: "cv2.VideoCapture",
+    result: VideoDecodeResult,
+    thumbnail_index: int,
+    scene_threshold: float,
+    min_scene_duration_frames: int,
+    keyframe_max_side: int,
+    max_keyframes: int,
+    thumbnail_max_side: int,
+    analysis_width: int,
+    frame_stride: int,
+) -> None:
+    """Sequential pass: thumbnail plus one keyframe per detected scene."""
+    metadata = result.metadata
+    fps = metadata["fps"]
+    min_gap = max(1, min_scene_duration_frames)
+    max_keyframes = max(1, max_keyframes)
+    stride = max(1, frame_stride)
+
+    detector = SceneDetector(analysis_width=analysis_width)
+    last_scene_frame = 0
+    frame_index = 0
+
+    logger.info(
+        f"Decoding video in one pass ({metadata['resolution']}, {metadata['frame_count']} frames, "
+        f"threshold={scene_threshold}, analysis width={analysis_width}, stride={stride})"
+    )
+
+    while True:
+        # Keep the first frame as a fallback thumbnail in case the target
+        # index is never reached (frame counts in some containers are wrong)
+        wants_thumbnail = frame_index == thumbnail_index or result.thumbnail is None
+        # Only frames on the stride grid that are within one stride of the
+        # scene-spacing window need a histogram: the one just before the
+        # window opens provides the "previous" histogram for the first
+        # comparison inside it
+        wants_analysis = frame_index % stride == 0 and (
+            frame_index == 0 or frame_index - last_scene_frame >= min_gap - stride
+        )
+
+        if wants_thumbnail or wants_analysis:
+            ret, frame = cap.read()
+            if not ret or frame is None or frame.size == 0:
+                break
+        else:
+            if not cap.grab():
+                break
+            result.frames_grabbed += 1
+            frame_index += 1
+            continue
+
+        if wants_thumbnail:
+            result.thumbnail = cv2.cvtColor(resize_to_max_side(frame, thumbnail_max_side), cv2.COLOR_BGR2RGB)
+
+        if wants_analysis:
+            difference = detector.update(frame)
+            is_first = difference is None
+            is_cut = not is_first and frame_index - last_scene_frame >= min_gap and difference >= scene_threshold
+
+            if is_first or is_cut:
+                result.keyframes.append(Keyframe(
+                    frame_index=frame_index,
+                    timestamp=frame_index / fps if fps > 0 else 0.0,
+                    image=cv2.cvtColor(resize_to_max_side(frame, keyframe_max_side), cv2.COLOR_BGR2RGB),
+                    difference=1.0 if is_first else float(difference),
+                ))
+                last_scene_frame = frame_index
+                if is_cut:
+                    logger.debug(f"Frame {frame_index}: Scene change detected (diff={difference:.3f})")
+
+                if len(result.keyframes) > max_keyframes:
+                    # Too many cuts: keep every other keyframe and require
+                    # twice the spacing from here on, so coverage stays even
+                    result.keyframes = result.keyframes[::2]
+                    min_gap *= 2
+                    logger.info(
+                        f"Keyframe cap {max_keyframes} reached at frame {frame_index}, "
+                        f"thinned to {len(result.keyframes)} (min spacing now {min_gap} frames)"
+                    )
+
+        frame_index += 1
+
+    result.frames_decoded = frame_index
+    result.frames_analyzed = detector.frames_analyzed
+    result.analysis_seconds = detector.analysis_seconds
+    if metadata["frame_count"] <= 0 and frame_index > 0:
+        # Container reported no frame count; the full pass tells us the real one
+        metadata["frame_count"] = frame_index
+        metadata["duration_seconds"] = frame_index / fps if fps > 0 else 0
+
+
+def _read_positions(
+    cap: "cv2.VideoCapture",
+    result: VideoDecodeResult,
+    indices: Sequence[int],
+    thumbnail_index: int,
+    keyframe_max_side: int,
+    thumbnail_max_side: int,
+    seek_threshold_frames: int,
+) -> None:
+    """Decode only the given frame numbers (plus the thumbnail frame), seeking across large gaps."""
+    fps = result.metadata["fps"]
+    wanted = set(indices)
+    position = 0  # Index of the frame the next read() returns
+
+    for target in sorted(wanted | {thumbnail_index}):
+        gap = target - position
+        if gap > seek_threshold_frames:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            result.seeks += 1
+        else:
+            for _ in range(gap):
+                if not cap.grab():
+                    break
+                result.frames_grabbed += 1
+        position = target + 1
+
+        ret, frame = cap.read()
+        if not ret or frame is None or frame.size == 0:
+            logger.warning(f"Could not read frame {target}")
+            continue
+        result.frames_decoded += 1
+
+        if target == thumbnail_index:
+            result.thumbnail = cv2.cvtColor(resize_to_max_side(frame, thumbnail_max_side), cv2.COLOR_BGR2RGB)
+        if target in wanted:
+            result.keyframes.append(Keyframe(
+                frame_index=target,
+                timestamp=target / fps if fps > 0 else 0.0,
+                image=cv2.cvtColor(resize_to_max_side(frame, keyframe_max_side), cv2.COLOR_BGR2RGB),
+                difference=0.0,
+            ))
+
+    result.frames_decoded += result.frames_grabbed
+
+
+def decode_video(
+    video_path: str,
+    detect_scenes: bool = True,
+    scene_threshold: float = 0.3,
+    min_scene_duration_frames: int = 15,
+    keyframe_max_side: int = 768,
+    max_keyframes: int = 64,
+    thumbnail_max_side: int = 800,
+    thumbnail_positions: Sequence[float] = THUMBNAIL_POSITIONS,
+    analysis_width: int = 256,
+    frame_stride: int = 1,
+    sampling_mode: str = "scene",
+    frame_interval: int = 30,
+    max_sampled_frames: int = 32,
+    min_sample_spacing_seconds: float = 1.0,
+    seek_min_duration: float = 600.0,
+) -> VideoDecodeResult:
+    """
+    Decode a video once, collecting metadata, a thumbnail frame and keyframes.
+
+    Args:
+        video_path: Path to the video file
+        detect_scenes: If False, only the thumbnail frame is decoded (no keyframes)
+        scene_threshold: Histogram difference (0-1) that counts as a scene change
+        min_scene_duration_frames: Minimum frames between scene changes to avoid flickering
+        keyframe_max_side: Longest side of stored keyframes in pixels
+        max_keyframes: Upper bound on scene keyframes (the list is thinned past it)
+        thumbnail_max_side: Longest side of the returned thumbnail frame
+        thumbnail_positions: Candidate thumbnail times in seconds
+        analysis_width: Width frames are downscaled to for scene detection
+        frame_stride: Analyze every Nth frame only (1 = every frame); cuts are
+            then detected between frames N apart
+        sampling_mode: "scene", "interval", "seek" or "auto" (see module docstring)
+        frame_interval: Spacing in frames for interval mode
+        max_sampled_frames: Cap on frames sampled in interval and seek modes
+        min_sample_spacing_seconds: Minimum spacing between seek samples
+        seek_min_duration: Duration in seconds from which auto picks seek
+
+    Returns:
+        VideoDecodeResult (empty metadata if the file could not be opened)
+
+    Raises:
+        ValueError: Unknown sampling_mode
+    """
+    started = time.perf_counter()
+    if sampling_mode not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling mode: {sampling_mode} (expected one of {', '.join(SAMPLING_MODES)})")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.error(f"Could not open video file: {video_path}")
+        return VideoDecodeResult(metadata={})
+
+    try:
+        metadata = read_video_metadata(cap)
+        fps = metadata["fps"]
+        thumbnail_index = _thumbnail_frame_index(metadata, thumbnail_positions)
+        seek_threshold = int(fps * DEFAULT_SEEK_THRESHOLD_SECONDS) if fps > 0 else 60
+
+        if not detect_scenes:
+            result = VideoDecodeResult(metadata=metadata, sampling_mode="thumbnail")
+            _read_positions(cap, result, [], thumbnail_index, keyframe_max_side, thumbnail_max_side, seek_threshold)
+        else:
+            mode = resolve_sampling_mode(sampling_mode, metadata, seek_min_duration)
+            result = VideoDecodeResult(metadata=metadata, sampling_mode=mode)
+            if mode == "scene":
+                _scan_scenes(
+                    cap, result, thumbnail_index, scene_threshold, min_scene_duration_frames,
+                    keyframe_max_side, max_keyframes, thumbnail_max_side, analysis_width, frame_stride,
+                )
+            else:
+                indices = sample_frame_indices(
+                    metadata["frame_count"],
+                    fps,
+                    max_sampled_frames,
+                    frame_interval=frame_interval if mode == "interval" else None,
+                    min_spacing_seconds=min_sample_spacing_seconds,
+                )
+                logger.info(
+                    f"Sampling {len(indices)} of {metadata['frame_count']} frames ({mode} mode, "
+                    f"{metadata['duration_seconds']:.0f}s video)"
+                )
+                _read_positions(
+                    cap, result, indices, thumbnail_index, keyframe_max_side, thumbnail_max_side, seek_threshold,
+                )
+    finally:
+        cap.release()
+
+    result.decode_seconds = time.perf_counter() - started
+    logger.info(
+        f"Decoded {result.frames_decoded} frames in {result.decode_seconds:.2f}s "
+        f"({result.sampling_mode} mode, {result.throughput_fps:.0f} fps; {result.frames_analyzed} analyzed, "
+        f"{result.frames_grabbed} grabbed, {result.seeks} seeks): "
+        f"{len(result.keyframes)} keyframes, thumbnail {'captured' if result.thumbnail is not None else 'missing'}"
+    )
+    return result
@@ -0,0 +1,145 @@
+"""
+Waveform - streaming min/max envelope and direct Pillow rasterization of audio.
+
+The audio thumbnail is drawn from the whole file without a plotting library:
+
+- Streams the file through soundfile in fixed-size blocks (no resampling,
+  memory bounded by the block size whatever the duration)
+- Reduces each block to per-pixel-column min, max and sum of squares with
+  numpy ``reduceat``, so the envelope covers the full duration
+- Rasterizes the envelope straight into a uint8 array (min/max band plus a
+  brighter RMS core) and wraps it in a PIL image, no plotting library
+
+The result is deterministic for a given file and size, so the thumbnail
+service's freshness check (see thumbnails.py) caches it like any other
+thumbnail.
+
+Configuration (environment variables):
+- AUDIO_WAVEFORM_BLOCK_FRAMES: frames read per block (default: 65536)
+"""
+
+import logging
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import soundfile as sf
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WAVEFORM_BLOCK_FRAMES = int(os.getenv('AUDIO_WAVEFORM_BLOCK_FRAMES', '65536'))
+
+# Same palette as the old matplotlib thumbnail
+BACKGROUND = (26, 26, 26)      # #1a1a1a
+ENVELOPE = (0, 140, 168)       # #00d4ff at ~0.65 alpha over the background
+RMS = (0, 212, 255)            # #00d4ff
+
+
+def compute_envelope(path: str, columns: int, block_frames: int = WAVEFORM_BLOCK_FRAMES) -> Dict[str, np.ndarray]:
+    """
+    Per-column min, max and RMS of the whole file, mixed down to mono.
+
+    Args:
+        path: Audio file soundfile can read (WAV, FLAC, OGG, MP3, AIFF, ...)
+        columns: Number of pixel columns the duration is divided into
+        block_frames: Frames decoded per block
+
+    Returns:
+        Dict with "min", "max", "rms" (float32 arrays of length columns),
+        "duration_seconds" and "sample_rate"
+    """
+    if not SOUNDFILE_AVAILABLE:
+        raise RuntimeError("soundfile is required for waveform envelopes")
+
+    with sf.SoundFile(path) as f:
+        total_frames = f.frames
+        if total_frames <= 0:
+            raise ValueError(f"No audio frames in {path}")
+        columns = max(1, min(columns, total_frames))
+
+        mins = np.full(columns, np.inf, dtype=np.float32)
+        maxs = np.full(columns, -np.inf, dtype=np.float32)
+        squares = np.zeros(columns, dtype=np.float64)
+        counts = np.zeros(columns, dtype=np.int64)
+
+        # First frame of each column: frame i belongs to column (i * columns) // total_frames
+        column_starts = (np.arange(columns + 1, dtype=np.int64) * total_frames + columns - 1) // columns
+
+        position = 0
+        for block in f.blocks(blocksize=block_frames, dtype='float32', always_2d=True):
+            samples = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+            count = len(samples)
+            if count == 0:
+                continue
+            # Columns touched by this block and where each starts within it
+            first = (position * columns) // total_frames
+            last = ((position + count - 1) * columns) // total_frames
+            block_columns = np.arange(first, last + 1)
+            starts = np.concatenate(([0], column_starts[first + 1:last + 1] - position))
+
+            mins[block_columns] = np.minimum(mins[block_columns], np.minimum.reduceat(samples, starts))
+            maxs[block_columns] = np.maximum(maxs[block_columns], np.maximum.reduceat(samples, starts))
+            squares[block_columns] += np.add.reduceat(samples.astype(np.float64) ** 2, starts)
+            counts[block_columns] += np.diff(np.append(starts, count))
+            position += count
+
+        sample_rate = f.samplerate
+
+    empty = counts == 0
+    mins[empty] = 0.0
+    maxs[empty] = 0.0
+    rms = np.sqrt(squares / np.maximum(counts, 1)).astype(np.float32)
+    return {
+        "min": mins,
+        "max": maxs,
+        "rms": rms,
+        "duration_seconds": position / sample_rate if sample_rate else 0.0,
+        "sample_rate": sample_rate,
+    }
+
+
+def render_envelope(envelope: Dict[str, np.ndarray], size: Tuple[int, int]) -> Image.Image:
+    """
+    Rasterize an envelope into an RGB image.
+
+    Each column is filled from its min to its max sample (the waveform
+    band), with the +/-RMS range drawn brighter on top. Amplitudes are
+    scaled to the loudest peak so quiet recordings stay visible.
+    """
+    width, height = size
+    mins, maxs, rms = envelope["min"], envelope["max"], envelope["rms"]
+    if len(mins) != width:
+        # Resample columns (nearest) if the envelope was computed at another width
+        index = (np.arange(width) * len(mins)) // width
+        mins, maxs, rms = mins[index], maxs[index], rms[index]
+
+    peak = float(max(np.abs(mins).max(initial=0.0), np.abs(maxs).max(initial=0.0)))
+    scale = (height / 2 - 2) / peak if peak > 0 else 0.0
+    center = height / 2
+
+    rows = np.arange(height, dtype=np.float32)[:, None]
+    # Image rows grow downwards: the max sample maps to the top of the band
+    band = (rows >= center - maxs[None, :] * scale - 0.5) & (rows <= center - mins[None, :] * scale + 0.5)
+    core = np.abs(rows - center) <= (rms[None, :] * scale)
+
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[:] = BACKGROUND
+    pixels[band] = ENVELOPE
+    pixels[band & core] = RMS
+    return Image.fromarray(pixels)
+
+
+def render_waveform(path: str, size: Tuple[int, int], block_frames: int = WAVEFORM_BLOCK_FRAMES) -> Image.Image:
+    """Full-duration waveform image of an audio file (see compute_envelope/render_envelope)."""
+    envelope = compute_envelope(path, size[0], block_frames=block_frames)
+    logger.debug(
+        f"Waveform envelope for {path}: {envelope['duration_seconds']:.1f}s at "
+        f"{envelope['sample_rate']}Hz into {len(envelope['min'])} columns"
+    )
+    return render_envelope(envelope, size)